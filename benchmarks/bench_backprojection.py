@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""
+Measure back-projection of depth maps into a fused point cloud for
+capture sets of different sizes.
+
+Usage:
+    python benchmarks/bench_backprojection.py --views 10 50 200 --stride 2
+"""
+
+import argparse
+
+import numpy as np
+
+from bench_utils import time_call
+from mapping_service.pointcloud import backproject, pinhole_intrinsics
+
+
+def make_inputs(num_views, height, width, seed=0):
+    """Build random depth maps, poses and colors for num_views 1 MP views."""
+    rng = np.random.default_rng(seed)
+    depth = rng.uniform(0.5, 10.0, size=(num_views, height, width)).astype(np.float32)
+    # Roughly 5% of pixels have no depth
+    depth[rng.random(depth.shape) < 0.05] = 0.0
+    poses = np.tile(np.eye(4, dtype=np.float32), (num_views, 1, 1))
+    poses[:, 0, 3] = np.arange(num_views) * 0.1
+    colors = rng.integers(0, 256, size=(num_views, height, width, 3), dtype=np.uint8)
+    intrinsics = pinhole_intrinsics(np.tile([height, width], (num_views, 1)))
+    return depth, intrinsics, poses, colors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--views", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--width", type=int, default=1152)
+    parser.add_argument("--height", type=int, default=864)
+    parser.add_argument("--stride", type=int, default=2)
+    parser.add_argument("--no-colors", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    megapixels = args.width * args.height / 1e6
+    print(f"{args.width}x{args.height} ({megapixels:.1f} MP) views, stride {args.stride}")
+    for num_views in args.views:
+        depth, intrinsics, poses, colors = make_inputs(num_views, args.height, args.width)
+        colors = None if args.no_colors else colors
+        cloud = backproject(depth, intrinsics, poses, colors=colors, stride=args.stride)
+        stats = time_call(
+            lambda: backproject(depth, intrinsics, poses, colors=colors, stride=args.stride),
+            args.repeat,
+        )
+        rate = len(cloud) / stats["median"] / 1e6
+        print(
+            f"  {num_views:>4} views {stats['median']:8.3f} s  "
+            f"{len(cloud) / 1e6:7.2f} M points  {rate:6.1f} M points/s"
+        )
+        del depth, colors, cloud
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""
+Measure inference throughput and tail latency of BatchScheduler under
+bursty load from many small requests.
+
+The model is simulated by a cost model in which every forward pass pays a
+fixed overhead plus a per-view cost, which is what makes batching pay off
+for CPU inference.
+
+Usage:
+    python benchmarks/bench_batching.py --clients 16 --requests 20
+"""
+
+import time
+import random
+import argparse
+import threading
+import statistics
+
+from bench_utils import percentile
+from mapping_service.batching import BatchScheduler
+
+
+def run(max_batch_size, max_wait_ms, args):
+    """Drive one scheduler configuration and return throughput and latencies."""
+    def forward(groups):
+        views = sum(len(group) for group in groups)
+        time.sleep(args.overhead_ms / 1000.0 + views * args.per_view_ms / 1000.0)
+        return [None] * len(groups)
+
+    scheduler = BatchScheduler(
+        forward, max_batch_size=max_batch_size, max_wait_seconds=max_wait_ms / 1000.0
+    )
+    latencies = []
+    lock = threading.Lock()
+
+    def client(seed):
+        rng = random.Random(seed)
+        for _ in range(args.requests):
+            time.sleep(rng.expovariate(1000.0 / args.think_ms))
+            views = [None] * rng.randint(2, 4)
+            start = time.perf_counter()
+            scheduler.infer(views)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stats = scheduler.stats()
+    scheduler.shutdown()
+
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": percentile(latencies, 99),
+        "mean_batch_views": stats["mean_batch_views"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per client")
+    parser.add_argument("--overhead-ms", type=float, default=20.0, help="Cost per forward pass")
+    parser.add_argument("--per-view-ms", type=float, default=2.0, help="Cost per view")
+    parser.add_argument("--think-ms", type=float, default=50.0, help="Mean gap between requests")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--waits-ms", type=float, nargs="+", default=[2.0, 10.0, 25.0])
+    args = parser.parse_args()
+
+    print(
+        f"{args.clients} clients x {args.requests} requests of 2-4 views, "
+        f"{args.overhead_ms} ms/pass + {args.per_view_ms} ms/view"
+    )
+    print(f"  {'batch':>5} {'wait ms':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'views/pass':>10}")
+    for max_batch_size in args.batch_sizes:
+        # Without batching the wait never applies, so one row is enough
+        waits = args.waits_ms[:1] if max_batch_size == 1 else args.waits_ms
+        for max_wait_ms in waits:
+            result = run(max_batch_size, max_wait_ms, args)
+            print(
+                f"  {max_batch_size:>5} {max_wait_ms:>8.1f} {result['throughput']:>8.1f} "
+                f"{result['p50'] * 1000:>8.1f} {result['p99'] * 1000:>8.1f} "
+                f"{result['mean_batch_views']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Compare two benchmark result files written with --output.
+
+Every numeric value present in both files is listed with its relative
+change, so a run on a branch can be checked against one on main. Values
+whose names end in seconds or bytes, or that are latency percentiles, are
+flagged when they grow by more than the threshold.
+
+Usage:
+    python benchmarks/bench_compare.py main.json branch.json --threshold 10
+"""
+
+import json
+import argparse
+
+# Lower is better for these; everything else is informational
+COST_SUFFIXES = ("seconds", "bytes", "mean", "p50", "p95", "p99", "max")
+
+
+def flatten(value, prefix=""):
+    """Yield (path, number) pairs for every numeric leaf."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten(item, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from flatten(item, f"{prefix}[{index}]")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, float(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument(
+        "--threshold", type=float, default=10.0, help="Percent increase flagged as a regression"
+    )
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    if baseline["benchmark"] != candidate["benchmark"]:
+        parser.error(f"Cannot compare {baseline['benchmark']} with {candidate['benchmark']}")
+    if baseline["config"] != candidate["config"]:
+        print("Warning: the runs used different parameters")
+
+    print(f"{baseline['benchmark']}: {baseline['commit']} -> {candidate['commit']}")
+    old = dict(flatten(baseline["results"]))
+    regressions = 0
+    for path, new_value in flatten(candidate["results"]):
+        if path not in old:
+            continue
+        old_value = old[path]
+        change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+        flag = ""
+        if path.endswith(COST_SUFFIXES) and change > args.threshold:
+            flag = "  <-- regression"
+            regressions += 1
+        print(f"  {path:<50} {old_value:>14.6g} {new_value:>14.6g} {change:>+8.1f}%{flag}")
+    print(f"{regressions} regression(s) above {args.threshold}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+Compare write time and file size of the PLY, GLB and OBJ exporters.
+
+Usage:
+    python benchmarks/bench_exporters.py --points 2000000
+"""
+
+import os
+import argparse
+import tempfile
+
+import numpy as np
+
+from bench_utils import time_call
+from mapping_service.exporters import available_formats, get_exporter
+from mapping_service.pointcloud import PointCloud
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--faces", type=int, default=0, help="Random triangles to add")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    normals = rng.normal(size=(args.points, 3)).astype(np.float32)
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    cloud = PointCloud(
+        rng.random((args.points, 3), dtype=np.float32) * 10,
+        rng.integers(0, 256, (args.points, 3), dtype=np.uint8),
+        None,
+        normals,
+    )
+    faces = None
+    if args.faces:
+        faces = rng.integers(0, args.points, (args.faces, 3), dtype=np.int64)
+
+    print(f"{args.points} points with colors and normals, {args.faces} faces")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        baseline = None
+        for name in ["obj"] + [n for n in available_formats() if n != "obj"]:
+            exporter = get_exporter(name)
+            path = os.path.join(temp_dir, "model" + exporter.extension)
+
+            def write():
+                with open(path, "wb") as f:
+                    exporter.write(f, cloud, faces)
+
+            stats = time_call(write, args.repeat)
+            size = os.path.getsize(path)
+            baseline = baseline or (stats["median"], size)
+            print(
+                f"  {name:<4} {stats['median']:8.3f} s  {size / 1e6:8.1f} MB  "
+                f"({baseline[0] / stats['median']:5.1f}x faster, "
+                f"{baseline[1] / size:4.1f}x smaller than obj)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""
+Compare per-image latency of the single-pass decode against the
+original validate-then-load path, and of draft-mode downscaled decoding.
+
+Usage:
+    python benchmarks/bench_image_loading.py --count 20 --width 4000 --height 3000
+"""
+
+import argparse
+import tempfile
+
+from bench_utils import make_images, time_call
+from mapping_service.image_processor import ImageProcessor
+
+
+def two_step(processor: ImageProcessor, paths):
+    """The original path: validate_image followed by load_image."""
+    for path in paths:
+        if processor.validate_image(path):
+            processor.load_image(path)
+
+
+def single_pass(processor: ImageProcessor, paths):
+    """The unified path used by preprocess_images."""
+    for path in paths:
+        processor.decode_image(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--format", choices=["JPEG", "PNG"], default="JPEG")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--max-long-edge", type=int, default=1024,
+        help="Target long edge for the draft-mode decode row",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = make_images(temp_dir, args.count, args.width, args.height, args.format)
+        processor = ImageProcessor(upload_dir=temp_dir, max_image_size=1 << 30)
+
+        downscaling = ImageProcessor(
+            upload_dir=temp_dir, max_image_size=1 << 30, max_long_edge=args.max_long_edge
+        )
+
+        print(f"{args.count} x {args.width}x{args.height} {args.format}")
+        rows = (
+            ("validate+load", two_step, processor),
+            ("decode_image", single_pass, processor),
+            (f"draft@{args.max_long_edge}", single_pass, downscaling),
+        )
+        for name, func, proc in rows:
+            stats = time_call(lambda: func(proc, paths), args.repeat)
+            per_image_ms = stats["median"] / args.count * 1000
+            print(f"  {name:<14} {per_image_ms:8.2f} ms/image (median of {args.repeat})")
+
+
+if __name__ == "__main__":
+    main()
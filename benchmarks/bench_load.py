@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+"""
+Load-test the upload API in-process with concurrent clients.
+
+Each client thread uploads a capture set through ``/api/upload`` on an app
+built by ``create_app``, follows the job's event stream until it finishes,
+and records the time to acceptance and to completion. Every request uses
+distinct images unless --repeat-content is given, so the result cache does
+not hide the pipeline's cost. Reports p50/p95/p99 latencies, completed
+jobs per second and the per-stage timings of the finished jobs.
+
+Usage:
+    python benchmarks/bench_load.py --clients 8 --requests 10 --views 4 --output load.json
+"""
+
+import io
+import os
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+
+from bench_utils import latency_summary, make_capture_set, save_results
+from mapping_service.app import create_app
+
+# Pipeline order; any other stages are listed after these
+STAGE_ORDER = ["ingest", "queued", "decode", "inference", "fusion", "export"]
+
+
+def build_payloads(directory, args):
+    """Encode one capture set per request, kept in memory."""
+    count = 1 if args.repeat_content else args.clients * args.requests
+    payloads = []
+    for i in range(count):
+        paths = make_capture_set(
+            os.path.join(directory, f"request_{i:04d}"),
+            args.views,
+            resolutions=[(args.width, args.height)],
+            seed=i * args.views,
+        )
+        files = []
+        for path in paths:
+            with open(path, "rb") as f:
+                files.append((f.read(), os.path.basename(path)))
+        payloads.append(files)
+    return payloads
+
+
+def final_event(stream_text):
+    """Return the last event of a Server-Sent Events body."""
+    messages = [m for m in stream_text.split("\n\n") if m.startswith("id:")]
+    return json.loads(messages[-1].split("data: ", 1)[1])
+
+
+def client(app, payloads, index, args, records, lock):
+    """Upload requests one after another and record their outcome."""
+    test_client = app.test_client()
+    for i in range(args.requests):
+        files = payloads[(index * args.requests + i) % len(payloads)]
+        data = {"images": [(io.BytesIO(content), name) for content, name in files]}
+        start = time.perf_counter()
+        response = test_client.post("/api/upload", data=data, content_type="multipart/form-data")
+        accepted = time.perf_counter() - start
+        record = {"status_code": response.status_code, "accept_seconds": accepted}
+        if response.status_code == 202:
+            job = response.get_json()
+            # The stream ends once the job has finished
+            event = final_event(test_client.get(job["events_url"]).get_data(as_text=True))
+            record.update(
+                {
+                    "job_status": event["status"],
+                    "total_seconds": time.perf_counter() - start,
+                    "timings": event["timings"],
+                }
+            )
+        with lock:
+            records.append(record)
+
+
+def summarize(records, elapsed):
+    """Aggregate per-request records into latency and throughput figures."""
+    done = [r for r in records if r.get("job_status") == "done"]
+    summary = {
+        "requests": len(records),
+        "completed": len(done),
+        "failed": sum(1 for r in records if r.get("job_status") == "failed"),
+        "rejected": sum(1 for r in records if r["status_code"] == 503),
+        "errors": sum(1 for r in records if r["status_code"] not in (202, 503)),
+        "elapsed_seconds": elapsed,
+        "requests_per_second": len(done) / elapsed if elapsed else 0.0,
+        "accept_latency": latency_summary([r["accept_seconds"] for r in records]),
+    }
+    if done:
+        summary["total_latency"] = latency_summary([r["total_seconds"] for r in done])
+        seen = {stage for r in done for stage in r["timings"]}
+        stages = [s for s in STAGE_ORDER if s in seen] + sorted(seen - set(STAGE_ORDER))
+        summary["stages"] = {
+            stage: latency_summary([r["timings"].get(stage, 0.0) for r in done])
+            for stage in stages
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=5, help="Requests per client")
+    parser.add_argument("--views", type=int, default=4, help="Images per request")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--workers", type=int, default=2, help="JOB_WORKERS")
+    parser.add_argument("--queue-size", type=int, default=64, help="JOB_QUEUE_SIZE")
+    parser.add_argument("--batch-size", type=int, default=1, help="INFERENCE_MAX_BATCH_SIZE")
+    parser.add_argument(
+        "--repeat-content", action="store_true",
+        help="Send the same images in every request, exercising the caches",
+    )
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        payloads = build_payloads(os.path.join(temp_dir, "payloads"), args)
+        app = create_app(
+            {
+                "TESTING": True,
+                "UPLOAD_FOLDER": os.path.join(temp_dir, "uploads"),
+                "OUTPUT_FOLDER": os.path.join(temp_dir, "outputs"),
+                "MODEL_WARMUP": "sync",
+                "JOB_WORKERS": args.workers,
+                "JOB_QUEUE_SIZE": args.queue_size,
+                "INFERENCE_MAX_BATCH_SIZE": args.batch_size,
+            }
+        )
+        # The app logs every job at INFO level
+        logging.getLogger().setLevel(logging.WARNING)
+
+        records = []
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(target=client, args=(app, payloads, i, args, records, lock))
+            for i in range(args.clients)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        summary = summarize(records, time.perf_counter() - start)
+        app.extensions["job_manager"].shutdown()
+
+    print(
+        f"{args.clients} clients x {args.requests} requests of {args.views} "
+        f"{args.width}x{args.height} views, {args.workers} job workers"
+    )
+    print(
+        f"  completed {summary['completed']}/{summary['requests']} "
+        f"({summary['rejected']} rejected, {summary['failed']} failed, {summary['errors']} errors) "
+        f"in {summary['elapsed_seconds']:.2f} s, {summary['requests_per_second']:.2f} jobs/s"
+    )
+    print(f"  {'latency ms':<12} {'p50':>8} {'p95':>8} {'p99':>8}")
+    rows = [("accept", summary["accept_latency"])]
+    if "total_latency" in summary:
+        rows.append(("end-to-end", summary["total_latency"]))
+        rows += [(f"  {stage}", stats) for stage, stats in summary["stages"].items()]
+    for name, stats in rows:
+        print(
+            f"  {name:<12} {stats['p50'] * 1000:>8.1f} {stats['p95'] * 1000:>8.1f} "
+            f"{stats['p99'] * 1000:>8.1f}"
+        )
+
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key != "output"}
+        save_results(args.output, "load", config, summary)
+
+
+if __name__ == "__main__":
+    main()
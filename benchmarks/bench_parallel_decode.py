@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+"""
+Measure preprocess_images wall time for sequential, threaded and
+process-pool decoding.
+
+Usage:
+    python benchmarks/bench_parallel_decode.py --count 60 --workers 16
+"""
+
+import argparse
+import tempfile
+
+from bench_utils import make_images, time_call
+from mapping_service.image_processor import ImageProcessor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=60)
+    parser.add_argument("--width", type=int, default=2000)
+    parser.add_argument("--height", type=int, default=1500)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = make_images(temp_dir, args.count, args.width, args.height)
+        configs = [
+            ("sequential", ImageProcessor(temp_dir, max_workers=1)),
+            ("thread", ImageProcessor(temp_dir, max_workers=args.workers)),
+            ("process", ImageProcessor(temp_dir, max_workers=args.workers, executor="process")),
+        ]
+
+        print(f"{args.count} x {args.width}x{args.height} JPEG, {args.workers} workers")
+        for name, processor in configs:
+            stats = time_call(lambda: processor.preprocess_images(paths), args.repeat)
+            print(f"  {name:<10} {stats['median']:8.3f} s (median of {args.repeat})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+Measure per-stage latency and memory of ImageProcessor and ModelGenerator
+on synthetic capture sets of increasing size.
+
+Each capture set mixes resolutions and JPEG/PNG files. Stages are timed
+through the generator's on_stage callback, the same hook that reports
+job progress, and each stage's peak traced allocation (NumPy arrays and
+Python objects; not PIL's internal buffers) is measured with tracemalloc.
+
+Usage:
+    python benchmarks/bench_pipeline.py --views 1 10 50 200 --output pipeline.json
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+from bench_utils import make_capture_set, save_results
+from mapping_service.image_processor import ImageProcessor
+from mapping_service.metrics import current_rss_bytes
+from mapping_service.model_generator import ModelGenerator
+
+
+class StageRecorder:
+    """Times consecutive stages and records each one's peak traced memory."""
+
+    def __init__(self):
+        self.stages = {}
+        self._current = None
+        self._started = None
+
+    def start(self, stage, **details):
+        """End the current stage, if any, and start the next one."""
+        self.stop()
+        tracemalloc.reset_peak()
+        self._current = stage
+        self._started = time.perf_counter()
+
+    def stop(self):
+        """End the current stage."""
+        if self._current is None:
+            return
+        _, peak = tracemalloc.get_traced_memory()
+        self.stages[self._current] = {
+            "seconds": time.perf_counter() - self._started,
+            "peak_bytes": peak,
+        }
+        self._current = None
+
+
+def parse_resolution(text):
+    """Parse WIDTHxHEIGHT."""
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def run(num_views, args, temp_dir):
+    """Reconstruct one capture set and return its per-stage measurements."""
+    capture_dir = os.path.join(temp_dir, f"capture_{num_views}")
+    paths = make_capture_set(capture_dir, num_views, args.resolutions, args.formats)
+    input_bytes = sum(os.path.getsize(path) for path in paths)
+
+    processor = ImageProcessor(
+        os.path.join(temp_dir, "uploads"), max_long_edge=args.max_long_edge
+    )
+    generator = ModelGenerator(
+        output_dir=os.path.join(temp_dir, "outputs"),
+        point_stride=args.stride,
+        voxel_size=args.voxel_size,
+        output_format=args.format,
+        precompress=args.precompress,
+        tile_max_points=args.tile_max_points,
+    )
+    generator.load_model()
+
+    recorder = StageRecorder()
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        recorder.start("decode")
+        views, rejected = processor.preprocess_images_with_report(paths)
+        results = generator.generate_3d_model(views, on_stage=recorder.start)
+        recorder.stop()
+        total = time.perf_counter() - start
+    finally:
+        tracemalloc.stop()
+
+    if results is None:
+        raise RuntimeError(f"Reconstruction of {num_views} views failed")
+    return {
+        "views": num_views,
+        "rejected": len(rejected),
+        "input_bytes": input_bytes,
+        "decoded_pixels": sum(view["img"].shape[0] * view["img"].shape[1] for view in views),
+        "points": results["num_points"],
+        "output_bytes": os.path.getsize(results["output_path"]),
+        "seconds": total,
+        "rss_bytes": current_rss_bytes(),
+        "stages": recorder.stages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--views", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument(
+        "--resolutions", type=parse_resolution, nargs="+",
+        default=[(640, 480), (1280, 720), (1920, 1080)], help="WIDTHxHEIGHT values",
+    )
+    parser.add_argument("--formats", nargs="+", choices=["JPEG", "PNG"], default=["JPEG", "PNG"])
+    parser.add_argument("--max-long-edge", type=int, default=None)
+    parser.add_argument("--stride", type=int, default=4)
+    parser.add_argument("--voxel-size", type=float, default=0.01)
+    parser.add_argument("--format", default="ply", help="Output format")
+    parser.add_argument("--precompress", nargs="*", default=["gzip"])
+    parser.add_argument("--tile-max-points", type=int, default=None)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    stage_names = ["decode", "inference", "fusion", "export"]
+    print(f"  {'views':>5} {'MP':>7} {'total s':>8} " + " ".join(
+        f"{name + ' s':>12} {'MB':>6}" for name in stage_names
+    ))
+    runs = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for num_views in args.views:
+            result = run(num_views, args, temp_dir)
+            runs.append(result)
+            cells = []
+            for name in stage_names:
+                stage = result["stages"].get(name, {"seconds": 0.0, "peak_bytes": 0})
+                cells.append(f"{stage['seconds']:>12.3f} {stage['peak_bytes'] / 1e6:>6.0f}")
+            print(
+                f"  {num_views:>5} {result['decoded_pixels'] / 1e6:>7.1f} "
+                f"{result['seconds']:>8.3f} " + " ".join(cells)
+            )
+
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key != "output"}
+        save_results(args.output, "pipeline", config, runs)
+
+
+if __name__ == "__main__":
+    main()
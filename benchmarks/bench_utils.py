@@ -0,0 +1,171 @@
+"""
+Shared helpers for the benchmark scripts.
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import statistics
+import subprocess
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Make the package importable when running scripts from a checkout
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+def make_images(
+    directory: str, count: int, width: int, height: int, fmt: str = "JPEG", seed: int = 0
+) -> List[str]:
+    """
+    Write synthetic photo-like images for benchmarking.
+
+    Smooth gradients plus noise compress roughly like real photos, unlike the
+    solid-color images used in the unit tests.
+
+    Args:
+        directory: Directory to write the images into
+        count: Number of images
+        width: Image width in pixels
+        height: Image height in pixels
+        fmt: PIL format name ("JPEG" or "PNG")
+        seed: Random seed
+
+    Returns:
+        List of image paths
+    """
+    rng = np.random.default_rng(seed)
+    ext = ".jpg" if fmt == "JPEG" else ".png"
+    ys = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    xs = np.linspace(0, 255, width, dtype=np.float32)[None, :]
+    paths = []
+    for i in range(count):
+        base = np.stack([ys + 0 * xs, xs + 0 * ys, (ys + xs) / 2], axis=-1)
+        noise = rng.normal(0, 12, size=(height, width, 3)).astype(np.float32)
+        pixels = np.clip(base + noise + i, 0, 255).astype(np.uint8)
+        path = os.path.join(directory, f"view_{i:04d}{ext}")
+        Image.fromarray(pixels).save(path, fmt, quality=90)
+        paths.append(path)
+    return paths
+
+
+def time_call(func: Callable[[], object], repeat: int = 5) -> Dict[str, float]:
+    """
+    Time a callable over several runs.
+
+    Args:
+        func: Zero-argument callable to time
+        repeat: Number of timed runs
+
+    Returns:
+        Dictionary with min, median and mean seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+    }
+
+
+def make_capture_set(
+    directory: str,
+    count: int,
+    resolutions: Sequence[Tuple[int, int]] = ((1280, 720), (1920, 1080), (4000, 3000)),
+    formats: Sequence[str] = ("JPEG", "PNG"),
+    seed: int = 0,
+) -> List[str]:
+    """
+    Write a capture set mixing resolutions and formats, like a phone upload.
+
+    Views cycle through every (resolution, format) combination so any
+    count exercises all of them.
+
+    Args:
+        directory: Directory to write the images into
+        count: Number of views
+        resolutions: (width, height) pairs to cycle through
+        formats: PIL format names to cycle through
+        seed: Random seed
+
+    Returns:
+        List of image paths in capture order
+    """
+    combos = [(size, fmt) for size in resolutions for fmt in formats]
+    paths = []
+    for i in range(count):
+        (width, height), fmt = combos[i % len(combos)]
+        subdir = os.path.join(directory, f"{i:04d}")
+        os.makedirs(subdir, exist_ok=True)
+        paths += make_images(subdir, 1, width, height, fmt, seed=seed + i)
+    return paths
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Return the pct-th percentile of values (nearest rank)."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def latency_summary(latencies: Sequence[float]) -> Dict[str, float]:
+    """Mean and p50/p95/p99 of latencies in seconds."""
+    return {
+        "count": len(latencies),
+        "mean": statistics.mean(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies),
+    }
+
+
+def save_results(path: str, benchmark: str, config: Dict[str, Any], results: Any) -> None:
+    """
+    Write benchmark results as JSON, tagged with the commit and environment.
+
+    Files written for two commits can be compared with bench_compare.py.
+
+    Args:
+        path: Output file
+        benchmark: Name of the benchmark script
+        config: Parameters the benchmark ran with
+        results: JSON-serializable results
+    """
+    document = {
+        "benchmark": benchmark,
+        "commit": _git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "config": config,
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+    print(f"Results written to {path}")
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+Measure voxel-grid downsampling of a large fused point cloud.
+
+Usage:
+    python benchmarks/bench_voxel_downsample.py --points 100000000 --voxel-size 0.01
+"""
+
+import argparse
+
+import numpy as np
+
+from bench_utils import time_call
+from mapping_service.pointcloud import PointCloud, voxel_downsample
+
+
+def make_cloud(num_points, normals, seed=0):
+    """Points scattered over a few noisy surfaces inside a 10 m cube."""
+    rng = np.random.default_rng(seed)
+    points = rng.random((num_points, 3), dtype=np.float32) * 10
+    # Snap one axis to a handful of planes so voxels are shared, like real scans
+    points[:, 2] = np.round(points[:, 2]) + rng.normal(0, 0.01, num_points).astype(np.float32)
+    colors = rng.integers(0, 256, (num_points, 3), dtype=np.uint8)
+    point_normals = None
+    if normals:
+        point_normals = np.zeros((num_points, 3), dtype=np.float32)
+        point_normals[:, 2] = 1.0
+    return PointCloud(points, colors, None, point_normals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=100_000_000)
+    parser.add_argument("--voxel-size", type=float, default=0.01)
+    parser.add_argument("--chunk-size", type=int, default=10_000_000)
+    parser.add_argument("--normals", action="store_true")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    cloud = make_cloud(args.points, args.normals)
+    result = voxel_downsample(cloud, args.voxel_size, args.chunk_size)
+    stats = time_call(
+        lambda: voxel_downsample(cloud, args.voxel_size, args.chunk_size), args.repeat
+    )
+    print(
+        f"{args.points / 1e6:.0f} M points -> {len(result) / 1e6:.2f} M voxels "
+        f"at {args.voxel_size} m: {stats['median']:.2f} s "
+        f"({args.points / stats['median'] / 1e6:.1f} M points/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -17,10 +17,13 @@ setup(
         "werkzeug>=3.0.0",
     ],
     extras_require={
+        "zstd": ["zstandard>=0.21.0"],
+        "redis": ["redis>=4.2.0"],
         "dev": [
             "pytest>=7.4.0",
             "pytest-cov>=4.1.0",
             "pytest-mock>=3.11.0",
+            "fakeredis[lua]>=2.20.0",
             "black>=23.0.0",
             "flake8>=6.0.0",
             "mypy>=1.5.0",
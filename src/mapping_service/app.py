@@ -3,17 +3,31 @@ Flask web application for 3D mapping service.
 """
 
 import os
+import json
+import atexit
+import time
 import logging
-from flask import Flask, request, render_template, jsonify, send_from_directory
+from flask import Flask, Response, abort, g, request, render_template, jsonify, send_file
+from werkzeug.http import parse_content_range_header
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
-from .image_processor import ImageProcessor
+from .image_processor import UploadTooLargeError
 from .model_generator import ModelGenerator
+from .job_manager import Job, JobManager
+from .broker import BrokerJobManager, open_broker
+from .services import DEFAULT_CONFIG, create_services
+from .uploads import UploadRequest
+from .upload_sessions import ChunkOffsetError, UploadSessionError, UploadSessionManager
+from .exporters import available_formats, exporter_for_path, get_exporter
+from .artifacts import ENCODING_SUFFIXES, load_manifest
+from .metrics import CONTENT_TYPE, ServiceMetrics, counter_family, current_rss_bytes, gauge_family
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
+logger = logging.getLogger(__name__)
 
 
 def create_app(config=None):
@@ -37,23 +51,160 @@ def create_app(config=None):
         template_folder=template_folder,
         static_folder=static_folder,
     )
+    # Stream multipart file parts to disk instead of buffering them
+    app.request_class = UploadRequest
 
     # Default configuration
-    app.config.update(
-        {
-            "UPLOAD_FOLDER": "uploads",
-            "OUTPUT_FOLDER": "outputs",
-            "MAX_CONTENT_LENGTH": 50 * 1024 * 1024,  # 50MB max request size
-        }
-    )
+    app.config.update(DEFAULT_CONFIG)
 
     # Override with provided config
     if config:
         app.config.update(config)
 
     # Initialize services
-    image_processor = ImageProcessor(upload_dir=app.config["UPLOAD_FOLDER"])
-    model_generator = ModelGenerator(output_dir=app.config["OUTPUT_FOLDER"])
+    broker_url = app.config["JOB_BROKER_URL"]
+    if broker_url:
+        # API nodes and workers share the upload folder but not reference
+        # counts, so no node may evict uploads another is still using
+        services = create_services(dict(app.config, UPLOAD_STORE_MAX_BYTES=None))
+    else:
+        services = create_services(app.config)
+    view_cache = services.view_cache
+    image_processor = services.image_processor
+    result_cache = services.result_cache
+    model_generator = services.model_generator
+    memory_budget = services.memory_budget
+    pipeline = services.pipeline
+    if app.config["DECODE_EXECUTOR"] == "process":
+        # Decode processes live as long as the server
+        atexit.register(services.shutdown)
+    # With a broker, workers run the model and this node only queues jobs
+    if app.config["MODEL_WARMUP"] != "none" and not broker_url:
+        model_generator.warm_up(background=app.config["MODEL_WARMUP"] == "background")
+    metrics = ServiceMetrics()
+
+    if broker_url:
+        job_manager = BrokerJobManager(
+            open_broker(broker_url),
+            max_queued=app.config["JOB_QUEUE_SIZE"],
+            on_finish=metrics.observe_job,
+        )
+    else:
+        job_manager = JobManager(
+            max_workers=app.config["JOB_WORKERS"],
+            max_queued=app.config["JOB_QUEUE_SIZE"],
+            max_finished=app.config["JOB_HISTORY"],
+            on_finish=metrics.observe_job,
+        )
+    upload_sessions = UploadSessionManager(
+        image_processor,
+        app.config["UPLOAD_SESSION_DIR"] or os.path.join(app.config["UPLOAD_FOLDER"], ".sessions"),
+        ttl_seconds=app.config["UPLOAD_SESSION_TTL"],
+        max_parts=app.config["UPLOAD_SESSION_MAX_IMAGES"],
+        node_id=app.config["UPLOAD_SESSION_NODE"],
+        # Views decoded here are only reused by jobs that run on this node
+        prefetch_workers=0 if broker_url else app.config["UPLOAD_PREFETCH_WORKERS"],
+    )
+    app.extensions["job_manager"] = job_manager
+    app.extensions["upload_sessions"] = upload_sessions
+    app.extensions["model_generator"] = model_generator
+    app.extensions["metrics"] = metrics
+
+    def collect_service_stats():
+        """Read queue, cache and model state when /metrics is scraped."""
+        jobs = job_manager.stats()
+        yield gauge_family("jobs_queued", "Jobs waiting for a worker", {"": jobs["queued"]})
+        yield gauge_family("jobs_running", "Jobs currently executing", {"": jobs["running"]})
+        yield gauge_family("job_workers", "Worker threads", {"": jobs["workers"]})
+
+        views = view_cache.stats()
+        yield counter_family(
+            "view_cache_lookups",
+            "Decoded view cache lookups by outcome",
+            {"hit": views["hits"], "disk_hit": views["disk_hits"], "miss": views["misses"]},
+            label="result",
+        )
+        yield gauge_family("view_cache_bytes", "Decoded views held in memory", {"": views["bytes"]})
+
+        results = result_cache.stats()
+        yield counter_family(
+            "result_cache_lookups",
+            "Reconstruction cache lookups by outcome",
+            {"hit": results["hits"], "miss": results["misses"]},
+            label="result",
+        )
+        yield gauge_family("result_cache_bytes", "Size of the result cache", {"": results["bytes"]})
+
+        store = image_processor.store.stats()
+        yield gauge_family("upload_store_bytes", "Size of stored uploads", {"": store["bytes"]})
+        yield counter_family(
+            "upload_dedup_hits", "Uploads matching a stored file", {"": store["dedup_hits"]}
+        )
+
+        scheduler = model_generator.scheduler
+        if scheduler is not None:
+            batching = scheduler.stats()
+            yield counter_family(
+                "inference_batches", "Batched forward passes", {"": batching["batches"]}
+            )
+            yield counter_family(
+                "inference_batch_views", "Views in batched forward passes", {"": batching["views"]}
+            )
+
+        if memory_budget is not None:
+            budget = memory_budget.stats()
+            yield gauge_family(
+                "memory_budget_bytes",
+                "Memory budget shared by running jobs",
+                {"capacity": budget["capacity"], "reserved": budget["reserved"]},
+                label="state",
+            )
+            yield gauge_family(
+                "memory_budget_waiting", "Jobs waiting for memory", {"": budget["waiting"]}
+            )
+
+        sessions = upload_sessions.stats()
+        yield gauge_family("upload_sessions", "Open upload sessions", {"": sessions["sessions"]})
+        yield gauge_family(
+            "upload_session_bytes", "Bytes received by open upload sessions", {"": sessions["bytes"]}
+        )
+
+        yield gauge_family(
+            "model_ready", "Whether the model is loaded", {"": int(model_generator.is_ready())}
+        )
+        yield gauge_family(
+            "resident_memory_bytes", "Resident memory of the process", {"": current_rss_bytes()}
+        )
+
+    metrics.add_collector(collect_service_stats)
+
+    @app.before_request
+    def start_timer():
+        """Note when the request started, for the latency histogram."""
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        """Record request latency and download bytes, and tag upload session responses."""
+        started = g.pop("request_started", None)
+        if started is not None:
+            elapsed = time.perf_counter() - started
+            metrics.observe_request(request.endpoint, request.method, response.status_code, elapsed)
+        if request.path.startswith("/api/uploads"):
+            # Lets load balancers route the rest of a session to this node
+            response.headers["X-Upload-Node"] = upload_sessions.node_id
+        if request.endpoint in ("download_model", "download_tile"):
+            metrics.observe_download(
+                "model" if request.endpoint == "download_model" else "tile",
+                response.headers.get("Content-Encoding", "identity"),
+                response.content_length or 0,
+            )
+        return response
+
+    @app.errorhandler(413)
+    def request_too_large(error):
+        """Report oversized uploads as JSON."""
+        return jsonify({"error": "Upload too large"}), 413
 
     @app.route("/")
     def index():
@@ -68,78 +219,621 @@ def create_app(config=None):
                 "status": "healthy",
                 "service": "3d-mapping",
                 "model_ready": model_generator.is_ready(),
+                "jobs": job_manager.stats(),
             }
         )
 
-    @app.route("/api/upload", methods=["POST"])
-    def upload_images():
+    @app.route("/api/health/live")
+    def liveness():
+        """Liveness probe: the process is up and serving requests."""
+        return jsonify({"status": "alive"})
+
+    @app.route("/api/health/ready")
+    def readiness():
+        """
+        Readiness probe: the model is loaded and jobs can be accepted.
+
+        With a broker the model runs on workers, so the node is ready
+        whenever the broker answers.
+        """
+        if broker_url:
+            try:
+                jobs = job_manager.stats()
+            except Exception as e:
+                logger.warning(f"Broker unavailable: {e}")
+                return jsonify({"ready": False, "error": "Broker unavailable"}), 503
+            return jsonify({"ready": True, "jobs": jobs})
+
+        model = model_generator.model_status()
+        ready = model["state"] == "ready"
+        return jsonify({"ready": ready, "model": model}), 200 if ready else 503
+
+    @app.route("/api/stats")
+    def stats():
+        """Report job queue and cache statistics."""
+        scheduler = model_generator.scheduler
+        return jsonify(
+            {
+                "jobs": job_manager.stats(),
+                "upload_store": image_processor.store.stats(),
+                "upload_sessions": upload_sessions.stats(),
+                "view_cache": view_cache.stats(),
+                "result_cache": result_cache.stats(),
+                "artifacts": model_generator.artifacts.stats(),
+                "batching": scheduler.stats() if scheduler is not None else None,
+                "memory_budget": memory_budget.stats() if memory_budget is not None else None,
+            }
+        )
+
+    def resolve_output_format(requested):
         """
-        Handle image upload and 3D model generation.
+        Validate a requested model format, falling back to the default.
 
         Returns:
-            JSON response with generation results
+            Tuple of (output format, error response); the error response
+            is None when the format is supported
+        """
+        output_format = (requested or app.config["OUTPUT_FORMAT"]).lower()
+        if get_exporter(output_format) is None:
+            formats = ", ".join(available_formats())
+            error = jsonify({"error": f"Unsupported format, expected one of: {formats}"})
+            return None, (error, 400)
+        return output_format, None
+
+    def save_request_images():
+        """
+        Validate the format and save the uploaded "images" of a request.
+
+        Returns:
+            Tuple of (file paths, filenames, output format, error response);
+            the error response is None on success
         """
         if "images" not in request.files:
-            return jsonify({"error": "No images provided"}), 400
+            return None, None, None, (jsonify({"error": "No images provided"}), 400)
 
         files = request.files.getlist("images")
         if not files or all(f.filename == "" for f in files):
-            return jsonify({"error": "No selected files"}), 400
+            return None, None, None, (jsonify({"error": "No selected files"}), 400)
+
+        output_format, error = resolve_output_format(request.form.get("format"))
+        if error is not None:
+            return None, None, None, error
 
         # Save uploaded files
         file_paths = []
+        filenames = []
         for file in files:
             if file and file.filename:
                 filename = secure_filename(file.filename)
-                file_path = image_processor.save_uploaded_file(
-                    file.read(), filename
-                )
+                try:
+                    file_path = image_processor.save_uploaded_stream(
+                        file.stream, filename
+                    )
+                except UploadTooLargeError as e:
+                    image_processor.release_uploads(file_paths)
+                    return None, None, None, (jsonify({"error": str(e)}), 413)
                 file_paths.append(file_path)
+                filenames.append(filename)
 
         if not file_paths:
-            return jsonify({"error": "No valid images uploaded"}), 400
+            return None, None, None, (jsonify({"error": "No valid images uploaded"}), 400)
+        return file_paths, filenames, output_format, None
 
-        # Preprocess images
-        views = image_processor.preprocess_images(file_paths)
-        if not views:
-            return jsonify({"error": "Failed to process images"}), 400
+    def estimate_job_memory(file_paths, parent_job_id=None):
+        """
+        Estimate a run's memory from the saved images' headers.
 
-        # Generate 3D model
-        results = model_generator.generate_3d_model(views)
-        if results is None:
-            return jsonify({"error": "Failed to generate 3D model"}), 500
+        A run that could never fit the memory budget is refused here, before
+        anything is queued or decoded, and its uploads are released.
 
-        # Return results
-        return jsonify(
-            {
-                "status": "success",
-                "num_images": len(file_paths),
-                "num_views_processed": results["num_views"],
-                "output_file": os.path.basename(results["output_path"]),
-                "download_url": f"/api/download/{os.path.basename(results['output_path'])}",
+        Returns:
+            Tuple of (estimated bytes, error response); the error response
+            is None when the run fits
+        """
+        estimate = pipeline.estimate_memory(file_paths, parent_job_id)
+        if memory_budget is not None and estimate > memory_budget.capacity:
+            image_processor.release_uploads(file_paths)
+            error = {
+                "error": "Images need more memory than the server allows",
+                "estimated_bytes": estimate,
+                "memory_budget_bytes": memory_budget.capacity,
             }
+            return None, (jsonify(error), 413)
+        return estimate, None
+
+    def queue_job(func, file_paths, started, *args, **kwargs):
+        """
+        Submit a pipeline run, releasing the uploads if the queue is full.
+
+        The time since ``started`` is recorded as the job's "ingest" stage,
+        covering the parsing and saving of its uploads.
+
+        Returns:
+            202 response with the id of the queued job, or 503 when busy
+        """
+        num_bytes = sum(os.path.getsize(path) for path in file_paths)
+        metrics.observe_upload(len(file_paths), num_bytes)
+        job = Job()
+        job.record_stage(
+            "ingest", time.perf_counter() - started, files=len(file_paths), bytes=num_bytes
+        )
+        # Preprocessing and generation run in the background; the pipeline
+        # releases the uploaded files when it finishes
+        job = job_manager.enqueue(job, func, *args, **kwargs)
+        if job is None:
+            image_processor.release_uploads(file_paths)
+            response = jsonify({"error": "Server busy, try again later"})
+            response.headers["Retry-After"] = "5"
+            return response, 503
+        if broker_url:
+            # Workers read the uploads from shared storage, which no node
+            # evicts from in broker mode; this node's references end here
+            image_processor.release_uploads(file_paths)
+
+        return (
+            jsonify(
+                {
+                    "status": job.status,
+                    "job_id": job.id,
+                    "status_url": f"/api/jobs/{job.id}",
+                    "result_url": f"/api/jobs/{job.id}/result",
+                    "events_url": f"/api/jobs/{job.id}/events",
+                }
+            ),
+            202,
         )
 
-    @app.route("/api/download/<filename>")
-    def download_model(filename):
+    @app.route("/metrics")
+    def metrics_endpoint():
+        """Expose service metrics in the Prometheus text format."""
+        return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+    @app.route("/api/upload", methods=["POST"])
+    def upload_images():
+        """
+        Handle image upload and queue 3D model generation.
+
+        The optional "format" form field selects the model file format.
+
+        Returns:
+            JSON response with the id of the queued job
+        """
+        started = time.perf_counter()
+        file_paths, filenames, output_format, error = save_request_images()
+        if error is not None:
+            return error
+        memory_bytes, error = estimate_job_memory(file_paths)
+        if error is not None:
+            return error
+        return queue_job(
+            pipeline.run,
+            file_paths,
+            started,
+            file_paths,
+            filenames,
+            output_format,
+            memory_bytes=memory_bytes,
+        )
+
+    def find_upload_session(session_id):
+        """
+        Look up an upload session held by this node.
+
+        Sessions live in the memory of the node that opened them. A session
+        opened on another node sharing UPLOAD_SESSION_DIR is refused with
+        421 and that node's id, which a load balancer pins session requests
+        to through the X-Upload-Node header.
+
+        Returns:
+            Tuple of (session, error response); the error response is None
+            when the session is open on this node
+        """
+        session = upload_sessions.get(session_id)
+        if session is not None:
+            return session, None
+        owner = upload_sessions.owner(session_id)
+        if owner is not None and owner != upload_sessions.node_id:
+            error = {"error": "Upload session is held by another node", "node": owner}
+            return None, (jsonify(error), 421)
+        return None, (jsonify({"error": "Upload session not found"}), 404)
+
+    @app.route("/api/uploads", methods=["POST"])
+    def create_upload_session():
+        """
+        Open a session for uploading images over several requests.
+
+        The optional "format" field, as JSON or form data, selects the
+        model file format of the job the session starts.
+
+        Returns:
+            JSON response with the session id and its URLs
+        """
+        body = request.get_json(silent=True) or request.form
+        output_format, error = resolve_output_format(body.get("format"))
+        if error is not None:
+            return error
+        session = upload_sessions.create(output_format)
+        session_url = f"/api/uploads/{session.id}"
+        return (
+            jsonify(
+                {
+                    "session_id": session.id,
+                    "format": output_format,
+                    "session_url": session_url,
+                    "images_url": f"{session_url}/images",
+                    "commit_url": f"{session_url}/commit",
+                    "ttl_seconds": upload_sessions.ttl_seconds,
+                }
+            ),
+            201,
+        )
+
+    @app.route("/api/uploads/<session_id>")
+    def upload_session_status(session_id):
+        """
+        Report which images of a session have arrived.
+
+        Each image lists the bytes received, so a client resumes an
+        interrupted image from there, and whether it is already decoded.
+
+        Args:
+            session_id: Identifier returned when the session was opened
+
+        Returns:
+            JSON response with the session state
+        """
+        session, error = find_upload_session(session_id)
+        if error is not None:
+            return error
+        return jsonify(session.to_dict())
+
+    @app.route("/api/uploads/<session_id>", methods=["DELETE"])
+    def delete_upload_session(session_id):
+        """
+        Abandon a session and discard its images.
+
+        Args:
+            session_id: Identifier returned when the session was opened
+
+        Returns:
+            Empty 204 response
+        """
+        session, error = find_upload_session(session_id)
+        if error is not None:
+            return error
+        upload_sessions.close(session)
+        return "", 204
+
+    @app.route("/api/uploads/<session_id>/images/<name>", methods=["PUT"])
+    def put_session_image(session_id, name):
+        """
+        Upload one image of a session, whole or in chunks.
+
+        The request body is the raw image. Large images may be sent in
+        pieces with a "Content-Range: bytes <first>-<last>/<size>" header;
+        each chunk must start at the "received" count the session reports
+        for the image, and a chunk starting at 0 restarts the image.
+        Images of a session may be uploaded in parallel.
+
+        Args:
+            session_id: Identifier returned when the session was opened
+            name: Filename of the image
+
+        Returns:
+            JSON response with the state of the image; 409 with the bytes
+            received when a chunk does not start where the image left off
+        """
+        session, error = find_upload_session(session_id)
+        if error is not None:
+            return error
+        filename = secure_filename(name)
+        if not filename:
+            return jsonify({"error": "Invalid image name"}), 400
+
+        offset, total = 0, None
+        if "Content-Range" in request.headers:
+            content_range = parse_content_range_header(request.headers["Content-Range"])
+            if content_range is None or content_range.units != "bytes" or not content_range.length:
+                error = "Expected Content-Range: bytes <first>-<last>/<size>"
+                return jsonify({"error": error}), 400
+            if request.content_length != content_range.stop - content_range.start:
+                return jsonify({"error": "Body length does not match Content-Range"}), 400
+            offset, total = content_range.start, content_range.length
+
+        try:
+            part = upload_sessions.write_part(session, filename, request.stream, offset, total)
+        except ChunkOffsetError as e:
+            return jsonify({"error": str(e), "received": e.received}), 409
+        except UploadTooLargeError as e:
+            return jsonify({"error": str(e)}), 413
+        except UploadSessionError as e:
+            return jsonify({"error": str(e)}), 409
+        return jsonify(part)
+
+    @app.route("/api/uploads/<session_id>/images/<name>", methods=["DELETE"])
+    def delete_session_image(session_id, name):
+        """
+        Remove one image from a session.
+
+        Args:
+            session_id: Identifier returned when the session was opened
+            name: Filename of the image
+
+        Returns:
+            Empty 204 response
+        """
+        session, error = find_upload_session(session_id)
+        if error is not None:
+            return error
+        try:
+            removed = upload_sessions.remove_part(session, secure_filename(name))
+        except UploadSessionError as e:
+            return jsonify({"error": str(e)}), 409
+        if not removed:
+            return jsonify({"error": "Image not found"}), 404
+        return "", 204
+
+    @app.route("/api/uploads/<session_id>/commit", methods=["POST"])
+    def commit_upload_session(session_id):
+        """
+        Queue 3D model generation from a session's images.
+
+        Images are reconstructed in filename order. Every image must be
+        complete; the session closes once the job is queued and stays open
+        if it is refused, so the commit can be retried.
+
+        Args:
+            session_id: Identifier returned when the session was opened
+
+        Returns:
+            JSON response with the id of the queued job
+        """
+        session, error = find_upload_session(session_id)
+        if error is not None:
+            return error
+        try:
+            file_paths, filenames = upload_sessions.begin_commit(session)
+        except UploadSessionError as e:
+            return jsonify({"error": str(e), **session.to_dict()}), 409
+
+        memory_bytes, error = estimate_job_memory(file_paths)
+        if error is not None:
+            upload_sessions.end_commit(session, queued=False)
+            return error
+        # The ingest stage covers the whole upload, from opening the session
+        response, status = queue_job(
+            pipeline.run,
+            file_paths,
+            session.started,
+            file_paths,
+            filenames,
+            session.output_format,
+            memory_bytes=memory_bytes,
+        )
+        upload_sessions.end_commit(session, queued=status == 202)
+        return response, status
+
+    @app.route("/api/jobs/<job_id>/views", methods=["POST"])
+    def add_views(job_id):
+        """
+        Add images to a finished reconstruction.
+
+        Only the new images are processed; the parent job's depth maps,
+        poses and point cloud are reused. The combined reconstruction is
+        produced by a new job, which can itself be extended.
+
+        Args:
+            job_id: Finished job whose reconstruction is extended
+
+        Returns:
+            JSON response with the id of the queued job
+        """
+        started = time.perf_counter()
+        job = job_manager.get(job_id)
+        if job is not None and job.status != job.DONE:
+            return jsonify({"error": "Job has not finished successfully", "job_id": job_id}), 409
+        if model_generator.artifacts.job_dir(job_id) is None:
+            return jsonify({"error": "Job not found"}), 404
+
+        file_paths, filenames, output_format, error = save_request_images()
+        if error is not None:
+            return error
+        memory_bytes, error = estimate_job_memory(file_paths, job_id)
+        if error is not None:
+            return error
+        return queue_job(
+            pipeline.extend,
+            file_paths,
+            started,
+            job_id,
+            file_paths,
+            filenames,
+            output_format,
+            memory_bytes=memory_bytes,
+        )
+
+    @app.route("/api/jobs/<job_id>")
+    def job_status(job_id):
+        """
+        Report the state and progress of a job.
+
+        Args:
+            job_id: Identifier returned by the upload endpoint
+
+        Returns:
+            JSON response with the job state
+        """
+        job = job_manager.get(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(job.to_dict())
+
+    @app.route("/api/jobs/<job_id>/events")
+    def job_events(job_id):
+        """
+        Stream a job's progress as Server-Sent Events.
+
+        Each event carries its id, so a client reconnecting with the
+        Last-Event-ID header (or a "last_event_id" query parameter) resumes
+        where it left off. The stream ends after the job's final "status"
+        event, which includes the duration of every stage.
+
+        Args:
+            job_id: Identifier returned by the upload endpoint
+
+        Returns:
+            text/event-stream response
+        """
+        job = job_manager.get(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        last_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id", "0")
+        try:
+            last_id = int(last_id)
+        except ValueError:
+            return jsonify({"error": "Invalid event id"}), 400
+        keepalive = app.config["EVENTS_KEEPALIVE_SECONDS"]
+
+        def stream():
+            nonlocal last_id
+            while True:
+                events = job.events_since(last_id, timeout=keepalive)
+                if not events:
+                    if job.is_finished:
+                        return
+                    # Comment lines keep proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                for event in events:
+                    last_id = event["id"]
+                    yield _format_event(event)
+
+        return Response(
+            stream(),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @app.route("/api/jobs/<job_id>/result")
+    def job_result(job_id):
+        """
+        Return the result of a finished job.
+
+        Args:
+            job_id: Identifier returned by the upload endpoint
+
+        Returns:
+            JSON response with generation results, or the job state
+            with status 202 while the job is still pending
+        """
+        job = job_manager.get(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        if job.status == job.FAILED:
+            return jsonify({"error": job.error, "job_id": job.id}), 500
+        if job.status != job.DONE:
+            return jsonify(job.to_dict()), 202
+        return jsonify(job.result)
+
+    @app.route("/api/download/<job_id>/<filename>")
+    def download_model(job_id, filename):
         """
         Download a generated 3D model.
 
+        Responses support Range requests for resuming, and conditional
+        requests against a strong ETag derived from the artifact's SHA-256
+        when it was published at export time. A pre-compressed variant is
+        served when the client accepts its encoding.
+
         Args:
+            job_id: Job whose artifact directory holds the file
             filename: Name of the file to download
 
         Returns:
             File download response
         """
-        return send_from_directory(
-            app.config["OUTPUT_FOLDER"],
-            filename,
+        path = _job_file(app.config["OUTPUT_FOLDER"], job_id, filename)
+        if path is None:
+            abort(404)
+
+        exporter = exporter_for_path(filename)
+        serve_path = path
+        etag = True  # Werkzeug's weak default when there is no manifest
+        encoding = None
+        manifest = load_manifest(path)
+        if manifest is not None:
+            etag = manifest["sha256"]
+            encoding = _negotiate_encoding(manifest, request.accept_encodings)
+            if encoding is not None:
+                serve_path = path + ENCODING_SUFFIXES[encoding]
+                etag = manifest["encodings"][encoding]["sha256"]
+
+        response = send_file(
+            serve_path,
+            mimetype=exporter.media_type if exporter else None,
             as_attachment=True,
+            download_name=filename,
+            etag=etag,
+            conditional=True,
+        )
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+        if manifest is not None and manifest["encodings"]:
+            response.vary.add("Accept-Encoding")
+        return response
+
+    @app.route("/api/tiles/<job_id>/<filename>")
+    def download_tile(job_id, filename):
+        """
+        Serve the tileset or one level-of-detail tile of a job's model.
+
+        Viewers load ``tileset.json`` first, render the coarse root tile
+        and fetch child tiles only where more detail is needed.
+
+        Args:
+            job_id: Job whose artifact directory holds the tiles
+            filename: "tileset.json" or a tile file named in it
+
+        Returns:
+            File response
+        """
+        path = _job_file(app.config["OUTPUT_FOLDER"], job_id, ModelGenerator.TILES_DIR, filename)
+        if path is None:
+            abort(404)
+        exporter = exporter_for_path(filename)
+        # Tiles never change once written, so clients may keep them
+        return send_file(
+            path,
+            mimetype=exporter.media_type if exporter else None,
+            conditional=True,
+            max_age=3600,
         )
 
     return app
 
 
+def _job_file(output_folder, job_id, *parts):
+    """Return the path of a file inside a job directory, or None if unsafe or missing."""
+    path = safe_join(output_folder, job_id, *parts)
+    if path is None or not os.path.isfile(path):
+        return None
+    return path
+
+
+def _format_event(event):
+    """Encode a job event as one Server-Sent Events message."""
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+
+def _negotiate_encoding(manifest, accept_encodings):
+    """Pick the pre-compressed variant to serve, preferring the smallest."""
+    variants = sorted(manifest["encodings"].items(), key=lambda item: item[1]["size"])
+    for encoding, _ in variants:
+        if accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+
 if __name__ == "__main__":
     app = create_app()
     # Debug mode should only be enabled for development
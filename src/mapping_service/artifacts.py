@@ -0,0 +1,305 @@
+"""
+Per-job artifact directories with atomic writes and retention.
+"""
+
+import os
+import re
+import gzip
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import IO, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:  # Optional: zstd variants are skipped without it
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Suffix of the JSON sidecar holding an artifact's hash and variants
+MANIFEST_SUFFIX = ".meta.json"
+# Content-Encoding name -> file suffix of the pre-compressed variant
+ENCODING_SUFFIXES = {"zstd": ".zst", "gzip": ".gz"}
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = "wb") -> Iterator[IO]:
+    """
+    Open a file whose contents only become visible once fully written.
+
+    Data goes to a temporary file next to ``path`` which is renamed over it
+    on success and removed on failure, so readers never see partial output.
+
+    Args:
+        path: Final path of the file
+        mode: "wb" for binary or "w" for text output
+
+    Yields:
+        File object to write to
+    """
+    temp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+    try:
+        with open(temp_path, mode) as f:
+            yield f
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def save_array(path: str, array: np.ndarray) -> None:
+    """
+    Atomically save an array in .npy format.
+
+    An array memory-mapped from a whole ``.npy`` file, as ``np.load`` with
+    ``mmap_mode`` returns it, is hard-linked instead of written again when
+    the file system allows it. The link is made by file name, so the file
+    must not have been replaced since it was mapped; finished job and
+    cache entries never are. Files written here are replaced rather than
+    modified, so linked copies never change under each other.
+    """
+    source = _mapped_npy_file(array)
+    if source is not None:
+        temp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+        try:
+            os.link(source, temp_path)
+            os.replace(temp_path, path)
+            return
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    with atomic_write(path) as f:
+        np.save(f, array)
+
+
+def _mapped_npy_file(array: np.ndarray) -> Optional[str]:
+    """Return the .npy file an array maps in full, or None."""
+    filename = getattr(array, "filename", None)
+    if not isinstance(array, np.memmap) or not filename or not array.flags.c_contiguous:
+        return None
+    try:
+        if array.offset + array.nbytes != os.path.getsize(filename):
+            return None
+        with open(filename, "rb") as f:
+            if np.lib.format.read_magic(f) == (1, 0):
+                header = np.lib.format.read_array_header_1_0(f)
+            else:
+                header = np.lib.format.read_array_header_2_0(f)
+        shape, fortran_order, dtype = header
+    except (OSError, ValueError):
+        return None
+    # Slices and reshaped views share the memmap's file but not its layout
+    if fortran_order or tuple(shape) != array.shape or dtype != array.dtype:
+        return None
+    return filename
+
+
+def available_encodings() -> List[str]:
+    """Content encodings that pre-compressed variants can be written in."""
+    return [e for e in ENCODING_SUFFIXES if e != "zstd" or zstandard is not None]
+
+
+def publish_artifact(
+    path: str, encodings: Sequence[str] = ("gzip",), min_saving: float = 0.1
+) -> Dict[str, Any]:
+    """
+    Record an artifact's hash and write its pre-compressed variants.
+
+    Done once at export time so downloads can serve strong ETags and
+    compressed bodies without hashing or compressing per request. A
+    variant is only kept when it is at least ``min_saving`` smaller than
+    the original; unavailable encodings are skipped.
+
+    Args:
+        path: Path of the finished artifact
+        encodings: Content encodings to pre-compress with ("gzip", "zstd")
+        min_saving: Fraction of the size a variant must save to be kept
+
+    Returns:
+        The manifest: "sha256", "size" and the kept "encodings", each
+        with its own "sha256" and "size"
+    """
+    size = os.path.getsize(path)
+    manifest: Dict[str, Any] = {"sha256": file_sha256(path), "size": size, "encodings": {}}
+    for encoding in encodings:
+        if encoding not in available_encodings():
+            logger.debug(f"Skipping unavailable encoding {encoding} for {path}")
+            continue
+        variant = path + ENCODING_SUFFIXES[encoding]
+        with open(path, "rb") as src, atomic_write(variant) as dst:
+            _compress(src, dst, encoding)
+        variant_size = os.path.getsize(variant)
+        if variant_size > size * (1 - min_saving):
+            os.remove(variant)
+            continue
+        manifest["encodings"][encoding] = {"sha256": file_sha256(variant), "size": variant_size}
+
+    with atomic_write(path + MANIFEST_SUFFIX, "w") as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def load_manifest(path: str) -> Optional[Dict[str, Any]]:
+    """Return the manifest written by publish_artifact, or None if there is none."""
+    try:
+        with open(path + MANIFEST_SUFFIX) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def file_sha256(path: str) -> str:
+    """Hex SHA-256 digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_COPY_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _compress(src: IO, dst: IO, encoding: str) -> None:
+    if encoding == "gzip":
+        # mtime=0 keeps the output, and so its hash, deterministic
+        with gzip.GzipFile(fileobj=dst, mode="wb", compresslevel=6, mtime=0) as out:
+            shutil.copyfileobj(src, out, _COPY_CHUNK_SIZE)
+    else:
+        zstandard.ZstdCompressor(level=10).copy_stream(src, dst)
+
+
+class ArtifactStore:
+    """
+    Manages one output directory per job under a shared root.
+
+    Job directories are removed once they are older than ``max_age_seconds``,
+    and the oldest are removed while the total size exceeds ``max_bytes``.
+    Hidden directories (such as the result cache) are left alone.
+    """
+
+    _JOB_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+    def __init__(
+        self,
+        root: str,
+        max_age_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        min_age_seconds: float = 60,
+        gc_interval_seconds: float = 60,
+    ):
+        """
+        Initialize the ArtifactStore.
+
+        Args:
+            root: Directory holding the job directories
+            max_age_seconds: Age after which job directories are removed
+            max_bytes: Total size budget for all job directories
+            min_age_seconds: Directories younger than this are never
+                removed, so in-progress jobs are safe
+            gc_interval_seconds: Minimum time between automatic collections
+        """
+        self.root = root
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self.min_age_seconds = min_age_seconds
+        self.gc_interval_seconds = gc_interval_seconds
+        self._last_gc = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def create_job_dir(self, job_id: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Create the artifact directory for a job.
+
+        Args:
+            job_id: Job identifier; a random one is generated if omitted
+
+        Returns:
+            Tuple of (job_id, directory path)
+
+        Raises:
+            ValueError: If the job id is not a safe directory name
+        """
+        job_id = job_id or uuid.uuid4().hex
+        if not self._JOB_ID_PATTERN.match(job_id):
+            raise ValueError(f"Invalid job id: {job_id}")
+        path = os.path.join(self.root, job_id)
+        os.makedirs(path, exist_ok=True)
+        self.maybe_collect_garbage()
+        return job_id, path
+
+    def job_dir(self, job_id: str) -> Optional[str]:
+        """Return the directory of an existing job, or None if it is missing or unsafe."""
+        if not self._JOB_ID_PATTERN.match(job_id):
+            return None
+        path = os.path.join(self.root, job_id)
+        return path if os.path.isdir(path) else None
+
+    def maybe_collect_garbage(self) -> int:
+        """Run collect_garbage if the last run was long enough ago."""
+        with self._lock:
+            now = time.time()
+            if now - self._last_gc < self.gc_interval_seconds:
+                return 0
+            self._last_gc = now
+        return self.collect_garbage()
+
+    def collect_garbage(self) -> int:
+        """
+        Remove expired job directories and enforce the size budget.
+
+        Returns:
+            Number of directories removed
+        """
+        now = time.time()
+        jobs = sorted(self._job_dirs())
+        total = sum(size for _, _, size in jobs)
+        removed = 0
+        for mtime, path, size in jobs:
+            age = now - mtime
+            if age < self.min_age_seconds:
+                continue
+            expired = self.max_age_seconds is not None and age > self.max_age_seconds
+            over_budget = self.max_bytes is not None and total > self.max_bytes
+            if not expired and not over_budget:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+
+        if removed:
+            logger.info(f"Removed {removed} expired artifact directories")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """Number and total size of job directories."""
+        jobs = self._job_dirs()
+        return {"jobs": len(jobs), "bytes": sum(size for _, _, size in jobs)}
+
+    def _job_dirs(self) -> List[Tuple[float, str, int]]:
+        """Return (mtime, path, size) for every job directory."""
+        jobs = []
+        for entry in os.scandir(self.root):
+            if entry.name.startswith(".") or not entry.is_dir(follow_symlinks=False):
+                continue
+            try:
+                # Includes subdirectories such as LOD tiles
+                files = [
+                    os.path.join(root, name)
+                    for root, _, names in os.walk(entry.path)
+                    for name in names
+                ]
+                stats = [os.stat(f) for f in files]
+                size = sum(st.st_size for st in stats)
+                mtime = max([entry.stat().st_mtime] + [st.st_mtime for st in stats])
+            except OSError:
+                continue
+            jobs.append((mtime, entry.path, size))
+        return jobs
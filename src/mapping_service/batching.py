@@ -0,0 +1,165 @@
+"""
+Dynamic micro-batching of inference requests across concurrent jobs.
+"""
+
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# One list of views per request in the batch, one result per request back
+BatchFunction = Callable[[List[List[Dict[str, Any]]]], List[Any]]
+
+
+class BatchScheduler:
+    """
+    Groups views from concurrent requests into shared forward passes.
+
+    A collector thread takes the first waiting request and keeps adding
+    requests until the batch holds ``max_batch_size`` views or
+    ``max_wait_seconds`` have passed since the first one arrived. The batch
+    function receives one list of views per request and must return one
+    result per request, in the same order; each caller's future resolves to
+    its own result. A single request larger than ``max_batch_size`` runs on
+    its own rather than being split.
+
+    The collector only starts a batch when one of the ``num_workers``
+    slots is free, so requests arriving while every worker is busy wait in
+    the queue and join the next batch together.
+    """
+
+    def __init__(
+        self,
+        batch_fn: BatchFunction,
+        max_batch_size: int = 8,
+        max_wait_seconds: float = 0.01,
+        num_workers: int = 1,
+    ):
+        """
+        Initialize the BatchScheduler.
+
+        Args:
+            batch_fn: Callable running one forward pass over a batch
+            max_batch_size: Maximum number of views per batch
+            max_wait_seconds: Longest time the first request in a batch
+                waits for others to join
+            num_workers: Batches that may run concurrently
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max_wait_seconds
+        self._queue: "queue.Queue" = queue.Queue()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, num_workers), thread_name_prefix="batch"
+        )
+        self._slots = threading.Semaphore(max(1, num_workers))
+        self._carry: Optional[tuple] = None
+        self._stats = {"batches": 0, "requests": 0, "views": 0}
+        self._lock = threading.Lock()
+        self._collector = threading.Thread(
+            target=self._collect_loop, name="batch-collector", daemon=True
+        )
+        self._collector.start()
+
+    def submit(self, views: List[Dict[str, Any]]) -> Future:
+        """
+        Queue the views of one request for batched inference.
+
+        Args:
+            views: Views belonging to a single request
+
+        Returns:
+            Future resolving to this request's result
+        """
+        future: Future = Future()
+        self._queue.put((views, future))
+        return future
+
+    def infer(self, views: List[Dict[str, Any]], timeout: Optional[float] = None) -> Any:
+        """Submit views and block until their result is available."""
+        return self.submit(views).result(timeout)
+
+    def shutdown(self) -> None:
+        """Stop collecting new batches and wait for running ones."""
+        self._queue.put(None)
+        self._collector.join()
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, float]:
+        """Number of batches run and their mean size."""
+        with self._lock:
+            batches = self._stats["batches"]
+            return {
+                **self._stats,
+                "mean_batch_views": self._stats["views"] / batches if batches else 0.0,
+            }
+
+    def _next_request(self, timeout: Optional[float]) -> Optional[tuple]:
+        if self._carry is not None:
+            request, self._carry = self._carry, None
+            return request
+        if timeout is not None and timeout <= 0:
+            return self._queue.get_nowait()
+        return self._queue.get(timeout=timeout)
+
+    def _collect_loop(self) -> None:
+        while True:
+            # Wait for a free worker so that requests keep queueing meanwhile
+            self._slots.acquire()
+            first = self._next_request(None)
+            if first is None:
+                self._slots.release()
+                return
+            batch = [first]
+            size = len(first[0])
+            deadline = time.monotonic() + self.max_wait_seconds
+            stop = False
+
+            while size < self.max_batch_size:
+                try:
+                    request = self._next_request(deadline - time.monotonic())
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                if size + len(request[0]) > self.max_batch_size:
+                    # Too big for this batch; it starts the next one
+                    self._carry = request
+                    break
+                batch.append(request)
+                size += len(request[0])
+
+            self._executor.submit(self._run_batch, batch)
+            if stop:
+                return
+
+    def _run_batch(self, batch: List[tuple]) -> None:
+        try:
+            self._infer_batch(batch)
+        finally:
+            self._slots.release()
+
+    def _infer_batch(self, batch: List[tuple]) -> None:
+        groups = [views for views, _ in batch]
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["requests"] += len(batch)
+            self._stats["views"] += sum(len(views) for views in groups)
+        try:
+            results = self.batch_fn(groups)
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"Batch function returned {len(results)} results for {len(batch)} requests"
+                )
+        except Exception as e:
+            logger.error(f"Batched inference failed: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
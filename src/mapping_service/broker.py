@@ -0,0 +1,855 @@
+"""
+Task brokers that let API nodes queue jobs for separate worker processes.
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+from .job_manager import Job
+
+try:
+    import redis
+except ImportError:  # Optional: only needed for redis:// broker URLs
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class Lease(NamedTuple):
+    """A job claimed by one worker until its lease expires."""
+
+    job_id: str
+    lease_id: str
+    task: Dict[str, Any]
+    state: Dict[str, Any]
+    events: List[Dict[str, Any]]
+    attempts: int
+
+
+class Broker(ABC):
+    """
+    Durable job queue shared by API nodes and workers.
+
+    API nodes ``submit`` jobs. Workers ``lease`` them, renew the lease with
+    ``heartbeat`` while they run, publishing the job's state and new
+    events at the same time, and ``finish`` them. A job whose lease
+    expires, because its worker died or stalled, is leased again by the
+    next worker, up to ``max_attempts`` times. Every worker write names
+    its lease, so a worker that lost its lease cannot overwrite the job.
+    """
+
+    DEFAULT_MAX_ATTEMPTS = 3
+    DEFAULT_HISTORY_SECONDS = 24 * 3600  # Finished jobs kept for status queries
+    ABANDONED_ERROR = "Job abandoned by its workers"
+
+    def __init__(self, max_attempts: Optional[int] = None, history_seconds: Optional[float] = None):
+        """
+        Initialize the Broker.
+
+        Args:
+            max_attempts: Leases granted per job before it is failed
+            history_seconds: How long finished jobs stay queryable
+        """
+        self.max_attempts = max_attempts or self.DEFAULT_MAX_ATTEMPTS
+        self.history_seconds = history_seconds or self.DEFAULT_HISTORY_SECONDS
+
+    @abstractmethod
+    def submit(
+        self,
+        job_id: str,
+        task: Dict[str, Any],
+        state: Dict[str, Any],
+        events: List[Dict[str, Any]],
+        max_queued: Optional[int] = None,
+    ) -> bool:
+        """
+        Queue a job.
+
+        Args:
+            job_id: Identifier of the job
+            task: JSON-serializable description of the work
+            state: Snapshot of the queued job
+            events: Events recorded before queueing
+            max_queued: Refuse the job once this many are waiting
+
+        Returns:
+            True if queued, False if the queue is full
+        """
+
+    @abstractmethod
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[Lease]:
+        """
+        Claim the oldest waiting job, or one whose lease has expired.
+
+        Args:
+            worker_id: Identifier of the claiming worker
+            lease_seconds: How long the claim lasts without a heartbeat
+
+        Returns:
+            The lease, or None if no job is waiting
+        """
+
+    @abstractmethod
+    def heartbeat(
+        self,
+        lease: Lease,
+        lease_seconds: float,
+        state: Dict[str, Any],
+        events: List[Dict[str, Any]],
+    ) -> bool:
+        """
+        Renew a lease and publish the job's progress.
+
+        Args:
+            lease: Lease returned by lease()
+            lease_seconds: New lease duration from now
+            state: Current snapshot of the job
+            events: Events since the last publish
+
+        Returns:
+            False if the lease was lost to another worker
+        """
+
+    @abstractmethod
+    def finish(
+        self,
+        lease: Lease,
+        state: Dict[str, Any],
+        events: List[Dict[str, Any]],
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        """
+        Record a job's outcome and end its lease.
+
+        Args:
+            lease: Lease returned by lease()
+            state: Final snapshot of the job
+            events: Events since the last publish
+            result: Result of a successful job
+            error: Error message of a failed job
+
+        Returns:
+            False if the lease was lost to another worker
+        """
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a job.
+
+        Returns:
+            Dictionary with the job's "status", "state", "result" and
+            "error", or None if unknown
+        """
+
+    @abstractmethod
+    def events(self, job_id: str, after: int = 0) -> List[Dict[str, Any]]:
+        """Return a job's events with ids above ``after``."""
+
+    @abstractmethod
+    def worker_seen(self, worker_id: str) -> None:
+        """Record that a worker is alive, busy or not."""
+
+    @abstractmethod
+    def stats(self, worker_window: float = 60.0) -> Dict[str, int]:
+        """
+        Jobs waiting and running, and workers seen recently.
+
+        Args:
+            worker_window: Seconds within which a worker counts as alive
+        """
+
+    def close(self) -> None:
+        """Release connections."""
+
+
+class SQLiteBroker(Broker):
+    """
+    Broker in a SQLite database, for API nodes and workers on one machine.
+
+    SQLite's locking is unreliable on network filesystems, so use a Redis
+    broker when nodes run on different hosts.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            task TEXT NOT NULL,
+            state TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            worker_id TEXT,
+            lease_id TEXT,
+            lease_expires REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            enqueued_at REAL NOT NULL,
+            finished_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, enqueued_at);
+        CREATE TABLE IF NOT EXISTS events (
+            job_id TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            body TEXT NOT NULL,
+            PRIMARY KEY (job_id, id)
+        );
+        CREATE TABLE IF NOT EXISTS workers (
+            worker_id TEXT PRIMARY KEY,
+            last_seen REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str, **kwargs: Any):
+        """
+        Initialize the SQLiteBroker.
+
+        Args:
+            path: Database file, created if missing
+            **kwargs: Options of Broker
+        """
+        super().__init__(**kwargs)
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connection().executescript(self.SCHEMA)
+
+    def submit(self, job_id, task, state, events, max_queued=None):
+        now = time.time()
+        with self._transaction() as db:
+            if max_queued is not None:
+                (queued,) = db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = ?", (Job.QUEUED,)
+                ).fetchone()
+                if queued >= max_queued:
+                    return False
+            db.execute(
+                "INSERT INTO jobs (job_id, status, task, state, enqueued_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, Job.QUEUED, json.dumps(task), json.dumps(state), now),
+            )
+            self._add_events(db, job_id, events)
+            self._prune(db, now)
+        return True
+
+    def lease(self, worker_id, lease_seconds):
+        now = time.time()
+        lease_id = uuid.uuid4().hex
+        with self._transaction() as db:
+            self._abandon_exhausted(db, now)
+            row = db.execute(
+                "SELECT job_id, task, state, attempts FROM jobs "
+                "WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                "ORDER BY enqueued_at LIMIT 1",
+                (Job.QUEUED, Job.RUNNING, now),
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, task, state, attempts = row
+            db.execute(
+                "UPDATE jobs SET status = ?, worker_id = ?, lease_id = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE job_id = ?",
+                (Job.RUNNING, worker_id, lease_id, now + lease_seconds, job_id),
+            )
+            events = self._read_events(db, job_id, 0)
+        if attempts:
+            logger.warning(f"Re-leasing job {job_id} after {attempts} abandoned attempt(s)")
+        return Lease(job_id, lease_id, json.loads(task), json.loads(state), events, attempts + 1)
+
+    def heartbeat(self, lease, lease_seconds, state, events):
+        with self._transaction() as db:
+            updated = db.execute(
+                "UPDATE jobs SET lease_expires = ?, state = ? "
+                "WHERE job_id = ? AND lease_id = ? AND status = ?",
+                (time.time() + lease_seconds, json.dumps(state), lease.job_id, lease.lease_id, Job.RUNNING),
+            ).rowcount
+            if not updated:
+                return False
+            self._add_events(db, lease.job_id, events)
+        return True
+
+    def finish(self, lease, state, events, result=None, error=None):
+        status = Job.FAILED if error is not None else Job.DONE
+        with self._transaction() as db:
+            updated = db.execute(
+                "UPDATE jobs SET status = ?, state = ?, result = ?, error = ?, lease_id = NULL, "
+                "finished_at = ? WHERE job_id = ? AND lease_id = ? AND status = ?",
+                (
+                    status,
+                    json.dumps(state),
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    time.time(),
+                    lease.job_id,
+                    lease.lease_id,
+                    Job.RUNNING,
+                ),
+            ).rowcount
+            if not updated:
+                return False
+            self._add_events(db, lease.job_id, events)
+        return True
+
+    def get(self, job_id):
+        row = self._connection().execute(
+            "SELECT status, state, result, error FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        status, state, result, error = row
+        return {
+            "status": status,
+            "state": json.loads(state),
+            "result": json.loads(result) if result is not None else None,
+            "error": error,
+        }
+
+    def events(self, job_id, after=0):
+        return self._read_events(self._connection(), job_id, after)
+
+    def worker_seen(self, worker_id):
+        with self._transaction() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO workers (worker_id, last_seen) VALUES (?, ?)",
+                (worker_id, time.time()),
+            )
+
+    def stats(self, worker_window=60.0):
+        db = self._connection()
+        counts = dict(
+            db.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE status IN (?, ?) GROUP BY status",
+                (Job.QUEUED, Job.RUNNING),
+            ).fetchall()
+        )
+        (workers,) = db.execute(
+            "SELECT COUNT(*) FROM workers WHERE last_seen >= ?", (time.time() - worker_window,)
+        ).fetchone()
+        return {
+            "queued": counts.get(Job.QUEUED, 0),
+            "running": counts.get(Job.RUNNING, 0),
+            "workers": workers,
+        }
+
+    def close(self):
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections are not shareable
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        db = self._connection()
+        # Take the write lock up front so concurrent leases serialize
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _abandon_exhausted(self, db: sqlite3.Connection, now: float) -> None:
+        """Fail expired jobs that have used up their attempts."""
+        rows = db.execute(
+            "SELECT job_id, state FROM jobs WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+            (Job.RUNNING, now, self.max_attempts),
+        ).fetchall()
+        for job_id, state in rows:
+            logger.error(f"Job {job_id} abandoned after {self.max_attempts} attempts")
+            db.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_id = NULL, finished_at = ? "
+                "WHERE job_id = ?",
+                (Job.FAILED, self.ABANDONED_ERROR, now, job_id),
+            )
+            (last_id,) = db.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM events WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            event = _abandoned_event(last_id + 1, json.loads(state), now, self.ABANDONED_ERROR)
+            self._add_events(db, job_id, [event])
+
+    def _prune(self, db: sqlite3.Connection, now: float) -> None:
+        cutoff = now - self.history_seconds
+        db.execute(
+            "DELETE FROM events WHERE job_id IN "
+            "(SELECT job_id FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?)",
+            (cutoff,),
+        )
+        db.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,))
+
+    @staticmethod
+    def _add_events(db: sqlite3.Connection, job_id: str, events: List[Dict[str, Any]]) -> None:
+        # Ignoring duplicates makes a retried publish harmless
+        db.executemany(
+            "INSERT OR IGNORE INTO events (job_id, id, body) VALUES (?, ?, ?)",
+            [(job_id, event["id"], json.dumps(event)) for event in events],
+        )
+
+    @staticmethod
+    def _read_events(db: sqlite3.Connection, job_id: str, after: int) -> List[Dict[str, Any]]:
+        rows = db.execute(
+            "SELECT body FROM events WHERE job_id = ? AND id > ? ORDER BY id", (job_id, after)
+        ).fetchall()
+        return [json.loads(body) for (body,) in rows]
+
+
+class RedisBroker(Broker):
+    """
+    Broker on a Redis-compatible server, for nodes on several machines.
+
+    Each state change runs as a single server-side script, so leases stay
+    consistent however many API nodes and workers share the server.
+    Requires the ``redis`` package.
+
+    The lease script finds the job and event keys of the jobs it pops from
+    the queue, so it cannot declare them up front; Redis Cluster, which
+    routes scripts by their declared keys, is not supported.
+    """
+
+    # KEYS: queue, job, events; ARGV: job id, max queued (-1 for none),
+    # task, state, now, events...
+    _SUBMIT = """
+        local limit = tonumber(ARGV[2])
+        if limit >= 0 and redis.call('LLEN', KEYS[1]) >= limit then return 0 end
+        redis.call('HSET', KEYS[2], 'status', 'queued', 'task', ARGV[3], 'state', ARGV[4],
+                   'attempts', 0, 'enqueued_at', ARGV[5])
+        for i = 6, #ARGV do redis.call('RPUSH', KEYS[3], ARGV[i]) end
+        redis.call('LPUSH', KEYS[1], ARGV[1])
+        return 1
+    """
+    # KEYS: queue, leases; ARGV: key prefix, now, lease seconds, worker id,
+    # lease id, max attempts, abandoned error, history milliseconds
+    _LEASE = """
+        local now = tonumber(ARGV[2])
+        for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)) do
+            redis.call('ZREM', KEYS[2], id)
+            redis.call('RPUSH', KEYS[1], id)
+        end
+        while true do
+            local id = redis.call('RPOP', KEYS[1])
+            if not id then return false end
+            local key = ARGV[1] .. 'job:' .. id
+            local events = ARGV[1] .. 'events:' .. id
+            if redis.call('EXISTS', key) == 1 then
+                local attempts = tonumber(redis.call('HGET', key, 'attempts'))
+                if attempts >= tonumber(ARGV[6]) then
+                    local state = cjson.decode(redis.call('HGET', key, 'state'))
+                    redis.call('HSET', key, 'status', 'failed', 'error', ARGV[7], 'lease_id', '')
+                    redis.call('RPUSH', events, cjson.encode({
+                        id = redis.call('LLEN', events) + 1, event = 'status', time = now,
+                        elapsed = now - state['created_at'], status = 'failed', error = ARGV[7],
+                    }))
+                    redis.call('PEXPIRE', key, ARGV[8])
+                    redis.call('PEXPIRE', events, ARGV[8])
+                else
+                    redis.call('HSET', key, 'status', 'running', 'worker_id', ARGV[4],
+                               'lease_id', ARGV[5], 'attempts', attempts + 1)
+                    redis.call('ZADD', KEYS[2], now + tonumber(ARGV[3]), id)
+                    return {id, redis.call('HGET', key, 'task'), redis.call('HGET', key, 'state'),
+                            attempts + 1}
+                end
+            end
+        end
+    """
+    # KEYS: job, leases, events; ARGV: job id, lease id, expires, state,
+    # first event id, events...
+    _HEARTBEAT = """
+        if redis.call('HGET', KEYS[1], 'lease_id') ~= ARGV[2]
+            or redis.call('HGET', KEYS[1], 'status') ~= 'running' then return 0 end
+        redis.call('ZADD', KEYS[2], ARGV[3], ARGV[1])
+        redis.call('HSET', KEYS[1], 'state', ARGV[4])
+        local stored = redis.call('LLEN', KEYS[3])
+        for i = 6, #ARGV do
+            if tonumber(ARGV[5]) + i - 6 > stored then redis.call('RPUSH', KEYS[3], ARGV[i]) end
+        end
+        return 1
+    """
+    # KEYS: job, leases, events; ARGV: job id, lease id, status, state,
+    # result, error, history milliseconds, first event id, events...
+    _FINISH = """
+        if redis.call('HGET', KEYS[1], 'lease_id') ~= ARGV[2]
+            or redis.call('HGET', KEYS[1], 'status') ~= 'running' then return 0 end
+        redis.call('ZREM', KEYS[2], ARGV[1])
+        redis.call('HSET', KEYS[1], 'status', ARGV[3], 'state', ARGV[4], 'result', ARGV[5],
+                   'error', ARGV[6], 'lease_id', '')
+        local stored = redis.call('LLEN', KEYS[3])
+        for i = 9, #ARGV do
+            if tonumber(ARGV[8]) + i - 9 > stored then redis.call('RPUSH', KEYS[3], ARGV[i]) end
+        end
+        redis.call('PEXPIRE', KEYS[1], ARGV[7])
+        redis.call('PEXPIRE', KEYS[3], ARGV[7])
+        return 1
+    """
+
+    def __init__(self, url: str, prefix: str = "mapping:", **kwargs: Any):
+        """
+        Initialize the RedisBroker.
+
+        Args:
+            url: Server URL, e.g. "redis://localhost:6379/0"
+            prefix: Prefix of every key the broker uses
+            **kwargs: Options of Broker
+
+        Raises:
+            RuntimeError: If the redis package is not installed
+        """
+        if redis is None:
+            raise RuntimeError("Redis brokers need the redis package: pip install redis")
+        super().__init__(**kwargs)
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+        self._submit = self._client.register_script(self._SUBMIT)
+        self._lease = self._client.register_script(self._LEASE)
+        self._heartbeat = self._client.register_script(self._HEARTBEAT)
+        self._finish = self._client.register_script(self._FINISH)
+
+    def submit(self, job_id, task, state, events, max_queued=None):
+        return bool(
+            self._submit(
+                keys=[self._key("queue"), self._job_key(job_id), self._events_key(job_id)],
+                args=[
+                    job_id,
+                    -1 if max_queued is None else max_queued,
+                    json.dumps(task),
+                    json.dumps(state),
+                    time.time(),
+                    *[json.dumps(event) for event in events],
+                ],
+            )
+        )
+
+    def lease(self, worker_id, lease_seconds):
+        lease_id = uuid.uuid4().hex
+        claimed = self._lease(
+            keys=[self._key("queue"), self._key("leases")],
+            args=[
+                self.prefix,
+                time.time(),
+                lease_seconds,
+                worker_id,
+                lease_id,
+                self.max_attempts,
+                self.ABANDONED_ERROR,
+                int(self.history_seconds * 1000),
+            ],
+        )
+        if not claimed:
+            return None
+        job_id, task, state, attempts = claimed
+        if int(attempts) > 1:
+            logger.warning(f"Re-leasing job {job_id} after {int(attempts) - 1} abandoned attempt(s)")
+        return Lease(
+            job_id, lease_id, json.loads(task), json.loads(state), self.events(job_id), int(attempts)
+        )
+
+    def heartbeat(self, lease, lease_seconds, state, events):
+        return bool(
+            self._heartbeat(
+                keys=[self._job_key(lease.job_id), self._key("leases"), self._events_key(lease.job_id)],
+                args=[
+                    lease.job_id,
+                    lease.lease_id,
+                    time.time() + lease_seconds,
+                    json.dumps(state),
+                    events[0]["id"] if events else 0,
+                    *[json.dumps(event) for event in events],
+                ],
+            )
+        )
+
+    def finish(self, lease, state, events, result=None, error=None):
+        return bool(
+            self._finish(
+                keys=[self._job_key(lease.job_id), self._key("leases"), self._events_key(lease.job_id)],
+                args=[
+                    lease.job_id,
+                    lease.lease_id,
+                    Job.FAILED if error is not None else Job.DONE,
+                    json.dumps(state),
+                    json.dumps(result),
+                    error or "",
+                    int(self.history_seconds * 1000),
+                    events[0]["id"] if events else 0,
+                    *[json.dumps(event) for event in events],
+                ],
+            )
+        )
+
+    def get(self, job_id):
+        fields = self._client.hgetall(self._job_key(job_id))
+        if not fields:
+            return None
+        result = fields.get("result")
+        return {
+            "status": fields["status"],
+            "state": json.loads(fields["state"]),
+            "result": json.loads(result) if result else None,
+            "error": fields.get("error") or None,
+        }
+
+    def events(self, job_id, after=0):
+        return [json.loads(body) for body in self._client.lrange(self._events_key(job_id), after, -1)]
+
+    def worker_seen(self, worker_id):
+        self._client.zadd(self._key("workers"), {worker_id: time.time()})
+
+    def stats(self, worker_window=60.0):
+        return {
+            "queued": self._client.llen(self._key("queue")),
+            "running": self._client.zcard(self._key("leases")),
+            "workers": self._client.zcount(
+                self._key("workers"), time.time() - worker_window, "+inf"
+            ),
+        }
+
+    def close(self):
+        self._client.close()
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}{name}"
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.prefix}job:{job_id}"
+
+    def _events_key(self, job_id: str) -> str:
+        return f"{self.prefix}events:{job_id}"
+
+
+def open_broker(url: str, **kwargs: Any) -> Broker:
+    """
+    Open a broker from its URL.
+
+    Args:
+        url: "sqlite:///relative.db", "sqlite:////absolute.db" or a Redis
+            URL ("redis://", "rediss://" or "unix://")
+        **kwargs: Options of Broker
+
+    Returns:
+        The broker
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    if url.startswith("sqlite:///"):
+        return SQLiteBroker(url[len("sqlite:///"):], **kwargs)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBroker(url, **kwargs)
+    raise ValueError(f"Unsupported broker URL: {url}")
+
+
+def _abandoned_event(event_id: int, state: Dict[str, Any], now: float, error: str) -> Dict[str, Any]:
+    """Final status event of a job no worker finished."""
+    return {
+        "id": event_id,
+        "event": "status",
+        "time": now,
+        "elapsed": round(now - state["created_at"], 6),
+        "status": Job.FAILED,
+        "error": error,
+    }
+
+
+class RemoteJob:
+    """
+    Read-only view of a brokered job with the interface of Job.
+
+    Lets the API serve status, results and event streams of jobs running
+    on workers the same way as local ones.
+    """
+
+    QUEUED = Job.QUEUED
+    RUNNING = Job.RUNNING
+    DONE = Job.DONE
+    FAILED = Job.FAILED
+
+    def __init__(self, broker: Broker, job_id: str, record: Dict[str, Any], poll_seconds: float = 0.5):
+        """
+        Initialize the RemoteJob.
+
+        Args:
+            broker: Broker holding the job
+            job_id: Identifier of the job
+            record: Result of broker.get
+            poll_seconds: Interval between broker reads while waiting for events
+        """
+        self.broker = broker
+        self.id = job_id
+        self.poll_seconds = poll_seconds
+        self._apply(record)
+
+    @property
+    def is_finished(self) -> bool:
+        """Whether the job has completed, successfully or not."""
+        return self.status in (self.DONE, self.FAILED)
+
+    def refresh(self) -> None:
+        """Re-read the job from the broker."""
+        record = self.broker.get(self.id)
+        if record is not None:
+            self._apply(record)
+
+    def events_since(self, last_id: int = 0, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Return the events after ``last_id``, polling the broker like Job.events_since waits."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # Read the status first: the final events are written together
+            # with it, so a finished job's events are all visible below
+            self.refresh()
+            events = self.broker.events(self.id, last_id)
+            if events or self.is_finished:
+                return events
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return []
+            time.sleep(self.poll_seconds if remaining is None else min(self.poll_seconds, remaining))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serializable snapshot of the job state."""
+        return {**self.state, "job_id": self.id, "status": self.status, "error": self.error}
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        self.status = record["status"]
+        self.state = record["state"]
+        self.result = record["result"]
+        self.error = record["error"]
+        # Read by ServiceMetrics.observe_job, as on a local Job
+        self.created_at = self.state.get("created_at")
+        self.finished_at = self.state.get("finished_at")
+        self.timings = self.state.get("timings") or {}
+        self.peak_rss_bytes = self.state.get("peak_rss_bytes")
+
+
+class BrokerJobManager:
+    """
+    Queues jobs in a broker for worker processes instead of running them.
+
+    Has the interface of JobManager, so the API works the same in either
+    mode. Jobs are handed over by the name of the pipeline method and its
+    JSON-serializable arguments, which a Worker looks up on its own
+    pipeline.
+
+    With ``on_finish``, a watcher thread polls the broker for the jobs this
+    manager queued and reports each one once a worker has finished it.
+    """
+
+    def __init__(
+        self,
+        broker: Broker,
+        max_queued: Optional[int] = None,
+        poll_seconds: float = 0.5,
+        on_finish: Optional[Callable[["RemoteJob"], None]] = None,
+    ):
+        """
+        Initialize the BrokerJobManager.
+
+        Args:
+            broker: Broker shared with the workers
+            max_queued: Maximum number of jobs waiting for a worker
+            poll_seconds: Interval between broker reads while streaming
+                events or watching for finished jobs
+            on_finish: Optional callable receiving each job queued here
+                once it has finished, e.g. to record metrics
+        """
+        self.broker = broker
+        self.max_queued = max_queued
+        self.poll_seconds = poll_seconds
+        self.on_finish = on_finish
+        self._pending: Dict[str, None] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def enqueue(
+        self, job: Job, func: Callable[..., Dict[str, Any]], *args: Any, **kwargs: Any
+    ) -> Optional[RemoteJob]:
+        """
+        Queue a pipeline method for a worker, like JobManager.enqueue.
+
+        Args:
+            job: Job created by the caller, with any stages already recorded
+            func: ReconstructionPipeline method to run
+            *args: JSON-serializable positional arguments
+            **kwargs: JSON-serializable keyword arguments
+
+        Returns:
+            The queued job, or None if the queue is full
+        """
+        task = {"method": func.__name__, "args": list(args), "kwargs": kwargs}
+        queued = self.broker.submit(
+            job.id, task, job.to_dict(), job.events_since(0, timeout=0), self.max_queued
+        )
+        if not queued:
+            logger.warning("Job queue full, rejecting new job")
+            return None
+        if self.on_finish is not None:
+            with self._lock:
+                self._pending[job.id] = None
+                if self._watcher is None:
+                    self._watcher = threading.Thread(
+                        target=self._watch, name="broker-watcher", daemon=True
+                    )
+                    self._watcher.start()
+        return self.get(job.id)
+
+    def get(self, job_id: str) -> Optional[RemoteJob]:
+        """Look up a job by id."""
+        record = self.broker.get(job_id)
+        if record is None:
+            return None
+        return RemoteJob(self.broker, job_id, record, self.poll_seconds)
+
+    def stats(self) -> Dict[str, int]:
+        """Jobs waiting and running across all workers, and live workers."""
+        return self.broker.stats()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Close the broker connection; workers keep running queued jobs."""
+        self._stop.set()
+        if wait and self._watcher is not None:
+            self._watcher.join()
+        self.broker.close()
+
+    def _watch(self) -> None:
+        """Report jobs queued here as they finish, until shutdown."""
+        while not self._stop.wait(self.poll_seconds):
+            with self._lock:
+                pending = list(self._pending)
+            for job_id in pending:
+                try:
+                    record = self.broker.get(job_id)
+                except Exception as e:
+                    logger.warning(f"Could not check job {job_id}: {e}")
+                    break
+                if record is None:
+                    # Pruned from the broker before it was seen finishing
+                    record = {
+                        "status": Job.FAILED,
+                        "state": {},
+                        "result": None,
+                        "error": "Job record expired",
+                    }
+                elif record["status"] not in (Job.DONE, Job.FAILED):
+                    continue
+                with self._lock:
+                    del self._pending[job_id]
+                try:
+                    self.on_finish(RemoteJob(self.broker, job_id, record, self.poll_seconds))
+                except Exception as e:
+                    logger.warning(f"Job finish callback failed: {e}")
@@ -0,0 +1,285 @@
+"""
+Content-addressed storage for uploaded files.
+"""
+
+import os
+import re
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from typing import BinaryIO, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an uploaded file exceeds the maximum image size."""
+
+
+class _Entry:
+    """Bookkeeping for one stored file."""
+
+    __slots__ = ("digest", "path", "size", "refcount", "last_used")
+
+    def __init__(self, digest: str, path: str, size: int, last_used: float):
+        self.digest = digest
+        self.path = path
+        self.size = size
+        self.refcount = 0
+        self.last_used = last_used
+
+
+class ContentStore:
+    """
+    Stores files under the SHA-256 of their contents.
+
+    Files are named ``<digest><suffix>`` in a flat directory, so identical
+    uploads share one file and differently named uploads can never overwrite
+    each other. Callers hold a reference on each file they are using; once
+    the store exceeds ``max_bytes`` the least recently used unreferenced
+    files are evicted.
+
+    References are counted per process. When several processes share
+    ``root``, none of them knows what the others are using, so they should
+    run without ``max_bytes``; a file found missing on a deduplicated
+    upload is written again.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+    _NAME_PATTERN = re.compile(r"^([0-9a-f]{64})(\.[A-Za-z0-9]+)?$")
+    _TEMP_PREFIX = ".tmp-"
+    # Temp files untouched this long at startup are left over from a crash;
+    # newer ones may be another node's upload in progress on shared storage
+    TEMP_GRACE_SECONDS = 3600
+
+    def __init__(self, root: str, max_bytes: Optional[int] = None, chunk_size: Optional[int] = None):
+        """
+        Initialize the ContentStore.
+
+        Existing files in ``root`` are indexed so content survives restarts.
+
+        Args:
+            root: Directory holding the stored files
+            max_bytes: Size budget for unreferenced files; None is unbounded
+            chunk_size: Bytes read per chunk while hashing and copying
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self._entries: Dict[str, _Entry] = {}
+        self._total_bytes = 0
+        self._dedup_hits = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._load_index()
+
+    def put_stream(
+        self,
+        stream: BinaryIO,
+        suffix: str = "",
+        max_size: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Tuple[str, str]:
+        """
+        Store the contents of a stream and take a reference on it.
+
+        Seekable streams are hashed first and only copied if the content is
+        not already stored, so a re-upload never rewrites the file.
+        Other streams are hashed while being copied to a temporary file,
+        which is discarded if the content turns out to be a duplicate.
+
+        Args:
+            stream: Readable binary stream
+            suffix: File extension to keep on the stored file, e.g. ".jpg"
+            max_size: Optional size limit enforced while reading
+            chunk_size: Optional override of the store's chunk size
+
+        Returns:
+            Tuple of (digest, path) of the stored file
+
+        Raises:
+            UploadTooLargeError: If the stream exceeds ``max_size``
+        """
+        chunk_size = chunk_size or self.chunk_size
+        suffix = suffix.lower()
+
+        if _is_seekable(stream):
+            start = stream.tell()
+            digest = self._hash_stream(stream, max_size, chunk_size)
+            name = digest + suffix
+            with self._lock:
+                if self._has_file(name):
+                    return digest, self._reference(name, dedup=True)
+            stream.seek(start)
+            temp_path, _ = self._copy_to_temp(stream, max_size, chunk_size)
+        else:
+            temp_path, digest = self._copy_to_temp(stream, max_size, chunk_size)
+            name = digest + suffix
+
+        path = os.path.join(self.root, name)
+        with self._lock:
+            if self._has_file(name):
+                os.remove(temp_path)
+                return digest, self._reference(name, dedup=True)
+            os.replace(temp_path, path)
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = _Entry(digest, path, os.path.getsize(path), time.time())
+                self._entries[name] = entry
+                self._total_bytes += entry.size
+            path = self._reference(name)
+            self._evict()
+        return digest, path
+
+    def release(self, path: str) -> None:
+        """
+        Drop a reference taken by ``put_stream`` or ``acquire``.
+
+        Args:
+            path: Path returned when the reference was taken
+        """
+        name = os.path.basename(path)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry.refcount == 0:
+                return
+            entry.refcount -= 1
+            self._evict()
+
+    def acquire(self, path: str) -> bool:
+        """
+        Take an additional reference on a stored file.
+
+        Args:
+            path: Path of a stored file
+
+        Returns:
+            True if the file is in the store
+        """
+        name = os.path.basename(path)
+        with self._lock:
+            if name not in self._entries:
+                return False
+            self._reference(name)
+            return True
+
+    def digest_for_path(self, path: str) -> Optional[str]:
+        """Return the content digest of a stored file, or None."""
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.root):
+            return None
+        match = self._NAME_PATTERN.match(os.path.basename(path))
+        return match.group(1) if match else None
+
+    def stats(self) -> Dict[str, int]:
+        """Summary of store size and deduplication."""
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "bytes": self._total_bytes,
+                "referenced": sum(1 for e in self._entries.values() if e.refcount),
+                "dedup_hits": self._dedup_hits,
+                "evictions": self._evictions,
+            }
+
+    def _has_file(self, name: str) -> bool:
+        # Caller holds self._lock. Another process sharing the directory may
+        # have deleted an indexed file; the entry is kept, with its
+        # references, so the caller writes the file again
+        entry = self._entries.get(name)
+        return entry is not None and os.path.exists(entry.path)
+
+    def _reference(self, name: str, dedup: bool = False) -> str:
+        # Caller holds self._lock
+        entry = self._entries[name]
+        entry.refcount += 1
+        entry.last_used = time.time()
+        if dedup:
+            self._dedup_hits += 1
+        return entry.path
+
+    def _evict(self) -> None:
+        # Caller holds self._lock
+        if self.max_bytes is None or self._total_bytes <= self.max_bytes:
+            return
+        candidates = sorted(
+            (e for e in self._entries.values() if e.refcount == 0),
+            key=lambda e: e.last_used,
+        )
+        for entry in candidates:
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            del self._entries[os.path.basename(entry.path)]
+            self._total_bytes -= entry.size
+            self._evictions += 1
+
+    def _hash_stream(self, stream: BinaryIO, max_size: Optional[int], chunk_size: int) -> str:
+        hasher = hashlib.sha256()
+        size = 0
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            _check_size(size, max_size)
+            hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def _copy_to_temp(
+        self, stream: BinaryIO, max_size: Optional[int], chunk_size: int
+    ) -> Tuple[str, str]:
+        temp_path = os.path.join(self.root, f"{self._TEMP_PREFIX}{uuid.uuid4().hex}")
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            with open(temp_path, "wb") as f:
+                while True:
+                    chunk = stream.read(chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    _check_size(size, max_size)
+                    hasher.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return temp_path, hasher.hexdigest()
+
+    def _load_index(self) -> None:
+        cutoff = time.time() - self.TEMP_GRACE_SECONDS
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith(self._TEMP_PREFIX):
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        # Left over from an interrupted upload
+                        os.remove(path)
+                except OSError:
+                    pass  # Finished or removed by its writer meanwhile
+                continue
+            match = self._NAME_PATTERN.match(name)
+            if match is None or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            self._entries[name] = _Entry(match.group(1), path, stat.st_size, stat.st_mtime)
+            self._total_bytes += stat.st_size
+
+
+def _is_seekable(stream: BinaryIO) -> bool:
+    try:
+        return bool(stream.seekable())
+    except (AttributeError, ValueError):
+        return False
+
+
+def _check_size(size: int, max_size: Optional[int]) -> None:
+    if max_size is not None and size > max_size:
+        raise UploadTooLargeError(f"Upload exceeds {max_size} bytes")
@@ -0,0 +1,222 @@
+"""
+Writers for point cloud and mesh output formats.
+"""
+
+import json
+import struct
+import logging
+from typing import BinaryIO, Callable, Dict, List, NamedTuple, Optional
+import numpy as np
+from .pointcloud import PointCloud
+
+logger = logging.getLogger(__name__)
+
+# Writes a point cloud, and optional (F, 3) triangle indices, to a binary file
+WriteFunction = Callable[[BinaryIO, PointCloud, Optional[np.ndarray]], None]
+
+
+class Exporter(NamedTuple):
+    """An output format and the function writing it."""
+
+    name: str
+    extension: str
+    media_type: str
+    write: WriteFunction
+
+
+_EXPORTERS: Dict[str, Exporter] = {}
+
+
+def register_exporter(name: str, extension: str, media_type: str, write: WriteFunction) -> None:
+    """
+    Make an output format available by name.
+
+    Args:
+        name: Format name used in requests, e.g. "ply"
+        extension: File extension including the dot
+        media_type: MIME type used when serving the file
+        write: Function writing a point cloud and optional faces to a
+            binary file object
+    """
+    _EXPORTERS[name.lower()] = Exporter(name.lower(), extension, media_type, write)
+
+
+def get_exporter(name: str) -> Optional[Exporter]:
+    """Return the exporter for a format name, or None if it is unknown."""
+    return _EXPORTERS.get(name.lower())
+
+
+def exporter_for_path(path: str) -> Optional[Exporter]:
+    """Return the exporter whose extension matches path, or None."""
+    lower = path.lower()
+    for exporter in _EXPORTERS.values():
+        if lower.endswith(exporter.extension):
+            return exporter
+    return None
+
+
+def available_formats() -> List[str]:
+    """Names of all registered formats."""
+    return sorted(_EXPORTERS)
+
+
+def write_obj(f: BinaryIO, cloud: PointCloud, faces: Optional[np.ndarray] = None) -> None:
+    """Write ASCII OBJ with per-vertex colors and optional normals and faces."""
+    f.write(b"# 3D Mapping Service point cloud\n")
+    f.write(f"# Points: {len(cloud)}\n".encode())
+    colors = _colors_or_white(cloud)
+    vertices = np.hstack([cloud.points, colors.astype(np.float32) / 255.0])
+    np.savetxt(f, vertices, fmt="v %.6f %.6f %.6f %.4f %.4f %.4f")
+    if cloud.normals is not None:
+        np.savetxt(f, cloud.normals, fmt="vn %.4f %.4f %.4f")
+    if faces is not None:
+        np.savetxt(f, np.asarray(faces) + 1, fmt="f %d %d %d")
+
+
+def write_ply(f: BinaryIO, cloud: PointCloud, faces: Optional[np.ndarray] = None) -> None:
+    """Write binary little-endian PLY straight from NumPy buffers."""
+    fields = [("x", "<f4"), ("y", "<f4"), ("z", "<f4")]
+    if cloud.normals is not None:
+        fields += [("nx", "<f4"), ("ny", "<f4"), ("nz", "<f4")]
+    if cloud.colors is not None:
+        fields += [("red", "u1"), ("green", "u1"), ("blue", "u1")]
+    types = {"<f4": "float", "u1": "uchar"}
+
+    header = ["ply", "format binary_little_endian 1.0", f"element vertex {len(cloud)}"]
+    header += [f"property {types[dtype]} {name}" for name, dtype in fields]
+    if faces is not None:
+        header += [f"element face {len(faces)}", "property list uchar int vertex_indices"]
+    header.append("end_header")
+    f.write(("\n".join(header) + "\n").encode("ascii"))
+
+    vertices = np.empty(len(cloud), dtype=fields)
+    vertices["x"], vertices["y"], vertices["z"] = cloud.points.T
+    if cloud.normals is not None:
+        vertices["nx"], vertices["ny"], vertices["nz"] = cloud.normals.T
+    if cloud.colors is not None:
+        vertices["red"], vertices["green"], vertices["blue"] = cloud.colors.T
+    f.write(vertices.tobytes())
+
+    if faces is not None:
+        records = np.empty(len(faces), dtype=[("count", "u1"), ("indices", "<i4", (3,))])
+        records["count"] = 3
+        records["indices"] = faces
+        f.write(records.tobytes())
+
+
+# glTF constants
+_GLB_MAGIC = 0x46546C67  # "glTF"
+_GLB_JSON = 0x4E4F534A  # "JSON"
+_GLB_BIN = 0x004E4942  # "BIN\0"
+_FLOAT = 5126
+_UNSIGNED_BYTE = 5121
+_UNSIGNED_INT = 5125
+_ARRAY_BUFFER = 34962
+_ELEMENT_ARRAY_BUFFER = 34963
+_MODE_POINTS = 0
+_MODE_TRIANGLES = 4
+_GLB_ASSET = {"asset": {"version": "2.0", "generator": "3D Mapping Service"}}
+
+
+def write_glb(f: BinaryIO, cloud: PointCloud, faces: Optional[np.ndarray] = None) -> None:
+    """
+    Write a single-mesh glTF 2.0 binary, as points or triangles.
+
+    Buffers are written to the file one after another rather than joined,
+    so the binary chunk is never held in memory a second time. An empty
+    cloud becomes a valid scene without a mesh, since glTF accessors may
+    not be empty.
+    """
+    if len(cloud) == 0:
+        _write_glb_chunks(f, {**_GLB_ASSET, "scene": 0, "scenes": [{}]}, [], 0)
+        return
+
+    arrays: List[np.ndarray] = []
+    buffer_views: List[Dict] = []
+    accessors: List[Dict] = []
+    offset = 0
+
+    def add(data: np.ndarray, component: int, kind: str, target: int, **extra) -> int:
+        nonlocal offset
+        data = np.ascontiguousarray(data)
+        buffer_views.append(
+            {"buffer": 0, "byteOffset": offset, "byteLength": data.nbytes, "target": target}
+        )
+        accessors.append(
+            {
+                "bufferView": len(buffer_views) - 1,
+                "componentType": component,
+                "count": len(data),
+                "type": kind,
+                **extra,
+            }
+        )
+        arrays.append(data)
+        # Every view starts on a 4-byte boundary
+        offset += data.nbytes + (-data.nbytes % 4)
+        return len(accessors) - 1
+
+    points = cloud.points.astype("<f4", copy=False)
+    bounds = {"min": points.min(axis=0).tolist(), "max": points.max(axis=0).tolist()}
+    attributes = {"POSITION": add(points, _FLOAT, "VEC3", _ARRAY_BUFFER, **bounds)}
+    if cloud.normals is not None:
+        attributes["NORMAL"] = add(
+            cloud.normals.astype("<f4", copy=False), _FLOAT, "VEC3", _ARRAY_BUFFER
+        )
+    if cloud.colors is not None:
+        # Vertex attributes must be 4-byte aligned, so colors carry alpha
+        rgba = np.full((len(cloud), 4), 255, dtype=np.uint8)
+        rgba[:, :3] = cloud.colors
+        attributes["COLOR_0"] = add(
+            rgba, _UNSIGNED_BYTE, "VEC4", _ARRAY_BUFFER, normalized=True
+        )
+
+    primitive = {"attributes": attributes, "mode": _MODE_POINTS}
+    if faces is not None:
+        indices = np.asarray(faces, dtype="<u4").reshape(-1)
+        primitive["indices"] = add(indices, _UNSIGNED_INT, "SCALAR", _ELEMENT_ARRAY_BUFFER)
+        primitive["mode"] = _MODE_TRIANGLES
+
+    document = {
+        **_GLB_ASSET,
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0}],
+        "meshes": [{"primitives": [primitive]}],
+        "accessors": accessors,
+        "bufferViews": buffer_views,
+        "buffers": [{"byteLength": offset}],
+    }
+    _write_glb_chunks(f, document, arrays, offset)
+
+
+def _write_glb_chunks(
+    f: BinaryIO, document: Dict, arrays: List[np.ndarray], binary_length: int
+) -> None:
+    """Write the GLB header, JSON chunk and, if there are arrays, the binary chunk."""
+    json_chunk = json.dumps(document, separators=(",", ":")).encode()
+    json_chunk += b" " * (-len(json_chunk) % 4)
+
+    total = 12 + 8 + len(json_chunk)
+    if arrays:
+        total += 8 + binary_length
+    f.write(struct.pack("<III", _GLB_MAGIC, 2, total))
+    f.write(struct.pack("<II", len(json_chunk), _GLB_JSON))
+    f.write(json_chunk)
+    if not arrays:
+        return
+    f.write(struct.pack("<II", binary_length, _GLB_BIN))
+    for data in arrays:
+        f.write(memoryview(data).cast("B"))
+        f.write(b"\x00" * (-data.nbytes % 4))
+
+
+def _colors_or_white(cloud: PointCloud) -> np.ndarray:
+    if cloud.colors is not None:
+        return cloud.colors
+    return np.full((len(cloud), 3), 255, dtype=np.uint8)
+
+
+register_exporter("obj", ".obj", "text/plain", write_obj)
+register_exporter("ply", ".ply", "application/octet-stream", write_ply)
+register_exporter("glb", ".glb", "model/gltf-binary", write_glb)
@@ -2,30 +2,105 @@
 Image processor for handling image uploads and preprocessing.
 """
 
+import io
 import os
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import BinaryIO, List, Dict, Any, NamedTuple, Optional, Tuple
 from PIL import Image
 import numpy as np
+from .content_store import ContentStore, UploadTooLargeError
+from .shared_views import ViewArena, write_to_arena
+from .view_cache import ViewCache
 
 logger = logging.getLogger(__name__)
 
 
+class DecodeResult(NamedTuple):
+    """Outcome of decoding a single image file."""
+
+    img: Optional[np.ndarray]
+    reason: Optional[str] = None
+    detail: Optional[str] = None
+    scale: float = 1.0
+    original_size: Optional[Tuple[int, int]] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the image was decoded successfully."""
+        return self.img is not None
+
+
 class ImageProcessor:
     """Handles image loading, validation, and preprocessing."""
 
     SUPPORTED_FORMATS = {".jpg", ".jpeg", ".png", ".bmp", ".tiff"}
     MAX_IMAGE_SIZE = 10 * 1024 * 1024  # 10MB
+    CHUNK_SIZE = 64 * 1024  # Bytes copied per read when saving uploads
 
-    def __init__(self, upload_dir: str = "uploads"):
+    # Rejection reasons reported by decode_image
+    REJECT_MISSING = "missing"
+    REJECT_UNSUPPORTED_FORMAT = "unsupported_format"
+    REJECT_TOO_LARGE = "too_large"
+    REJECT_DECODE_ERROR = "decode_error"
+
+    DEFAULT_MAX_WORKERS = 4  # Decode threads per request
+    DECODE_BYTES_PER_PIXEL = 4  # PIL holds RGB images with a padding byte
+    EXECUTORS = ("thread", "process")
+
+    def __init__(
+        self,
+        upload_dir: str = "uploads",
+        max_image_size: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        executor: str = "thread",
+        max_long_edge: Optional[int] = None,
+        store_max_bytes: Optional[int] = None,
+        view_cache: Optional[ViewCache] = None,
+    ):
         """
         Initialize the ImageProcessor.
 
         Args:
             upload_dir: Directory to save uploaded images
+            max_image_size: Maximum image file size in bytes
+            max_workers: Maximum images decoded concurrently per call to
+                preprocess_images; 1 decodes sequentially
+            executor: "thread" (default; PIL releases the GIL while
+                decoding) or "process" to decode in worker processes that
+                write straight into a shared view arena. The processes are
+                started on first use with the "forkserver" method, since
+                forking the multithreaded server is unsafe, and kept until
+                ``shutdown``
+            max_long_edge: Optional target for the longer image side; larger
+                images are downscaled while decoding
+            store_max_bytes: Size budget for unreferenced uploads kept for
+                deduplication; None keeps them all
+            view_cache: Optional cache of decoded views keyed by content hash
         """
+        if executor not in self.EXECUTORS:
+            raise ValueError(f"Unknown executor: {executor}")
         self.upload_dir = upload_dir
+        self.max_image_size = max_image_size or self.MAX_IMAGE_SIZE
+        self.max_workers = max(1, max_workers or self.DEFAULT_MAX_WORKERS)
+        self.executor = executor
+        self.max_long_edge = max_long_edge
         os.makedirs(upload_dir, exist_ok=True)
+        self.store = ContentStore(upload_dir, max_bytes=store_max_bytes)
+        self.view_cache = view_cache
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def shutdown(self) -> None:
+        """Stop the decode processes, if any were started."""
+        with self._pool_lock:
+            pool, self._process_pool = self._process_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
 
     def validate_image(self, file_path: str) -> bool:
         """
@@ -47,7 +122,7 @@ class ImageProcessor:
             return False
 
         # Check file size
-        if os.path.getsize(file_path) > self.MAX_IMAGE_SIZE:
+        if os.path.getsize(file_path) > self.max_image_size:
             return False
 
         # Try to open with PIL
@@ -78,30 +153,254 @@ class ImageProcessor:
             logger.error(f"Error loading image {file_path}: {e}")
             return None
 
-    def preprocess_images(self, file_paths: List[str]) -> List[Dict[str, Any]]:
+    def decode_image(self, file_path: str) -> DecodeResult:
+        """
+        Validate and decode an image in a single pass.
+
+        The file is opened once: its size is taken from the open descriptor
+        and decoding doubles as validation, so there is no separate
+        ``verify()`` pass or second header parse as with
+        ``validate_image`` followed by ``load_image``.
+
+        If ``max_long_edge`` is set, larger images are downscaled so their
+        longer side matches it. JPEGs are decoded directly at a reduced DCT
+        scale via ``Image.draft`` and only the remaining factor is resampled.
+
+        Args:
+            file_path: Path to the image file
+
+        Returns:
+            DecodeResult with the image as a numpy array (HxWx3), the applied
+            scale and the original (width, height), or a rejection reason
+            and detail message
+        """
+        return _decode_file(file_path, self.max_image_size, self.max_long_edge)
+
+    def preprocess_images(
+        self, file_paths: List[str], max_workers: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
         Preprocess a list of images for MapAnything inference.
 
         Args:
             file_paths: List of paths to image files
+            max_workers: Optional per-call cap on concurrent decodes
 
         Returns:
             List of view dictionaries ready for MapAnything
         """
+        views, _ = self.preprocess_images_with_report(file_paths, max_workers)
+        return views
+
+    def preprocess_images_with_report(
+        self, file_paths: List[str], max_workers: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Preprocess images and report why any of them were rejected.
+
+        Images are decoded concurrently; views are returned in the order of
+        ``file_paths`` regardless of which decode finishes first.
+
+        Args:
+            file_paths: List of paths to image files
+            max_workers: Optional per-call cap on concurrent decodes, never
+                above the processor's own ``max_workers``
+
+        Returns:
+            Tuple of (views, rejected) where rejected holds one dictionary
+            per skipped file with its path, reason and detail
+        """
+        hashes = [self.content_hash(path) for path in file_paths]
+        results = self._decode_cached(file_paths, hashes, max_workers)
+
         views = []
+        rejected = []
+        for file_path, content_hash, result in zip(file_paths, hashes, results):
+            if not result.ok:
+                logger.warning(f"Skipping invalid image {file_path}: {result.reason}")
+                rejected.append({
+                    "file_path": file_path,
+                    "reason": result.reason,
+                    "detail": result.detail,
+                })
+                continue
+
+            views.append({
+                "img": result.img,
+                "file_path": file_path,
+                "content_hash": content_hash,
+                "scale": result.scale,
+                "original_size": result.original_size,
+            })
+
+        return views, rejected
+
+    def estimate_memory(self, file_paths: List[str]) -> Tuple[int, np.ndarray]:
+        """
+        Estimate the memory needed to decode images from their headers alone.
+
+        Only each file's header is parsed, so this is cheap enough to run
+        before a job is admitted. The estimate covers the decoded RGB views,
+        downscaled as ``max_long_edge`` requires, plus the full-size decode
+        buffers of the largest images that can be decoding at once.
+        Unreadable files count as zero since decoding rejects them.
+
+        Args:
+            file_paths: List of paths to image files
+
+        Returns:
+            Tuple of (estimated bytes, ``(N, 2)`` array of the decoded
+            (height, width) of each readable file)
+        """
+        shapes = []
+        buffers = []
         for file_path in file_paths:
-            if not self.validate_image(file_path):
-                logger.warning(f"Skipping invalid image: {file_path}")
+            size = _read_image_size(file_path)
+            if size is None:
                 continue
+            width, height = _target_size(size, self.max_long_edge) or size
+            shapes.append((height, width))
+            buffers.append(size[0] * size[1] * self.DECODE_BYTES_PER_PIXEL)
 
-            img_array = self.load_image(file_path)
-            if img_array is not None:
-                views.append({
-                    "img": img_array,
-                    "file_path": file_path,
-                })
+        decoded = sum(height * width * 3 for height, width in shapes)
+        concurrent = sorted(buffers, reverse=True)[: self.max_workers]
+        return decoded + sum(concurrent), np.array(shapes, dtype=np.int64).reshape(-1, 2)
 
-        return views
+    def content_hash(self, file_path: str) -> Optional[str]:
+        """
+        Return the SHA-256 hex digest of a file's contents.
+
+        Files in the upload store are named by their digest, so this only
+        reads the file for paths outside the store.
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            Hex digest, or None if the file cannot be read
+        """
+        digest = self.store.digest_for_path(file_path)
+        if digest is not None:
+            return digest
+
+        hasher = hashlib.sha256()
+        try:
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+        except OSError:
+            return None
+        return hasher.hexdigest()
+
+    def _decode_cached(
+        self, file_paths: List[str], hashes: List[Optional[str]], max_workers: Optional[int]
+    ) -> List[DecodeResult]:
+        """Serve decodes from the view cache where possible, decoding the rest."""
+        if self.view_cache is None:
+            return self._decode_all(file_paths, max_workers)
+
+        # The decoded output depends on the downscaling target
+        params = (self.max_long_edge,)
+        keys = [ViewCache.make_key(h, params) if h else None for h in hashes]
+        results: List[Optional[DecodeResult]] = [None] * len(file_paths)
+        missing = []
+        for i, key in enumerate(keys):
+            cached = self.view_cache.get(key) if key else None
+            if cached is None:
+                missing.append(i)
+                continue
+            img, metadata = cached
+            original_size = metadata.get("original_size")
+            results[i] = DecodeResult(
+                img,
+                scale=metadata.get("scale", 1.0),
+                original_size=tuple(original_size) if original_size else None,
+            )
+
+        decoded = self._decode_all([file_paths[i] for i in missing], max_workers)
+        for i, result in zip(missing, decoded):
+            if result.ok and keys[i] and not result.img.flags.owndata:
+                # A view of a decode arena would keep the whole arena mapped
+                # for as long as it is cached, beyond the cache's accounting
+                result = result._replace(img=result.img.copy())
+            results[i] = result
+            if result.ok and keys[i]:
+                self.view_cache.put(
+                    keys[i],
+                    result.img,
+                    {"scale": result.scale, "original_size": result.original_size},
+                )
+        return results
+
+    def _decode_all(self, file_paths: List[str], max_workers: Optional[int]) -> List[DecodeResult]:
+        """Decode files concurrently, preserving input order."""
+        workers = min(self.max_workers, max_workers or self.max_workers, len(file_paths))
+        if workers <= 1:
+            return [self.decode_image(path) for path in file_paths]
+
+        if self.executor == "process":
+            return self._decode_in_processes(file_paths)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="decode") as pool:
+            return list(pool.map(self.decode_image, file_paths))
+
+    def _decode_in_processes(self, file_paths: List[str]) -> List[DecodeResult]:
+        """
+        Decode in worker processes into one arena sized from the image headers.
+
+        Workers write pixels into their slot of the arena and return only
+        the decode metadata; the decoded arrays are views of the arena, so
+        nothing is pickled or copied back. The arena file is removed once
+        the workers are done; the arrays keep its memory mapped.
+        """
+        shapes = []
+        for path in file_paths:
+            size = _read_image_size(path)
+            if size is None:
+                shapes.append(None)
+                continue
+            width, height = _target_size(size, self.max_long_edge) or size
+            shapes.append((height, width, 3))
+
+        arena = ViewArena.allocate(shapes)
+        try:
+            outcomes = list(
+                self._get_process_pool().map(
+                    _decode_to_arena,
+                    file_paths,
+                    [self.max_image_size] * len(file_paths),
+                    [self.max_long_edge] * len(file_paths),
+                    [arena.path] * len(file_paths),
+                    arena.slots,
+                )
+            )
+            results = []
+            for i, outcome in enumerate(outcomes):
+                if outcome[0] == "arena":
+                    _, scale, original_size = outcome
+                    results.append(
+                        DecodeResult(arena.array(i), scale=scale, original_size=original_size)
+                    )
+                else:
+                    results.append(_collect_from_shared_memory(outcome))
+            return results
+        finally:
+            arena.close()
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """Return the decode processes shared by every job, starting them on first use."""
+        with self._pool_lock:
+            if self._process_pool is None:
+                method = (
+                    "forkserver"
+                    if "forkserver" in multiprocessing.get_all_start_methods()
+                    else "spawn"
+                )
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(method),
+                )
+            return self._process_pool
 
     def save_uploaded_file(self, file_data: bytes, filename: str) -> str:
         """
@@ -114,10 +413,176 @@ class ImageProcessor:
         Returns:
             Path to the saved file
         """
-        safe_filename = os.path.basename(filename)
-        file_path = os.path.join(self.upload_dir, safe_filename)
+        _, path = self.store.put_stream(io.BytesIO(file_data), suffix=_extension(filename))
+        return path
+
+    def save_uploaded_stream(self, stream: BinaryIO, filename: str) -> str:
+        """
+        Stream an uploaded file into the content-addressed upload store.
+
+        The file is stored under the hash of its contents, read in
+        ``CHUNK_SIZE`` pieces, and the size limit is enforced while reading,
+        so an oversized upload is abandoned after at most ``max_image_size``
+        bytes. Re-uploading content that is already stored skips the write.
+        The caller holds a reference on the returned file until it calls
+        ``release_uploads``.
+
+        Args:
+            stream: Readable binary stream with the file contents
+            filename: Original filename; only its extension is kept
+
+        Returns:
+            Path to the saved file
+
+        Raises:
+            UploadTooLargeError: If the stream exceeds ``max_image_size``
+        """
+        try:
+            _, path = self.store.put_stream(
+                stream,
+                suffix=_extension(filename),
+                max_size=self.max_image_size,
+                chunk_size=self.CHUNK_SIZE,
+            )
+        except UploadTooLargeError:
+            raise UploadTooLargeError(
+                f"{os.path.basename(filename)} exceeds {self.max_image_size} bytes"
+            )
+        return path
+
+    def release_uploads(self, file_paths: List[str]) -> None:
+        """
+        Release the references taken when the uploads were saved.
+
+        Args:
+            file_paths: Paths returned by save_uploaded_file or
+                save_uploaded_stream
+        """
+        for file_path in file_paths:
+            self.store.release(file_path)
+
+
+def _extension(filename: str) -> str:
+    """Return the lowercased extension of a client-supplied filename."""
+    _, ext = os.path.splitext(os.path.basename(filename))
+    return ext.lower()
+
+
+def _read_image_size(file_path: str) -> Optional[Tuple[int, int]]:
+    """Return (width, height) from an image's header, or None if unreadable."""
+    try:
+        with Image.open(file_path) as img:
+            return img.size
+    except Exception:
+        return None
+
+
+def _target_size(size: Tuple[int, int], max_long_edge: Optional[int]) -> Optional[Tuple[int, int]]:
+    """Return the downscaled (width, height), or None if no resize is needed."""
+    width, height = size
+    if not max_long_edge or max(width, height) <= max_long_edge:
+        return None
+    factor = max_long_edge / max(width, height)
+    return max(1, round(width * factor)), max(1, round(height * factor))
+
+
+def _decode_file(
+    file_path: str, max_image_size: int, max_long_edge: Optional[int] = None
+) -> DecodeResult:
+    """Decode an image file; see ImageProcessor.decode_image."""
+    _, ext = os.path.splitext(file_path)
+    if ext.lower() not in ImageProcessor.SUPPORTED_FORMATS:
+        return DecodeResult(None, ImageProcessor.REJECT_UNSUPPORTED_FORMAT, ext or None)
+
+    try:
+        f = open(file_path, "rb")
+    except OSError as e:
+        return DecodeResult(None, ImageProcessor.REJECT_MISSING, str(e))
+
+    with f:
+        size = os.fstat(f.fileno()).st_size
+        if size > max_image_size:
+            return DecodeResult(
+                None,
+                ImageProcessor.REJECT_TOO_LARGE,
+                f"{size} bytes exceeds {max_image_size}",
+            )
+
+        try:
+            with Image.open(f) as img:
+                original_size = img.size
+                target = _target_size(original_size, max_long_edge)
+                if target is not None:
+                    # JPEG only: pick the smallest DCT scale (1/2, 1/4, 1/8)
+                    # that still covers the target; a no-op for other formats
+                    img.draft("RGB", target)
+                # Conversion forces a full decode, so truncated or
+                # corrupt files fail here
+                if img.mode != "RGB":
+                    img = img.convert("RGB")
+                if target is not None and img.size != target:
+                    img = img.resize(target, Image.Resampling.BILINEAR, reducing_gap=2.0)
+                return DecodeResult(
+                    np.array(img),
+                    scale=img.size[0] / original_size[0],
+                    original_size=original_size,
+                )
+        except Exception as e:
+            return DecodeResult(None, ImageProcessor.REJECT_DECODE_ERROR, str(e))
+
+
+def _decode_to_arena(
+    file_path: str,
+    max_image_size: int,
+    max_long_edge: Optional[int],
+    arena_path: str,
+    slot: Optional[Tuple[int, Tuple[int, ...]]],
+) -> Tuple[Any, ...]:
+    """
+    Decode an image in a worker process into its slot of a view arena.
+
+    Returns ("arena", scale, original size) once the pixels are in the
+    slot, so only a few bytes cross the process boundary, or ("rejected",
+    reason, detail) on failure. An image whose decoded shape does not match
+    the slot sized from its header is handed back through its own shared
+    memory block instead.
+    """
+    result = _decode_file(file_path, max_image_size, max_long_edge)
+    if not result.ok:
+        return ("rejected", result.reason, result.detail)
+    if slot is not None and result.img.shape == slot[1]:
+        write_to_arena(arena_path, slot[0], result.img)
+        return ("arena", result.scale, result.original_size)
+    return _share_decoded(result)
+
+
+def _share_decoded(result: DecodeResult) -> Tuple[Any, ...]:
+    """
+    Copy a decoded image into a new shared memory block.
+
+    Returns ("ok", block name, shape, scale, original size).
+    """
+    block = shared_memory.SharedMemory(create=True, size=result.img.nbytes)
+    try:
+        np.ndarray(result.img.shape, dtype=np.uint8, buffer=block.buf)[...] = result.img
+    finally:
+        block.close()
+    # The parent unlinks the block once it has copied the pixels out; stop
+    # this process's resource tracker from unlinking it when the worker exits
+    resource_tracker.unregister(block._name, "shared_memory")
+    return ("ok", block.name, result.img.shape, result.scale, result.original_size)
+
 
-        with open(file_path, "wb") as f:
-            f.write(file_data)
+def _collect_from_shared_memory(outcome: Tuple[Any, ...]) -> DecodeResult:
+    """Copy a decoded image out of shared memory and free the block."""
+    if outcome[0] != "ok":
+        return DecodeResult(None, outcome[1], outcome[2])
 
-        return file_path
+    _, name, shape, scale, original_size = outcome
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        img = np.ndarray(shape, dtype=np.uint8, buffer=block.buf).copy()
+    finally:
+        block.close()
+        block.unlink()
+    return DecodeResult(img, scale=scale, original_size=original_size)
@@ -0,0 +1,399 @@
+"""
+Background job management for long-running 3D reconstructions.
+"""
+
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from .metrics import current_rss_bytes
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """
+    A single background job and its progress.
+
+    Every state change is appended to an event log that clients can follow
+    with ``events_since``: "status" events when the job starts and finishes,
+    "progress" events when a stage starts or reports progress, and "stage"
+    events carrying the duration of each stage once it ends. Stage
+    durations are also kept in ``timings``.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, job_id: Optional[str] = None):
+        """
+        Initialize a Job.
+
+        Args:
+            job_id: Optional identifier; a random one is generated if omitted
+        """
+        self.id = job_id or uuid.uuid4().hex
+        self.status = self.QUEUED
+        self.stage: Optional[str] = None
+        self.progress = 0.0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.timings: Dict[str, float] = {}
+        self.peak_rss_bytes: Optional[int] = None
+        self._stage_started: Optional[float] = None
+        self._events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._finished = threading.Event()
+
+    @classmethod
+    def restore(cls, state: Dict[str, Any], events: List[Dict[str, Any]]) -> "Job":
+        """
+        Rebuild a queued job from a snapshot taken in another process.
+
+        The job keeps its id, creation time, timings and event log, so a
+        worker continues the events an API node started, e.g. "ingest".
+
+        Args:
+            state: Snapshot from to_dict
+            events: Events recorded so far, in order
+
+        Returns:
+            A queued Job
+        """
+        job = cls(state["job_id"])
+        job.created_at = state["created_at"]
+        job.timings = dict(state.get("timings") or {})
+        job._events = [dict(event) for event in events]
+        return job
+
+    @property
+    def is_finished(self) -> bool:
+        """Whether the job has completed, successfully or not."""
+        return self.status in (self.DONE, self.FAILED)
+
+    def update(
+        self, stage: Optional[str] = None, progress: Optional[float] = None, **details: Any
+    ) -> None:
+        """
+        Report progress from inside a running job.
+
+        Starting a new stage ends the current one and records its duration.
+
+        Args:
+            stage: Name of the stage currently executing
+            progress: Overall completion in the range [0, 1]
+            **details: JSON-serializable fields added to the progress event,
+                e.g. the number of views being processed
+        """
+        with self._lock:
+            now = time.time()
+            if stage is not None and stage != self.stage:
+                self._end_stage(now)
+                self.stage = stage
+                self._stage_started = now
+            if progress is not None:
+                self.progress = min(max(float(progress), 0.0), 1.0)
+            self._emit(
+                "progress", now, stage=self.stage, progress=round(self.progress, 3), **details
+            )
+
+    def record_stage(self, stage: str, seconds: float, **details: Any) -> None:
+        """
+        Record a stage that ran outside the job, such as saving its uploads.
+
+        Args:
+            stage: Name of the stage
+            seconds: How long the stage took
+            **details: JSON-serializable fields added to the stage event
+        """
+        with self._lock:
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+            self._emit("stage", time.time(), stage=stage, seconds=round(seconds, 6), **details)
+
+    def events_since(self, last_id: int = 0, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Return the events after ``last_id``, waiting for one if there are none.
+
+        Event ids start at 1 and increase by one, so a client resumes a
+        stream by passing the id of the last event it received.
+
+        Args:
+            last_id: Id of the last event already seen; 0 returns all events
+            timeout: Maximum number of seconds to wait for a new event
+
+        Returns:
+            The new events, empty if none arrived in time or the job has
+            finished and every event was seen
+        """
+        with self._changed:
+            self._changed.wait_for(
+                lambda: len(self._events) > last_id or self.is_finished, timeout
+            )
+            return [dict(event) for event in self._events[max(last_id, 0):]]
+
+    def run(self, func: Callable[..., Dict[str, Any]], *args: Any, **kwargs: Any) -> None:
+        """
+        Execute a callable as this job, recording its result or error.
+
+        The callable receives the job as its first argument. Exceptions are
+        logged and mark the job failed rather than propagating.
+
+        Args:
+            func: Callable to run
+            *args: Positional arguments passed after the job
+            **kwargs: Keyword arguments passed to the callable
+        """
+        self._start()
+        try:
+            result = func(self, *args, **kwargs)
+            self._finish(result=result)
+        except Exception as e:
+            logger.error(f"Job {self.id} failed: {e}")
+            self._finish(error=str(e) or e.__class__.__name__)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the job finishes.
+
+        Args:
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            True if the job finished within the timeout
+        """
+        return self._finished.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serializable snapshot of the job state."""
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "stage": self.stage,
+                "progress": round(self.progress, 3),
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "timings": dict(self.timings),
+                "peak_rss_bytes": self.peak_rss_bytes,
+            }
+
+    def _emit(self, event: str, now: float, **fields: Any) -> None:
+        # Caller holds self._lock
+        self._events.append(
+            {
+                "id": len(self._events) + 1,
+                "event": event,
+                "time": now,
+                "elapsed": round(now - self.created_at, 6),
+                **fields,
+            }
+        )
+        self._changed.notify_all()
+
+    def _end_stage(self, now: float) -> None:
+        # Caller holds self._lock
+        if self.stage is None or self._stage_started is None:
+            return
+        seconds = now - self._stage_started
+        self.timings[self.stage] = self.timings.get(self.stage, 0.0) + seconds
+        # Stages are coarse, so one small /proc read per stage is negligible
+        rss = current_rss_bytes()
+        if rss is not None:
+            self.peak_rss_bytes = max(self.peak_rss_bytes or 0, rss)
+        self._emit("stage", now, stage=self.stage, seconds=round(seconds, 6))
+
+    def _start(self) -> None:
+        with self._lock:
+            self.status = self.RUNNING
+            self.started_at = time.time()
+            self.timings["queued"] = self.started_at - self.created_at
+            self._emit("status", self.started_at, status=self.status)
+
+    def _finish(self, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            if error is None:
+                self.status = self.DONE
+                self.result = result
+                self.progress = 1.0
+            else:
+                self.status = self.FAILED
+                self.error = error
+            self.finished_at = time.time()
+            self._end_stage(self.finished_at)
+            self._stage_started = None
+            self._emit(
+                "status",
+                self.finished_at,
+                status=self.status,
+                error=self.error,
+                timings={name: round(seconds, 6) for name, seconds in self.timings.items()},
+            )
+        self._finished.set()
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded pool of worker threads.
+
+    Admission control is provided by a bounded queue: once ``max_queued``
+    jobs are waiting, ``submit`` refuses new work instead of letting a burst
+    of uploads tie up every request thread.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_queued: int = 16,
+        max_finished: int = 100,
+        on_finish: Optional[Callable[[Job], None]] = None,
+    ):
+        """
+        Initialize the JobManager.
+
+        Args:
+            max_workers: Number of jobs that may run concurrently
+            max_queued: Maximum number of jobs waiting for a worker
+            max_finished: Number of finished jobs kept for status queries
+            on_finish: Optional callable receiving each job once it has
+                finished, e.g. to record metrics
+        """
+        self.on_finish = on_finish
+        self.max_workers = max(1, max_workers)
+        self.max_finished = max_finished
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, max_queued))
+        self._jobs: Dict[str, Job] = {}
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers = []
+        self._running = 0
+
+    def submit(self, func: Callable[..., Dict[str, Any]], *args: Any, **kwargs: Any) -> Optional[Job]:
+        """
+        Queue a callable for background execution.
+
+        The callable receives the Job as its first argument so it can report
+        progress, followed by ``args`` and ``kwargs``. Its return value becomes
+        the job result.
+
+        Args:
+            func: Callable to run
+            *args: Positional arguments passed after the job
+            **kwargs: Keyword arguments passed to the callable
+
+        Returns:
+            The queued Job, or None if the queue is full
+        """
+        return self.enqueue(Job(), func, *args, **kwargs)
+
+    def enqueue(
+        self, job: Job, func: Callable[..., Dict[str, Any]], *args: Any, **kwargs: Any
+    ) -> Optional[Job]:
+        """
+        Queue a callable for an already created job, like ``submit``.
+
+        Creating the job first lets callers record work done before it was
+        queued, such as saving its uploads, in the job's timings.
+
+        Returns:
+            The queued Job, or None if the queue is full
+        """
+        with self._lock:
+            self._jobs[job.id] = job
+            try:
+                self._queue.put_nowait((job, func, args, kwargs))
+            except queue.Full:
+                del self._jobs[job.id]
+                logger.warning("Job queue full, rejecting new job")
+                return None
+            self._ensure_workers()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by id."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    def running_count(self) -> int:
+        """Number of jobs currently executing."""
+        with self._lock:
+            return self._running
+
+    def stats(self) -> Dict[str, int]:
+        """Summary of queue and worker utilization."""
+        return {
+            "queued": self.queue_depth(),
+            "running": self.running_count(),
+            "workers": self.max_workers,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the worker threads once queued jobs are drained.
+
+        Args:
+            wait: Whether to block until workers exit
+        """
+        with self._lock:
+            workers = list(self._workers)
+            self._workers = []
+        for _ in workers:
+            self._queue.put((None, None, (), {}))
+        if wait:
+            for worker in workers:
+                worker.join()
+
+    def _ensure_workers(self) -> None:
+        # Workers are started lazily so apps that never receive an upload
+        # (e.g. in tests) do not spawn threads. Caller holds self._lock.
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"job-worker-{len(self._workers)}",
+                daemon=True,
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def _worker_loop(self) -> None:
+        while True:
+            job, func, args, kwargs = self._queue.get()
+            if job is None:
+                return
+            self._run(job, func, args, kwargs)
+
+    def _run(self, job: Job, func: Callable[..., Dict[str, Any]], args: tuple, kwargs: dict) -> None:
+        with self._lock:
+            self._running += 1
+        try:
+            job.run(func, *args, **kwargs)
+        finally:
+            if self.on_finish is not None:
+                try:
+                    self.on_finish(job)
+                except Exception as e:
+                    logger.warning(f"Job finish callback failed: {e}")
+            with self._lock:
+                self._running -= 1
+                self._finished[job.id] = None
+                self._prune_finished()
+
+    def _prune_finished(self) -> None:
+        # Caller holds self._lock
+        while len(self._finished) > self.max_finished:
+            job_id, _ = self._finished.popitem(last=False)
+            self._jobs.pop(job_id, None)
@@ -0,0 +1,183 @@
+"""
+Global memory budget shared by in-flight reconstructions.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBudgetExceeded(Exception):
+    """Raised when a reservation cannot be granted."""
+
+
+class MemoryBudget:
+    """
+    Admits work only while its estimated memory fits a fixed budget.
+
+    Reservations are granted in arrival order: once a request is waiting,
+    later ones queue behind it even if they would fit, so a large job is
+    not starved by a stream of small ones. A request larger than the whole
+    budget can never be granted and is refused immediately.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initialize the MemoryBudget.
+
+        Args:
+            capacity: Total bytes that may be reserved at once
+        """
+        if capacity <= 0:
+            raise ValueError(f"Memory budget must be positive, got {capacity}")
+        self.capacity = capacity
+        self._reserved = 0
+        self._waiters: "deque[object]" = deque()
+        self._changed = threading.Condition()
+        self._stats = {"granted": 0, "waited": 0, "refused": 0, "timeouts": 0}
+
+    def try_acquire(self, nbytes: int) -> bool:
+        """
+        Reserve nbytes if they fit now and nobody is waiting.
+
+        Args:
+            nbytes: Bytes to reserve
+
+        Returns:
+            True if the reservation was granted
+        """
+        with self._changed:
+            if self._waiters or not self._fits(nbytes):
+                return False
+            self._grant(nbytes)
+            return True
+
+    def acquire(self, nbytes: int, timeout: Optional[float] = None) -> bool:
+        """
+        Reserve nbytes, waiting for earlier reservations to be released.
+
+        Args:
+            nbytes: Bytes to reserve
+            timeout: Maximum number of seconds to wait; None waits forever
+
+        Returns:
+            True if the reservation was granted, False on timeout
+
+        Raises:
+            MemoryBudgetExceeded: If nbytes exceeds the whole budget
+        """
+        if nbytes > self.capacity:
+            with self._changed:
+                self._stats["refused"] += 1
+            raise MemoryBudgetExceeded(
+                f"Estimated {nbytes} bytes exceeds the memory budget of {self.capacity} bytes"
+            )
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        ticket = object()
+        with self._changed:
+            if not self._waiters and self._fits(nbytes):
+                self._grant(nbytes)
+                return True
+            self._stats["waited"] += 1
+            self._waiters.append(ticket)
+            try:
+                while self._waiters[0] is not ticket or not self._fits(nbytes):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        return False
+                    self._changed.wait(remaining)
+                self._grant(nbytes)
+                return True
+            finally:
+                self._waiters.remove(ticket)
+                # The next waiter may fit now that the head has moved
+                self._changed.notify_all()
+
+    def release(self, nbytes: int) -> None:
+        """Return a reservation to the budget."""
+        with self._changed:
+            self._reserved = max(0, self._reserved - nbytes)
+            self._changed.notify_all()
+
+    @contextmanager
+    def reserve(self, nbytes: int, timeout: Optional[float] = None) -> Iterator[None]:
+        """
+        Hold a reservation for the duration of a with block.
+
+        Raises:
+            MemoryBudgetExceeded: If nbytes exceeds the whole budget or the
+                reservation is not granted within timeout
+        """
+        if not self.acquire(nbytes, timeout):
+            raise MemoryBudgetExceeded(
+                f"Timed out waiting for {nbytes} bytes of the memory budget"
+            )
+        try:
+            yield
+        finally:
+            self.release(nbytes)
+
+    def stats(self) -> Dict[str, int]:
+        """Capacity, bytes reserved, waiting reservations and counters."""
+        with self._changed:
+            return {
+                "capacity": self.capacity,
+                "reserved": self._reserved,
+                "waiting": len(self._waiters),
+                **self._stats,
+            }
+
+    def _fits(self, nbytes: int) -> bool:
+        # Caller holds self._changed
+        return self._reserved + nbytes <= self.capacity
+
+    def _grant(self, nbytes: int) -> None:
+        # Caller holds self._changed
+        self._reserved += nbytes
+        self._stats["granted"] += 1
+
+
+# cgroup v2 and v1 memory limits, checked so containers use their own limit
+_CGROUP_LIMIT_FILES = (
+    "/sys/fs/cgroup/memory.max",
+    "/sys/fs/cgroup/memory/memory.limit_in_bytes",
+)
+
+
+def default_memory_budget(fraction: float = 0.5) -> Optional[int]:
+    """
+    A fraction of the memory available to this process.
+
+    That is the smaller of physical memory and the container's cgroup
+    limit, when one is set.
+
+    Args:
+        fraction: Share of available memory in-flight jobs may use
+
+    Returns:
+        Budget in bytes, or None where memory cannot be determined
+    """
+    limits = []
+    try:
+        limits.append(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES"))
+    except (AttributeError, ValueError, OSError):
+        pass
+    for path in _CGROUP_LIMIT_FILES:
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # "max" (v2) or a huge number (v1) means unlimited
+        if value.isdigit():
+            limits.append(int(value))
+    limits = [limit for limit in limits if limit > 0]
+    return int(min(limits) * fraction) if limits else None
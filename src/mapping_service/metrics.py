@@ -0,0 +1,384 @@
+"""
+Low-overhead service metrics rendered in the Prometheus text format.
+"""
+
+import os
+import bisect
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans fast requests up to multi-minute reconstructions
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# Bytes; 128 MiB to 32 GiB in powers of two
+MEMORY_BUCKETS = tuple(float(1 << shift) for shift in range(27, 36))
+
+# One sample: (name suffix, labels, value)
+Sample = Tuple[str, Dict[str, str], float]
+# Called at scrape time, yielding (name, type, help, samples) per metric
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+
+class _Metric(ABC):
+    """Base class for labelled metrics; values are kept per label tuple."""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    @abstractmethod
+    def samples(self) -> List[Sample]:
+        """Current values as (suffix, labels, value) samples."""
+
+
+class Counter(_Metric):
+    """A monotonically increasing total."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Add amount to the counter for the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Current total for the given labels."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [("_total", self._labels(key), value) for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """A value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the gauge for the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_max(self, value: float, **labels: str) -> None:
+        """Raise the gauge to value if it is higher, keeping a high-water mark."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = max(self._values.get(key, value), value)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [("", self._labels(key), value) for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    """
+    Observations counted into cumulative buckets.
+
+    Observing is a bisect and three additions under a lock, cheap enough to
+    leave on around every stage of every job.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation for the given labels."""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels: str) -> int:
+        """Number of observations for the given labels."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                labels = self._labels(key)
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    samples.append(("_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+                samples.append(("_bucket", {**labels, "le": "+Inf"}, count))
+                samples.append(("_sum", labels, total))
+                samples.append(("_count", labels, count))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Holds the service's metrics and renders them for scraping.
+
+    Metrics updated on the hot path are plain in-memory counters,
+    gauges and histograms. Values that already live elsewhere, such as
+    queue depth or cache statistics, are read by collectors only when
+    ``/metrics`` is scraped.
+    """
+
+    def __init__(self, namespace: str = "mapping"):
+        """
+        Initialize the MetricsRegistry.
+
+        Args:
+            namespace: Prefix added to every metric name
+        """
+        self.namespace = namespace
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Create or return the counter called name."""
+        return self._register(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Create or return the gauge called name."""
+        return self._register(Gauge, name, help_text, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Create or return the histogram called name."""
+        return self._register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def add_collector(self, collector: Collector) -> None:
+        """Register a callable producing metrics at scrape time."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        families = [
+            (f"{self.namespace}_{metric.name}", metric.kind, metric.help, metric.samples())
+            for metric in metrics
+        ]
+        for collector in collectors:
+            try:
+                families.extend(
+                    (f"{self.namespace}_{name}", kind, help_text, samples)
+                    for name, kind, help_text, samples in collector()
+                )
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+
+        lines = []
+        for name, kind, help_text, samples in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _register(self, cls, name: str, help_text: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+
+class ServiceMetrics(MetricsRegistry):
+    """
+    The mapping service's metrics.
+
+    Request latencies and download bytes are recorded as responses are
+    sent, and job metrics once per finished job from its stage timings,
+    so the pipeline itself carries no instrumentation beyond the stage
+    events it already reports.
+    """
+
+    def __init__(self, namespace: str = "mapping"):
+        """
+        Initialize the ServiceMetrics.
+
+        Args:
+            namespace: Prefix added to every metric name
+        """
+        super().__init__(namespace)
+        self.requests = self.histogram(
+            "http_request_seconds",
+            "Time to produce a response, by endpoint",
+            ("endpoint", "method", "status"),
+        )
+        self.upload_bytes = self.counter("upload_bytes", "Bytes of uploaded images saved")
+        self.upload_files = self.counter("upload_files", "Uploaded image files saved")
+        self.download_bytes = self.counter(
+            "download_bytes", "Bytes of models and tiles sent", ("route", "encoding")
+        )
+        self.jobs = self.counter("jobs", "Finished jobs", ("status",))
+        self.job_seconds = self.histogram(
+            "job_seconds", "Time from upload to job completion", ("status",)
+        )
+        self.stage_seconds = self.histogram(
+            "stage_seconds", "Time spent in each job stage", ("stage",)
+        )
+        self.views = self.counter("views_processed", "Views reconstructed by finished jobs")
+        self.rejected = self.counter(
+            "images_rejected", "Uploaded images that could not be decoded", ("reason",)
+        )
+        self.job_peak_rss = self.histogram(
+            "job_peak_rss_bytes",
+            "Peak resident memory of the process sampled while a job ran",
+            buckets=MEMORY_BUCKETS,
+        )
+
+    def observe_request(
+        self, endpoint: Optional[str], method: str, status: int, seconds: float
+    ) -> None:
+        """Record the latency of one HTTP response."""
+        self.requests.observe(
+            seconds, endpoint=endpoint or "unknown", method=method, status=str(status)
+        )
+
+    def observe_upload(self, num_files: int, num_bytes: int) -> None:
+        """Record images saved by an upload."""
+        self.upload_files.inc(num_files)
+        self.upload_bytes.inc(num_bytes)
+
+    def observe_download(self, route: str, encoding: str, num_bytes: int) -> None:
+        """Record the body size of a model or tile response."""
+        self.download_bytes.inc(num_bytes, route=route, encoding=encoding)
+
+    def observe_job(self, job) -> None:
+        """
+        Record a finished job.
+
+        Args:
+            job: Finished Job; its timings, peak memory and result are read
+        """
+        self.jobs.inc(status=job.status)
+        if job.finished_at is not None:
+            self.job_seconds.observe(job.finished_at - job.created_at, status=job.status)
+        for stage, seconds in job.timings.items():
+            self.stage_seconds.observe(seconds, stage=stage)
+        if job.peak_rss_bytes is not None:
+            self.job_peak_rss.observe(job.peak_rss_bytes)
+        if job.result:
+            self.views.inc(job.result.get("num_views_processed", 0))
+            for rejected in job.result.get("rejected", []):
+                self.rejected.inc(reason=rejected["reason"])
+
+
+def counter_family(
+    name: str, help_text: str, values: Dict[str, float], label: Optional[str] = None
+) -> Tuple[str, str, str, List[Sample]]:
+    """
+    Build a counter for a collector from values keyed by label value.
+
+    Args:
+        name: Metric name without namespace or "_total" suffix
+        help_text: Description of the metric
+        values: Values keyed by the label value, or by "" without a label
+        label: Name of the label distinguishing the values
+
+    Returns:
+        A (name, type, help, samples) tuple
+    """
+    return name, "counter", help_text, _family_samples("_total", values, label)
+
+
+def gauge_family(
+    name: str, help_text: str, values: Dict[str, float], label: Optional[str] = None
+) -> Tuple[str, str, str, List[Sample]]:
+    """Build a gauge for a collector, like counter_family."""
+    return name, "gauge", help_text, _family_samples("", values, label)
+
+
+def _family_samples(suffix: str, values: Dict[str, float], label: Optional[str]) -> List[Sample]:
+    return [
+        (suffix, {label: key} if label else {}, value)
+        for key, value in values.items()
+        if value is not None
+    ]
+
+
+def current_rss_bytes() -> Optional[int]:
+    """
+    Resident memory of this process, or None if it cannot be read.
+
+    Reads ``/proc/self/statm`` where available, which is a single small
+    read, and falls back to the peak reported by ``getrusage``.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
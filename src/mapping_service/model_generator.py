@@ -3,12 +3,30 @@
 """
 
 import os
+import json
+import shutil
 import logging
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, Sequence
 import numpy as np
+from .result_cache import ResultCache
+from .artifacts import ArtifactStore, atomic_write, publish_artifact, save_array
+from .model_pool import ModelPool
+from .batching import BatchScheduler
+from .pointcloud import (
+    PointCloud,
+    backproject,
+    merge_point_clouds,
+    pinhole_intrinsics,
+    voxel_downsample,
+)
+from .tiling import TILESET_FILE, build_tiles
+from .exporters import Exporter, exporter_for_path, get_exporter
 
 logger = logging.getLogger(__name__)
 
+# Called with a stage name as it starts, plus keyword details
+StageCallback = Callable[..., None]
+
 
 class ModelGenerator:
     """
@@ -18,131 +36,726 @@ class ModelGenerator:
     In production, this would integrate with the actual MapAnything model.
     """
 
-    def __init__(self, model_id: str = "facebook/map-anything", output_dir: str = "outputs"):
+    DEFAULT_OUTPUT_STEM = "model"
+    TILES_DIR = "tiles"
+    DEPTH_MAPS_FILE = "depth_maps.npy"
+    CAMERA_POSES_FILE = "camera_poses.npy"
+    VIEW_SHAPES_FILE = "view_shapes.npy"
+    INTRINSICS_FILE = "intrinsics.npy"
+    CLOUD_POINTS_FILE = "cloud_points.npy"
+    CLOUD_COLORS_FILE = "cloud_colors.npy"
+    CLOUD_NORMALS_FILE = "cloud_normals.npy"
+    VIEWS_FILE = "views.json"
+    SEGMENTS_DIR = "segments"
+    # Per-view arrays, saved once per segment of consecutive views
+    SEGMENT_FILES = {
+        "depth_maps": DEPTH_MAPS_FILE,
+        "camera_poses": CAMERA_POSES_FILE,
+        "view_shapes": VIEW_SHAPES_FILE,
+        "intrinsics": INTRINSICS_FILE,
+    }
+    PARENT_ARRAY_FILES = (
+        CLOUD_POINTS_FILE,
+        CLOUD_COLORS_FILE,
+        CLOUD_NORMALS_FILE,
+    )
+    # Peak bytes per back-projected point: coordinates, color, normal,
+    # view index and the temporaries of normal estimation (measured)
+    BYTES_PER_POINT = 128
+    # Bumped whenever the cached arrays change
+    CACHE_LAYOUT = 4
+
+    def __init__(
+        self,
+        model_id: str = "facebook/map-anything",
+        output_dir: str = "outputs",
+        result_cache: Optional[ResultCache] = None,
+        retention_seconds: Optional[float] = None,
+        max_output_bytes: Optional[int] = None,
+        pool_size: int = 1,
+        max_batch_size: int = 1,
+        max_batch_wait_ms: float = 10,
+        point_stride: int = 4,
+        voxel_size: Optional[float] = None,
+        output_format: str = "ply",
+        precompress: Sequence[str] = ("gzip",),
+        tile_max_points: Optional[int] = None,
+    ):
         """
         Initialize the ModelGenerator.
 
         Args:
             model_id: Model identifier for MapAnything
             output_dir: Directory to save generated 3D models
+            result_cache: Optional cache of previous reconstructions, used
+                when every view carries a "content_hash"
+            retention_seconds: Age after which job artifact directories are
+                garbage collected; None keeps them
+            max_output_bytes: Total size budget for job artifact directories
+            pool_size: Number of model instances, i.e. concurrent inferences
+            max_batch_size: Maximum number of views from concurrent jobs
+                combined into one forward pass; 1 disables batching
+            max_batch_wait_ms: Longest time a job waits for others to join
+                its batch
+            point_stride: Pixel stride used when back-projecting depth into
+                the exported point cloud
+            voxel_size: Edge length of the voxel grid the fused point cloud
+                is downsampled to; None keeps every point
+            output_format: Default exporter name for the output file
+            precompress: Content encodings the output file is
+                pre-compressed with for downloads ("gzip", "zstd")
+            tile_max_points: When set, also write an octree of
+                level-of-detail tiles holding at most this many points each
         """
+        if get_exporter(output_format) is None:
+            raise ValueError(f"Unknown output format: {output_format}")
         self.model_id = model_id
         self.output_dir = output_dir
-        self.model_loaded = False
+        self.result_cache = result_cache
+        self.point_stride = point_stride
+        self.voxel_size = voxel_size
+        self.output_format = output_format
+        self.precompress = tuple(precompress)
+        self.tile_max_points = tile_max_points
+        self.pool = ModelPool(self._create_model, size=pool_size)
+        self.scheduler: Optional[BatchScheduler] = None
+        if max_batch_size > 1:
+            self.scheduler = BatchScheduler(
+                self._infer_batch,
+                max_batch_size=max_batch_size,
+                max_wait_seconds=max_batch_wait_ms / 1000.0,
+                num_workers=self.pool.size,
+            )
         os.makedirs(output_dir, exist_ok=True)
+        self.artifacts = ArtifactStore(
+            output_dir, max_age_seconds=retention_seconds, max_bytes=max_output_bytes
+        )
+
+    @property
+    def model_loaded(self) -> bool:
+        """Whether the model pool has finished loading."""
+        return self.pool.is_ready
 
     def load_model(self) -> bool:
         """
-        Load the MapAnything model.
+        Load the MapAnything model instances, blocking until done.
 
         Returns:
             True if model loaded successfully, False otherwise
         """
-        try:
-            # In a real implementation:
-            # from mapanything import MapAnything
-            # self.model = MapAnything.from_pretrained(self.model_id)
-            
-            # Mock implementation
-            logger.info(f"Loading model: {self.model_id}")
-            self.model_loaded = True
-            return True
-        except Exception as e:
-            logger.error(f"Error loading model: {e}")
-            return False
+        return self.pool.load()
+
+    def warm_up(self, background: bool = False) -> None:
+        """
+        Load the model ahead of the first request.
+
+        Args:
+            background: Load on a background thread; readiness can be
+                checked with is_ready or model_status
+        """
+        self.pool.start(background=background)
+
+    def model_status(self) -> Dict[str, Any]:
+        """Model pool state, size and cold-start load time."""
+        return self.pool.status()
+
+    def _create_model(self) -> Any:
+        """Load one model instance for the pool."""
+        # In a real implementation:
+        # from mapanything import MapAnything
+        # return MapAnything.from_pretrained(self.model_id)
+
+        # Mock implementation
+        logger.info(f"Loading model: {self.model_id}")
+        return {"model_id": self.model_id}
 
     def generate_3d_model(
-        self, views: List[Dict[str, Any]], output_name: Optional[str] = None
+        self,
+        views: List[Dict[str, Any]],
+        output_name: Optional[str] = None,
+        job_id: Optional[str] = None,
+        output_format: Optional[str] = None,
+        on_stage: Optional[StageCallback] = None,
     ) -> Optional[Dict[str, Any]]:
         """
         Generate a 3D model from input views.
 
+        Every call writes into its own directory ``output_dir/<job_id>/``
+        holding the mesh, depth maps and camera poses, each written through
+        a temporary file and renamed into place, so concurrent jobs never
+        share or observe partial output files. The per-view arrays are
+        saved under ``segments/00000/``.
+
+        Depth maps are returned as one float32 ``(N, H, W)`` array, padded
+        with zeros where a view is smaller than the largest one, with each
+        view's own ``(height, width)`` in the ``(N, 2)`` "view_shapes" array.
+        Camera poses are one ``(N, 4, 4)`` array and intrinsics one
+        ``(N, 3, 3)`` array. The output file holds the fused, colored point
+        cloud back-projected from them, optionally merged per voxel. With
+        tiling enabled, "tileset" names the tileset of the octree tiles
+        written under ``tiles/``, relative to the artifact directory.
+
         Args:
             views: List of view dictionaries with image data
-            output_name: Optional name for the output file
+            output_name: Optional name for the output file; its extension
+                selects the format when output_format is not given
+            job_id: Optional job identifier naming the artifact directory;
+                a random one is generated if omitted
+            output_format: Optional exporter name ("obj", "ply", "glb")
+            on_stage: Optional callable invoked with the name of each stage
+                ("inference", "fusion", "export") as it starts, plus
+                keyword details such as the number of views
 
         Returns:
             Dictionary with generation results or None if failed
         """
-        if not self.model_loaded:
-            if not self.load_model():
-                return None
-
         if not views:
             logger.warning("No valid views provided")
             return None
 
+        prepared = self._prepare_output(output_name, output_format, job_id)
+        if prepared is None:
+            return None
+        exporter, job_id, artifact_dir, output_path = prepared
+
+        hashes = [view.get("content_hash") for view in views]
+        cache_key = self._cache_key(hashes, self._view_shapes(views), output_path)
+        if cache_key is not None:
+            cached = self._load_cached(cache_key, output_path)
+            if cached is not None:
+                _report(on_stage, "export", cached=True)
+                return self._reuse_cached(cached, job_id, artifact_dir, hashes)
+
+        # Waits for a warm-up in progress, or loads lazily if there was none
+        if not self.model_loaded and not self.pool.wait_ready() and not self.load_model():
+            return None
+
         try:
-            # In a real implementation:
-            # results = self.model.infer(views)
-            
-            # Mock implementation - simulate processing
-            logger.info(f"Processing {len(views)} views for 3D reconstruction")
-            
+            view_shapes = self._view_shapes(views)
+            _report(on_stage, "inference", views=len(views))
+            depth_maps, camera_poses, intrinsics = self._run_inference(views)
+            _report(on_stage, "fusion")
+            point_cloud = self._build_point_cloud(views, depth_maps, intrinsics, camera_poses)
+
             results = {
                 "status": "success",
                 "num_views": len(views),
-                "output_path": os.path.join(
-                    self.output_dir, 
-                    output_name or "model_output.obj"
-                ),
-                "depth_maps": self._generate_mock_depth_maps(views),
-                "camera_poses": self._generate_mock_camera_poses(len(views)),
+                "output_path": output_path,
+                "depth_maps": depth_maps,
+                "camera_poses": camera_poses,
+                "view_shapes": view_shapes,
+                "intrinsics": intrinsics,
+                "num_points": len(point_cloud),
                 "metric_scale": 1.0,
+                "job_id": job_id,
+                "artifact_dir": artifact_dir,
             }
+            _report(on_stage, "export", points=len(point_cloud))
+            self._write_outputs(results, point_cloud, exporter, hashes, cache_key)
+            return results
+
+        except Exception as e:
+            logger.error(f"Error generating 3D model: {e}")
+            return None
+
+    def extend_3d_model(
+        self,
+        parent_job_id: str,
+        views: List[Dict[str, Any]],
+        output_name: Optional[str] = None,
+        job_id: Optional[str] = None,
+        output_format: Optional[str] = None,
+        on_stage: Optional[StageCallback] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Add views to a finished reconstruction without reprocessing its views.
+
+        The parent job's per-view arrays and fused point cloud are
+        memory-mapped from its artifact directory. Only the new views go
+        through inference and back-projection, with their camera poses
+        registered after the parent's, and their points are fused into the
+        parent's cloud. The new job's directory hard-links the parent's
+        segments and adds one segment for the new views, so apart from the
+        fused cloud, adding k views reads and writes arrays for k views
+        rather than for all of them. The parent's directory is left
+        untouched and the combined reconstruction can itself be extended.
 
-            # Simulate saving output file
-            self._save_mock_output(results["output_path"], results)
+        In the result, "depth_maps", "camera_poses", "view_shapes" and
+        "intrinsics" are lists with one array per segment, the parent's
+        memory-mapped and the new views' last.
 
+        Args:
+            parent_job_id: Job whose reconstruction is extended
+            views: New view dictionaries with image data
+            output_name: Optional name for the output file
+            job_id: Optional job identifier naming the new artifact directory
+            output_format: Optional exporter name ("obj", "ply", "glb")
+            on_stage: Optional stage callback, as for generate_3d_model
+
+        Returns:
+            Dictionary with the combined generation results, including
+            "parent_job_id", or None if the parent has no saved
+            reconstruction or generation fails
+        """
+        if not views:
+            logger.warning("No valid views provided")
+            return None
+
+        parent = self.load_reconstruction(parent_job_id)
+        if parent is None:
+            logger.error(f"No reconstruction to extend for job {parent_job_id}")
+            return None
+
+        prepared = self._prepare_output(output_name, output_format, job_id)
+        if prepared is None:
+            return None
+        exporter, job_id, artifact_dir, output_path = prepared
+
+        hashes = parent["content_hashes"] + [view.get("content_hash") for view in views]
+        view_shapes = np.concatenate(parent["view_shapes"] + [self._view_shapes(views)])
+        cache_key = self._cache_key(hashes, view_shapes, output_path)
+        if cache_key is not None:
+            cached = self._load_cached(cache_key, output_path)
+            if cached is not None:
+                cached["parent_job_id"] = parent_job_id
+                _report(on_stage, "export", cached=True)
+                return self._reuse_cached(cached, job_id, artifact_dir, hashes)
+
+        if not self.model_loaded and not self.pool.wait_ready() and not self.load_model():
+            return None
+
+        try:
+            _report(on_stage, "inference", views=len(views))
+            depth_maps, camera_poses, intrinsics = self._run_inference(views)
+            camera_poses = self._register_poses(np.concatenate(parent["camera_poses"]), camera_poses)
+            _report(on_stage, "fusion")
+            new_cloud = self._build_point_cloud(
+                views, depth_maps, intrinsics, camera_poses, downsample=False
+            )
+            point_cloud = merge_point_clouds([parent["point_cloud"], new_cloud])
+            if self.voxel_size:
+                point_cloud = voxel_downsample(point_cloud, self.voxel_size)
+
+            results = {
+                "status": "success",
+                "num_views": len(hashes),
+                "output_path": output_path,
+                "depth_maps": parent["depth_maps"] + [depth_maps],
+                "camera_poses": parent["camera_poses"] + [camera_poses],
+                "view_shapes": parent["view_shapes"] + [self._view_shapes(views)],
+                "intrinsics": parent["intrinsics"] + [intrinsics],
+                "num_points": len(point_cloud),
+                "metric_scale": 1.0,
+                "job_id": job_id,
+                "artifact_dir": artifact_dir,
+                "parent_job_id": parent_job_id,
+            }
+            _report(on_stage, "export", points=len(point_cloud))
+            self._write_outputs(results, point_cloud, exporter, hashes, cache_key)
             return results
 
         except Exception as e:
-            logger.error(f"Error generating 3D model: {e}")
+            logger.error(f"Error extending 3D model: {e}")
             return None
 
-    def _generate_mock_depth_maps(self, views: List[Dict[str, Any]]) -> List[np.ndarray]:
-        """Generate mock depth maps for testing."""
-        depth_maps = []
-        for view in views:
-            img = view["img"]
-            h, w = img.shape[:2]
-            # Create a simple gradient as mock depth
-            depth_map = np.linspace(0, 1, h * w).reshape(h, w)
-            depth_maps.append(depth_map)
-        return depth_maps
+    def estimate_memory(
+        self, view_shapes: np.ndarray, parent_job_id: Optional[str] = None
+    ) -> int:
+        """
+        Estimate the peak memory of reconstructing views of the given shapes.
 
-    def _generate_mock_camera_poses(self, num_views: int) -> List[np.ndarray]:
-        """Generate mock camera poses for testing."""
-        poses = []
-        for i in range(num_views):
-            # Create identity matrix with slight translation
-            pose = np.eye(4)
-            pose[0, 3] = i * 0.1  # Small x-axis translation
-            poses.append(pose)
-        return poses
+        Counts the zero-padded float32 depth stack and the back-projected
+        points with their colors, normals and temporaries. When extending a
+        job, the parent's point cloud is counted twice, once as read and
+        once in the fused copy; its per-view arrays are only linked.
+
+        Args:
+            view_shapes: ``(N, 2)`` array of view (height, width) pairs
+            parent_job_id: Job being extended, if any
+
+        Returns:
+            Estimated bytes
+        """
+        view_shapes = np.asarray(view_shapes, dtype=np.int64).reshape(-1, 2)
+        total = 0
+        if len(view_shapes):
+            height, width = view_shapes.max(axis=0)
+            total += len(view_shapes) * int(height) * int(width) * 4
+            samples = -(-view_shapes // self.point_stride)
+            total += int(samples.prod(axis=1).sum()) * self.BYTES_PER_POINT
+        if parent_job_id is not None:
+            artifact_dir = self.artifacts.job_dir(parent_job_id)
+            if artifact_dir is not None:
+                for name in self.PARENT_ARRAY_FILES:
+                    path = os.path.join(artifact_dir, name)
+                    if os.path.exists(path):
+                        total += 2 * os.path.getsize(path)
+        return total
+
+    def load_reconstruction(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Read back the saved arrays and fused point cloud of a job.
 
-    def _save_mock_output(self, output_path: str, results: Dict[str, Any]) -> None:
-        """Save mock output file."""
-        # Create a simple OBJ file format output
-        obj_content = """# Mock 3D Model Output
-# Generated by 3D Mapping Service
-# Number of views processed: {}
-# 
-# This is a placeholder. In production, this would contain
-# actual 3D mesh data from MapAnything.
+        Arrays are memory-mapped read-only, so nothing is copied until used.
 
-v 0.0 0.0 0.0
-v 1.0 0.0 0.0
-v 0.0 1.0 0.0
-v 1.0 1.0 0.0
+        Args:
+            job_id: Job whose artifact directory is read
+
+        Returns:
+            Dictionary with "point_cloud", "content_hashes" and lists of
+            per-segment "depth_maps", "camera_poses", "view_shapes" and
+            "intrinsics" arrays, or None if the job has no complete
+            reconstruction
+        """
+        artifact_dir = self.artifacts.job_dir(job_id)
+        if artifact_dir is None:
+            return None
+
+        def load(name: str, required: bool = True) -> Optional[np.ndarray]:
+            path = os.path.join(artifact_dir, name)
+            if not required and not os.path.exists(path):
+                return None
+            return np.load(path, mmap_mode="r")
+
+        try:
+            with open(os.path.join(artifact_dir, self.VIEWS_FILE)) as f:
+                content_hashes = json.load(f)["content_hashes"]
+            segment_dirs = self._segment_dirs(artifact_dir)
+            reconstruction = {
+                name: [np.load(os.path.join(d, file), mmap_mode="r") for d in segment_dirs]
+                for name, file in self.SEGMENT_FILES.items()
+            }
+            reconstruction.update({
+                "point_cloud": PointCloud(
+                    load(self.CLOUD_POINTS_FILE),
+                    load(self.CLOUD_COLORS_FILE, required=False),
+                    None,
+                    load(self.CLOUD_NORMALS_FILE, required=False),
+                ),
+                "content_hashes": content_hashes,
+            })
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not load reconstruction of job {job_id}: {e}")
+            return None
+        return reconstruction
+
+    def _prepare_output(
+        self, output_name: Optional[str], output_format: Optional[str], job_id: Optional[str]
+    ) -> Optional[tuple]:
+        """Pick the exporter and create the job directory, returning (exporter, job_id, dir, path)."""
+        exporter = self._select_exporter(output_name, output_format)
+        if exporter is None:
+            logger.error(f"Unknown output format: {output_format or output_name}")
+            return None
+
+        try:
+            job_id, artifact_dir = self.artifacts.create_job_dir(job_id)
+        except (OSError, ValueError) as e:
+            logger.error(f"Error creating artifact directory: {e}")
+            return None
 
-f 1 2 3
-f 2 4 3
-""".format(results["num_views"])
+        output_name = os.path.basename(output_name or self.DEFAULT_OUTPUT_STEM)
+        if not output_name.lower().endswith(exporter.extension):
+            output_name += exporter.extension
+        return exporter, job_id, artifact_dir, os.path.join(artifact_dir, output_name)
 
-        with open(output_path, "w") as f:
-            f.write(obj_content)
+    def _run_inference(self, views: List[Dict[str, Any]]) -> tuple:
+        """Infer through the batch scheduler when enabled, else on a pooled model."""
+        if self.scheduler is not None:
+            return self.scheduler.infer(views)
+        with self.pool.acquire() as model:
+            return self._infer(model, views)
+
+    def _reuse_cached(
+        self,
+        cached: Dict[str, Any],
+        job_id: str,
+        artifact_dir: str,
+        hashes: List[Optional[str]],
+    ) -> Dict[str, Any]:
+        """Complete a cache hit with the job's arrays, manifest and tiles."""
+        cached.update({"job_id": job_id, "artifact_dir": artifact_dir})
+        point_cloud = cached.pop("point_cloud")
+        self._save_arrays(artifact_dir, cached, point_cloud, hashes)
+        self._publish(cached["output_path"])
+        if self.tile_max_points:
+            cached["tileset"] = self._write_tiles(artifact_dir, point_cloud)
+        return cached
+
+    def _write_outputs(
+        self,
+        results: Dict[str, Any],
+        point_cloud: PointCloud,
+        exporter: Exporter,
+        hashes: List[Optional[str]],
+        cache_key: Optional[str],
+    ) -> None:
+        """Export the point cloud and save everything a later job may reuse."""
+        output_path = results["output_path"]
+        artifact_dir = results["artifact_dir"]
+        with atomic_write(output_path) as f:
+            exporter.write(f, point_cloud, None)
+        self._publish(output_path)
+        self._save_arrays(artifact_dir, results, point_cloud, hashes)
+        if self.tile_max_points:
+            results["tileset"] = self._write_tiles(artifact_dir, point_cloud)
+
+        if cache_key is not None:
+            arrays = {name: results[name] for name in self.SEGMENT_FILES}
+            arrays.update(self._cloud_arrays(point_cloud))
+            self.result_cache.put(
+                cache_key,
+                output_path,
+                arrays,
+                {
+                    "num_views": results["num_views"],
+                    "num_points": results["num_points"],
+                    "metric_scale": results["metric_scale"],
+                },
+            )
+
+    def _infer(self, model: Any, views: List[Dict[str, Any]]) -> tuple:
+        """Run a model instance on views, returning (depth_maps, camera_poses, intrinsics)."""
+        # In a real implementation:
+        # results = model.infer(views)
+
+        # Mock implementation - simulate processing
+        logger.info(f"Processing {len(views)} views for 3D reconstruction")
+        return (
+            self._generate_mock_depth_maps(views),
+            self._generate_mock_camera_poses(len(views)),
+            pinhole_intrinsics(self._view_shapes(views)),
+        )
+
+    def _infer_batch(self, groups: List[List[Dict[str, Any]]]) -> List[tuple]:
+        """
+        Run one forward pass over the views of several jobs.
+
+        Args:
+            groups: One list of views per job
+
+        Returns:
+            One (depth_maps, camera_poses, intrinsics) tuple per job, in order
+        """
+        views = [view for group in groups for view in group]
+        with self.pool.acquire() as model:
+            depth_maps, _, intrinsics = self._infer(model, views)
+
+        results = []
+        start = 0
+        for group in groups:
+            # Crop the padding added for other jobs' larger views; poses are
+            # relative to each job's own first view
+            end = start + len(group)
+            height, width = self._view_shapes(group).max(axis=0)
+            results.append(
+                (
+                    depth_maps[start:end, :height, :width],
+                    self._generate_mock_camera_poses(len(group)),
+                    intrinsics[start:end],
+                )
+            )
+            start = end
+        return results
+
+    def _build_point_cloud(
+        self,
+        views: List[Dict[str, Any]],
+        depth_maps: np.ndarray,
+        intrinsics: np.ndarray,
+        camera_poses: np.ndarray,
+        downsample: bool = True,
+    ) -> PointCloud:
+        """Back-project and optionally downsample the fused point cloud."""
+        point_cloud = backproject(
+            depth_maps,
+            intrinsics,
+            camera_poses,
+            colors=[view["img"] for view in views],
+            stride=self.point_stride,
+            normals=True,
+        )
+        if downsample and self.voxel_size:
+            point_cloud = voxel_downsample(point_cloud, self.voxel_size)
+        return point_cloud
+
+    def _write_tiles(self, artifact_dir: str, point_cloud: PointCloud) -> Optional[str]:
+        """Write the LOD tiles, returning the tileset path relative to artifact_dir."""
+        try:
+            tileset = build_tiles(
+                point_cloud,
+                os.path.join(artifact_dir, self.TILES_DIR),
+                max_points=self.tile_max_points,
+            )
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not write tiles: {e}")
+            return None
+        if tileset is None:
+            return None
+        return f"{self.TILES_DIR}/{TILESET_FILE}"
+
+    def _publish(self, output_path: str) -> None:
+        """Hash and pre-compress the output file; downloads work without it."""
+        try:
+            publish_artifact(output_path, self.precompress)
+        except OSError as e:
+            logger.warning(f"Could not publish {output_path}: {e}")
+
+    def _select_exporter(
+        self, output_name: Optional[str], output_format: Optional[str]
+    ) -> Optional[Exporter]:
+        """Pick the exporter from the explicit format, the file name or the default."""
+        if output_format:
+            return get_exporter(output_format)
+        if output_name:
+            exporter = exporter_for_path(output_name)
+            if exporter is not None:
+                return exporter
+        return get_exporter(self.output_format)
+
+    def _cache_key(
+        self, hashes: List[Optional[str]], view_shapes: np.ndarray, output_path: str
+    ) -> Optional[str]:
+        """
+        Return the result cache key for a view set, or None if caching is not possible.
+
+        Every setting that changes the cached geometry is part of the key.
+        The decoded view shapes stand in for the image processor's
+        downscaling, which the generator never sees directly.
+        """
+        if self.result_cache is None:
+            return None
+        if not all(hashes):
+            return None
+        _, ext = os.path.splitext(output_path)
+        params = {
+            "format": ext.lower(),
+            "layout": self.CACHE_LAYOUT,
+            "view_shapes": np.asarray(view_shapes).tolist(),
+            "point_stride": self.point_stride,
+            "voxel_size": self.voxel_size,
+        }
+        return ResultCache.make_key(hashes, self.model_id, params)
+
+    def _load_cached(self, cache_key: str, output_path: str) -> Optional[Dict[str, Any]]:
+        """Materialize a cached result at output_path, or return None on a miss."""
+        cached = self.result_cache.get(cache_key)
+        if cached is None:
+            return None
+
+        try:
+            with open(cached["artifact_path"], "rb") as src, atomic_write(output_path) as dst:
+                shutil.copyfileobj(src, dst)
+        except OSError as e:
+            logger.warning(f"Could not reuse cached result {cache_key}: {e}")
+            return None
+
+        logger.info(f"Reusing cached reconstruction {cache_key}")
+        arrays = cached["arrays"]
+        return {
+            "status": "success",
+            "num_views": cached["metadata"]["num_views"],
+            "output_path": output_path,
+            "depth_maps": arrays["depth_maps"],
+            "camera_poses": arrays["camera_poses"],
+            "view_shapes": arrays["view_shapes"],
+            "intrinsics": arrays["intrinsics"],
+            "num_points": cached["metadata"]["num_points"],
+            "metric_scale": cached["metadata"]["metric_scale"],
+            "cached": True,
+            "point_cloud": PointCloud(
+                arrays["cloud_points"], arrays.get("cloud_colors"), None, arrays.get("cloud_normals")
+            ),
+        }
+
+    def _save_arrays(
+        self,
+        artifact_dir: str,
+        results: Dict[str, Any],
+        point_cloud: PointCloud,
+        hashes: List[Optional[str]],
+    ) -> None:
+        """
+        Write the per-view arrays, fused point cloud and view hashes next to the model.
+
+        Each per-view array in ``results`` is one array or a list with one
+        array per segment. Segments memory-mapped from another job or the
+        result cache are hard-linked by save_array rather than copied.
+        """
+        segments = {
+            file: results[name] if isinstance(results[name], list) else [results[name]]
+            for name, file in self.SEGMENT_FILES.items()
+        }
+        for index in range(len(segments[self.DEPTH_MAPS_FILE])):
+            segment_dir = os.path.join(artifact_dir, self.SEGMENTS_DIR, f"{index:05d}")
+            os.makedirs(segment_dir, exist_ok=True)
+            for file, arrays in segments.items():
+                save_array(os.path.join(segment_dir, file), arrays[index])
+        for name, array in self._cloud_arrays(point_cloud).items():
+            save_array(os.path.join(artifact_dir, f"{name}.npy"), array)
+        with atomic_write(os.path.join(artifact_dir, self.VIEWS_FILE), "w") as f:
+            json.dump({"content_hashes": hashes}, f)
+
+    @staticmethod
+    def _cloud_arrays(point_cloud: PointCloud) -> Dict[str, np.ndarray]:
+        """Named arrays of a point cloud, skipping missing attributes."""
+        arrays = {"cloud_points": point_cloud.points}
+        if point_cloud.colors is not None:
+            arrays["cloud_colors"] = point_cloud.colors
+        if point_cloud.normals is not None:
+            arrays["cloud_normals"] = point_cloud.normals
+        return arrays
+
+    def _segment_dirs(self, artifact_dir: str) -> List[str]:
+        """Directories of a job's per-view array segments, in view order."""
+        segments_dir = os.path.join(artifact_dir, self.SEGMENTS_DIR)
+        if not os.path.isdir(segments_dir):
+            # Saved before arrays were split into segments
+            return [artifact_dir]
+        return [os.path.join(segments_dir, name) for name in sorted(os.listdir(segments_dir))]
+
+    @staticmethod
+    def _view_shapes(views: List[Dict[str, Any]]) -> np.ndarray:
+        """Return the (N, 2) array of view (height, width) pairs."""
+        return np.array([view["img"].shape[:2] for view in views], dtype=np.int32).reshape(-1, 2)
+
+    def _generate_mock_depth_maps(self, views: List[Dict[str, Any]]) -> np.ndarray:
+        """Generate mock depth maps for testing as one zero-padded (N, H, W) array."""
+        shapes = self._view_shapes(views)
+        height, width = shapes.max(axis=0)
+        depth_maps = np.zeros((len(views), height, width), dtype=np.float32)
+        # One gradient per distinct shape, broadcast into every view sharing it
+        for shape in np.unique(shapes, axis=0):
+            h, w = (int(x) for x in shape)
+            gradient = np.arange(h * w, dtype=np.float32).reshape(h, w)
+            gradient /= max(h * w - 1, 1)
+            mask = (shapes == shape).all(axis=1)
+            depth_maps[mask, :h, :w] = gradient
+        return depth_maps
+
+    def _register_poses(self, parent_poses: np.ndarray, camera_poses: np.ndarray) -> np.ndarray:
+        """Express poses relative to their own first view in the parent's frame."""
+        # In a real implementation the new views would be registered against
+        # the parent's reconstruction; the mock continues its trajectory
+        anchor = self._generate_mock_camera_poses(len(parent_poses) + 1)[-1]
+        return anchor @ camera_poses
+
+    def _generate_mock_camera_poses(self, num_views: int) -> np.ndarray:
+        """Generate mock camera poses for testing as one (N, 4, 4) array."""
+        # Identity rotations with a small x-axis translation per view
+        poses = np.tile(np.eye(4), (num_views, 1, 1))
+        poses[:, 0, 3] = np.arange(num_views) * 0.1
+        return poses
 
     def is_ready(self) -> bool:
-        """Check if the model generator is ready to process images."""
-        return self.model_loaded or self.load_model()
+        """
+        Check if the model generator is ready to process images.
+
+        This never triggers a load, so it is cheap enough for health probes.
+        """
+        return self.model_loaded
+
+
+def _report(on_stage: Optional[StageCallback], stage: str, **details: Any) -> None:
+    if on_stage is not None:
+        on_stage(stage, **details)
@@ -0,0 +1,161 @@
+"""
+Lifecycle management for a pool of loaded model instances.
+"""
+
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ModelPoolError(RuntimeError):
+    """Raised when a model instance cannot be provided."""
+
+
+class ModelPool:
+    """
+    Loads a fixed number of model instances and lends them out for inference.
+
+    Loading can happen synchronously or on a background thread at startup,
+    so the first request does not pay for it, and the pool reports its
+    state and how long the cold start took for readiness checks.
+    """
+
+    NOT_LOADED = "not_loaded"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self, loader: Callable[[], Any], size: int = 1):
+        """
+        Initialize the ModelPool.
+
+        Args:
+            loader: Callable returning one loaded model instance
+            size: Number of instances, i.e. concurrent inferences
+        """
+        self.loader = loader
+        self.size = max(1, size)
+        self.state = self.NOT_LOADED
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._instances: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether all instances are loaded."""
+        return self.state == self.READY
+
+    def load(self) -> bool:
+        """
+        Load every instance, unless the pool is already loaded or loading.
+
+        Returns:
+            True if the pool is ready
+        """
+        with self._lock:
+            if self.state in (self.READY, self.LOADING):
+                loading = self.state == self.LOADING
+            else:
+                loading = None
+                self.state = self.LOADING
+                self.error = None
+                self._loaded.clear()
+        if loading is not None:
+            if loading:
+                self._loaded.wait()
+            return self.is_ready
+
+        start = time.perf_counter()
+        try:
+            instances = [self.loader() for _ in range(self.size)]
+        except Exception as e:
+            logger.error(f"Error loading model: {e}")
+            with self._lock:
+                self.state = self.FAILED
+                self.error = str(e)
+            self._loaded.set()
+            return False
+
+        for instance in instances:
+            self._instances.put(instance)
+        with self._lock:
+            self.load_seconds = time.perf_counter() - start
+            self.state = self.READY
+        self._loaded.set()
+        logger.info(f"Loaded {self.size} model instance(s) in {self.load_seconds:.2f}s")
+        return True
+
+    def start(self, background: bool = False) -> Optional[threading.Thread]:
+        """
+        Begin loading the pool.
+
+        Args:
+            background: Load on a daemon thread instead of blocking
+
+        Returns:
+            The loading thread when loading in the background
+        """
+        if not background:
+            self.load()
+            return None
+        thread = threading.Thread(target=self.load, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for a load in progress to finish.
+
+        Args:
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            True if the pool is ready
+        """
+        if self.state == self.NOT_LOADED:
+            return False
+        self._loaded.wait(timeout)
+        return self.is_ready
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        Borrow a model instance, blocking until one is free.
+
+        Args:
+            timeout: Maximum number of seconds to wait for an instance
+
+        Yields:
+            A loaded model instance
+
+        Raises:
+            ModelPoolError: If the pool is not ready or no instance frees up
+        """
+        if not self.is_ready:
+            raise ModelPoolError(f"Model pool is {self.state}")
+        try:
+            instance = self._instances.get(timeout=timeout)
+        except queue.Empty:
+            raise ModelPoolError("Timed out waiting for a model instance")
+        try:
+            yield instance
+        finally:
+            self._instances.put(instance)
+
+    def status(self) -> Dict[str, Any]:
+        """Snapshot of the pool state for readiness reporting."""
+        with self._lock:
+            return {
+                "state": self.state,
+                "size": self.size,
+                "available": self._instances.qsize(),
+                "load_seconds": self.load_seconds,
+                "error": self.error,
+            }
@@ -0,0 +1,230 @@
+"""
+Reconstruction pipeline tying image preprocessing to model generation.
+"""
+
+import os
+import logging
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Dict, Any, Optional
+from .image_processor import ImageProcessor
+from .model_generator import ModelGenerator
+from .job_manager import Job
+from .memory_budget import MemoryBudget, MemoryBudgetExceeded
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineError(Exception):
+    """Raised when a reconstruction cannot be completed."""
+
+
+class ReconstructionPipeline:
+    """Runs the preprocessing and generation stages for a single job."""
+
+    # Overall progress reported when each stage starts
+    STAGE_PROGRESS = {"decode": 0.1, "inference": 0.4, "fusion": 0.7, "export": 0.85}
+
+    def __init__(
+        self,
+        image_processor: ImageProcessor,
+        model_generator: ModelGenerator,
+        memory_budget: Optional[MemoryBudget] = None,
+        memory_wait_seconds: Optional[float] = None,
+    ):
+        """
+        Initialize the ReconstructionPipeline.
+
+        Args:
+            image_processor: Processor used to load and validate images
+            model_generator: Generator used to build the 3D model
+            memory_budget: Optional budget each run reserves its estimated
+                memory from before decoding
+            memory_wait_seconds: Longest time a run waits for its
+                reservation; None waits indefinitely
+        """
+        self.image_processor = image_processor
+        self.model_generator = model_generator
+        self.memory_budget = memory_budget
+        self.memory_wait_seconds = memory_wait_seconds
+
+    def estimate_memory(self, file_paths: List[str], parent_job_id: Optional[str] = None) -> int:
+        """
+        Estimate a run's peak memory from the image headers, without decoding.
+
+        Args:
+            file_paths: Paths of the uploaded images
+            parent_job_id: Job being extended, if any
+
+        Returns:
+            Estimated bytes for decoding and reconstruction
+        """
+        decode_bytes, view_shapes = self.image_processor.estimate_memory(file_paths)
+        return decode_bytes + self.model_generator.estimate_memory(view_shapes, parent_job_id)
+
+    def run(
+        self,
+        job: Job,
+        file_paths: List[str],
+        filenames: Optional[List[str]] = None,
+        output_format: Optional[str] = None,
+        memory_bytes: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Reconstruct a 3D model from saved image files.
+
+        The references held on the uploaded files are released when the run
+        ends, whether or not it succeeds. With a memory budget, the run
+        waits until its estimated memory can be reserved before decoding.
+
+        Args:
+            job: Job used to report progress
+            file_paths: Paths of the uploaded images
+            filenames: Optional original filenames, used when reporting
+                rejected images
+            output_format: Optional exporter name for the model file
+            memory_bytes: Estimated memory of the run, if already computed
+                with estimate_memory
+
+        Returns:
+            Summary of the generated model
+
+        Raises:
+            PipelineError: If no image could be processed, generation fails
+                or the run's memory cannot be reserved
+        """
+        if memory_bytes is None:
+            memory_bytes = self.estimate_memory(file_paths)
+
+        def generate(views: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+            return self.model_generator.generate_3d_model(
+                views, job_id=job.id, output_format=output_format, on_stage=self._reporter(job)
+            )
+
+        try:
+            with self._reserve(job, memory_bytes):
+                return self._run(job, file_paths, filenames or [], generate)
+        finally:
+            self.image_processor.release_uploads(file_paths)
+
+    def extend(
+        self,
+        job: Job,
+        parent_job_id: str,
+        file_paths: List[str],
+        filenames: Optional[List[str]] = None,
+        output_format: Optional[str] = None,
+        memory_bytes: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Add images to the reconstruction of a finished job.
+
+        Only the new images are preprocessed; the parent's depth maps,
+        poses and point cloud are reused from its artifacts. The result is
+        a new job with the combined reconstruction.
+
+        Args:
+            job: Job used to report progress
+            parent_job_id: Job whose reconstruction is extended
+            file_paths: Paths of the uploaded images to add
+            filenames: Optional original filenames, used when reporting
+                rejected images
+            output_format: Optional exporter name for the model file
+            memory_bytes: Estimated memory of the run, if already computed
+                with estimate_memory
+
+        Returns:
+            Summary of the generated model
+
+        Raises:
+            PipelineError: If no image could be processed, generation fails
+                or the run's memory cannot be reserved
+        """
+        if memory_bytes is None:
+            memory_bytes = self.estimate_memory(file_paths, parent_job_id)
+
+        def generate(views: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+            return self.model_generator.extend_3d_model(
+                parent_job_id,
+                views,
+                job_id=job.id,
+                output_format=output_format,
+                on_stage=self._reporter(job),
+            )
+
+        try:
+            with self._reserve(job, memory_bytes):
+                return self._run(job, file_paths, filenames or [], generate)
+        finally:
+            self.image_processor.release_uploads(file_paths)
+
+    @contextmanager
+    def _reserve(self, job: Job, memory_bytes: int) -> Iterator[None]:
+        """Hold the run's share of the memory budget, waiting for it if needed."""
+        budget = self.memory_budget
+        if budget is None:
+            yield
+            return
+        if not budget.try_acquire(memory_bytes):
+            job.update(stage="memory_wait", memory_bytes=memory_bytes)
+            try:
+                granted = budget.acquire(memory_bytes, self.memory_wait_seconds)
+            except MemoryBudgetExceeded as e:
+                raise PipelineError(str(e)) from e
+            if not granted:
+                raise PipelineError(
+                    f"Timed out waiting for {memory_bytes} bytes of the memory budget"
+                )
+        try:
+            yield
+        finally:
+            budget.release(memory_bytes)
+
+    def _reporter(self, job: Job) -> Callable[..., None]:
+        """Stage callback reporting generation stages as job progress."""
+
+        def report(stage: str, **details: Any) -> None:
+            job.update(stage=stage, progress=self.STAGE_PROGRESS.get(stage), **details)
+
+        return report
+
+    def _run(
+        self,
+        job: Job,
+        file_paths: List[str],
+        filenames: List[str],
+        generate: Callable[[List[Dict[str, Any]]], Optional[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        job.update(stage="decode", progress=self.STAGE_PROGRESS["decode"], images=len(file_paths))
+        views, rejected = self.image_processor.preprocess_images_with_report(file_paths)
+        if not views:
+            reasons = ", ".join(sorted({r["reason"] for r in rejected}))
+            raise PipelineError(f"Failed to process images ({reasons})")
+
+        results = generate(views)
+        if results is None:
+            raise PipelineError("Failed to generate 3D model")
+
+        names = dict(zip(file_paths, filenames))
+        output_file = os.path.basename(results["output_path"])
+        return {
+            "status": "success",
+            "num_images": len(file_paths),
+            "num_views_processed": results["num_views"],
+            "parent_job_id": results.get("parent_job_id"),
+            "cached": results.get("cached", False),
+            "output_file": output_file,
+            "job_id": results["job_id"],
+            "download_url": f"/api/download/{results['job_id']}/{output_file}",
+            "tileset_url": (
+                f"/api/tiles/{results['job_id']}/{os.path.basename(results['tileset'])}"
+                if results.get("tileset")
+                else None
+            ),
+            "rejected": [
+                {
+                    "file": names.get(r["file_path"], os.path.basename(r["file_path"])),
+                    "reason": r["reason"],
+                }
+                for r in rejected
+            ],
+        }
@@ -0,0 +1,343 @@
+"""
+Back-projection of depth maps into a fused, colored world-space point cloud.
+"""
+
+import logging
+from typing import NamedTuple, Optional, Sequence, Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ImageBatch = Union[np.ndarray, Sequence[np.ndarray]]
+
+# Largest voxel grid downsampled through a dense lookup table (~384 MB)
+_DENSE_VOXEL_LIMIT = 1 << 25
+# Dense tables cost 12 bytes per voxel slot, so they are only used while
+# the grid has at most this many slots per point
+_DENSE_SLOTS_PER_POINT = 8
+
+
+class PointCloud(NamedTuple):
+    """Points fused from every view, with optional per-point attributes."""
+
+    points: np.ndarray  # (M, 3) float32 world coordinates
+    colors: Optional[np.ndarray] = None  # (M, 3) uint8 RGB
+    view_index: Optional[np.ndarray] = None  # (M,) source view of each point
+    normals: Optional[np.ndarray] = None  # (M, 3) float32 unit normals
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+
+def pinhole_intrinsics(view_shapes: np.ndarray, fov_degrees: float = 60.0) -> np.ndarray:
+    """
+    Build pinhole intrinsics with the principal point at the image center.
+
+    Args:
+        view_shapes: (N, 2) array of (height, width) per view
+        fov_degrees: Horizontal field of view of the longer image side
+
+    Returns:
+        (N, 3, 3) float32 intrinsics matrices
+    """
+    shapes = np.asarray(view_shapes, dtype=np.float32).reshape(-1, 2)
+    focal = shapes.max(axis=1) / (2.0 * np.tan(np.radians(fov_degrees) / 2.0))
+    intrinsics = np.zeros((len(shapes), 3, 3), dtype=np.float32)
+    intrinsics[:, 0, 0] = focal
+    intrinsics[:, 1, 1] = focal
+    intrinsics[:, 0, 2] = shapes[:, 1] / 2.0
+    intrinsics[:, 1, 2] = shapes[:, 0] / 2.0
+    intrinsics[:, 2, 2] = 1.0
+    return intrinsics
+
+
+def backproject(
+    depth_maps: np.ndarray,
+    intrinsics: np.ndarray,
+    camera_poses: np.ndarray,
+    colors: Optional[ImageBatch] = None,
+    stride: int = 1,
+    min_depth: float = 0.0,
+    max_depth: Optional[float] = None,
+    valid_mask: Optional[np.ndarray] = None,
+    normals: bool = False,
+) -> PointCloud:
+    """
+    Lift the depth maps of all views into one world-space point cloud.
+
+    Every view is processed in the same vectorized pass: pixel coordinates
+    are turned into camera-space points with the pinhole model, transformed
+    by the camera-to-world poses and fused. Pixels with non-finite depth,
+    depth outside ``(min_depth, max_depth]`` or a false ``valid_mask`` entry
+    are dropped, so the zero padding of batched depth maps is skipped too.
+
+    Args:
+        depth_maps: (N, H, W) depth along the optical axis
+        intrinsics: (N, 3, 3) pinhole intrinsics
+        camera_poses: (N, 4, 4) camera-to-world transforms
+        colors: (N, H, W, 3) images, or a sequence of (h, w, 3) images no
+            larger than the depth maps
+        stride: Keep every stride-th pixel along both axes
+        min_depth: Depths at or below this are invalid
+        max_depth: Depths above this are invalid; None has no upper bound
+        valid_mask: Optional (N, H, W) boolean mask of usable pixels
+        normals: Also estimate world-space normals from the depth gradients,
+            oriented towards the camera
+
+    Returns:
+        PointCloud with float32 points, uint8 colors and source view indices
+    """
+    depth_maps = np.asarray(depth_maps)
+    if depth_maps.ndim != 3:
+        raise ValueError(f"Expected (N, H, W) depth maps, got shape {depth_maps.shape}")
+    num_views = len(depth_maps)
+    if len(intrinsics) != num_views or len(camera_poses) != num_views:
+        raise ValueError("depth_maps, intrinsics and camera_poses must have one entry per view")
+    stride = max(1, int(stride))
+
+    depth = depth_maps[:, ::stride, ::stride].astype(np.float32, copy=False)
+    mask = np.isfinite(depth) & (depth > min_depth)
+    if max_depth is not None:
+        mask &= depth <= max_depth
+    if valid_mask is not None:
+        mask &= np.asarray(valid_mask, dtype=bool)[:, ::stride, ::stride]
+
+    # Per-view normalized ray coordinates broadcast over the pixel grid, so
+    # no per-pixel intrinsics or rotations are ever materialized
+    num_views, height, width = depth.shape
+    k = np.asarray(intrinsics, dtype=np.float32)
+    u = np.arange(width, dtype=np.float32) * stride
+    v = np.arange(height, dtype=np.float32) * stride
+    xn = (u[None, None, :] - k[:, 0, 2, None, None]) / k[:, 0, 0, None, None]
+    yn = (v[None, :, None] - k[:, 1, 2, None, None]) / k[:, 1, 1, None, None]
+
+    poses = np.asarray(camera_poses, dtype=np.float32)
+    z = depth[mask]
+    counts = mask.sum(axis=(1, 2))
+    view_index = np.repeat(np.arange(num_views, dtype=np.int32), counts)
+    points = np.empty((len(z), 3), dtype=np.float32)
+    for axis in range(3):
+        # World = R @ (z * ray) + t, one output coordinate at a time
+        r = poses[:, axis, :3, None, None]
+        ray = r[:, 0] * xn + r[:, 1] * yn + r[:, 2]
+        points[:, axis] = ray[mask] * z
+        points[:, axis] += np.repeat(poses[:, axis, 3], counts)
+
+    point_colors = None
+    if colors is not None:
+        point_colors = _to_uint8(_gather_colors(colors, stride, mask.shape)[mask])
+
+    point_normals = None
+    if normals:
+        point_normals = _estimate_normals(depth, mask, xn, yn, k, stride, poses, counts)
+
+    return PointCloud(points, point_colors, view_index, point_normals)
+
+
+def voxel_downsample(
+    cloud: PointCloud, voxel_size: float, chunk_size: int = 10_000_000
+) -> PointCloud:
+    """
+    Merge all points falling into the same voxel of a regular grid.
+
+    Each occupied voxel becomes one point at the mean position of its
+    points, with their mean color and renormalized mean normal. Points are
+    keyed by their packed integer voxel coordinates and summed per voxel
+    with ``np.bincount``, one chunk of points at a time. A grid is indexed
+    through a dense lookup table when it has at most ``_DENSE_VOXEL_LIMIT``
+    voxels and at most ``_DENSE_SLOTS_PER_POINT`` voxels per input point;
+    other grids are grouped with a sort-based ``np.unique`` per chunk and
+    the partial sums merged at the end. Either way peak memory grows with
+    ``chunk_size`` and the grid or occupied voxel count rather than with
+    the number of input points.
+
+    Args:
+        cloud: Point cloud to downsample
+        voxel_size: Edge length of a voxel in world units
+        chunk_size: Number of points grouped at a time
+
+    Returns:
+        Downsampled PointCloud without view indices
+
+    Raises:
+        ValueError: If voxel_size is not positive or the grid is too fine
+            for the extent of the cloud
+    """
+    if voxel_size <= 0:
+        raise ValueError(f"voxel_size must be positive, got {voxel_size}")
+    if len(cloud) == 0:
+        return PointCloud(cloud.points, cloud.colors, None, cloud.normals)
+
+    origin = np.floor(cloud.points.min(axis=0) / voxel_size)
+    extent = np.floor(cloud.points.max(axis=0) / voxel_size) - origin + 1
+    if np.prod(extent.astype(np.float64)) >= 2**63:
+        raise ValueError(f"voxel_size {voxel_size} is too small for the cloud extent")
+    dims = extent.astype(np.int64)
+
+    attributes = [cloud.points]
+    if cloud.colors is not None:
+        attributes.append(cloud.colors)
+    if cloud.normals is not None:
+        attributes.append(cloud.normals)
+
+    chunks = [
+        (start, min(start + max(1, chunk_size), len(cloud)))
+        for start in range(0, len(cloud), max(1, chunk_size))
+    ]
+
+    def chunk_keys(start: int, stop: int) -> np.ndarray:
+        grid = np.floor(cloud.points[start:stop] / voxel_size) - origin
+        return _pack_voxel_keys(grid.astype(np.int64), dims)
+
+    num_slots = int(np.prod(dims))
+    if num_slots <= min(_DENSE_VOXEL_LIMIT, _DENSE_SLOTS_PER_POINT * len(cloud)):
+        # Grids small relative to the cloud: count into a dense table, then map occupied voxels
+        # to compact ids with a lookup table; no sorting needed
+        occupancy = np.zeros(num_slots, dtype=np.int64)
+        for start, stop in chunks:
+            occupancy += np.bincount(chunk_keys(start, stop), minlength=num_slots)
+        occupied = np.flatnonzero(occupancy)
+        total_counts = occupancy[occupied]
+        del occupancy
+        compact = np.zeros(num_slots, dtype=np.int32)
+        compact[occupied] = np.arange(len(occupied), dtype=np.int32)
+        totals = None
+        for start, stop in chunks:
+            inverse = compact[chunk_keys(start, stop)]
+            sums = _group_sums(inverse, len(occupied), [a[start:stop] for a in attributes])
+            totals = sums if totals is None else [t + s for t, s in zip(totals, sums)]
+    else:
+        # Large or sparsely occupied grids: group each chunk by sorting its keys, then merge
+        # voxels split across chunks by grouping the partial sums
+        keys, sums, counts = [], [], []
+        for start, stop in chunks:
+            unique_keys, inverse, unique_counts = np.unique(
+                chunk_keys(start, stop), return_inverse=True, return_counts=True
+            )
+            keys.append(unique_keys)
+            counts.append(unique_counts)
+            sums.append(
+                _group_sums(inverse, len(unique_keys), [a[start:stop] for a in attributes])
+            )
+        merged_keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+        total_counts = np.bincount(
+            inverse, weights=np.concatenate(counts), minlength=len(merged_keys)
+        )
+        partial = [np.concatenate([s[i] for s in sums]) for i in range(len(attributes))]
+        totals = _group_sums(inverse, len(merged_keys), partial)
+
+    means = [total / total_counts[:, None] for total in totals]
+    points = means.pop(0).astype(np.float32)
+    colors = None
+    if cloud.colors is not None:
+        colors = np.clip(np.rint(means.pop(0)), 0, 255).astype(np.uint8)
+    normals = None
+    if cloud.normals is not None:
+        normals = _normalize(means.pop(0).astype(np.float32))
+    return PointCloud(points, colors, None, normals)
+
+
+def merge_point_clouds(clouds: Sequence[PointCloud]) -> PointCloud:
+    """
+    Concatenate point clouds into one.
+
+    Colors and normals are kept only when every cloud has them, and
+    per-point view indices are dropped.
+
+    Args:
+        clouds: Point clouds to merge
+
+    Returns:
+        The merged point cloud
+    """
+
+    def concatenate(field: str) -> Optional[np.ndarray]:
+        arrays = [getattr(cloud, field) for cloud in clouds]
+        if any(array is None for array in arrays):
+            return None
+        return np.concatenate(arrays)
+
+    return PointCloud(concatenate("points"), concatenate("colors"), None, concatenate("normals"))
+
+
+def _pack_voxel_keys(grid: np.ndarray, dims: np.ndarray) -> np.ndarray:
+    """Flatten non-negative (M, 3) voxel coordinates into one int64 key each."""
+    return (grid[:, 0] * dims[1] + grid[:, 1]) * dims[2] + grid[:, 2]
+
+
+def _group_sums(inverse: np.ndarray, num_groups: int, attributes: list) -> list:
+    """Sum every column of each (M, C) attribute per group with bincount."""
+    return [
+        np.stack(
+            [
+                np.bincount(inverse, weights=values[:, c], minlength=num_groups)
+                for c in range(values.shape[1])
+            ],
+            axis=1,
+        )
+        for values in attributes
+    ]
+
+
+def _gradient(values: np.ndarray, axis: int) -> np.ndarray:
+    if values.shape[axis] < 2:
+        return np.zeros_like(values)
+    return np.gradient(values, axis=axis)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def _estimate_normals(
+    depth: np.ndarray,
+    mask: np.ndarray,
+    xn: np.ndarray,
+    yn: np.ndarray,
+    k: np.ndarray,
+    stride: int,
+    poses: np.ndarray,
+    counts: np.ndarray,
+) -> np.ndarray:
+    """Normals of the depth surfaces at the masked pixels, in world space."""
+    # P = z * (xn, yn, 1); its derivatives along the pixel grid follow
+    # from the depth gradients and the constant ray spacing of each view
+    z = depth[mask]
+    zv = _gradient(depth, axis=1)[mask]
+    zu = _gradient(depth, axis=2)[mask]
+    x = np.broadcast_to(xn, depth.shape)[mask]
+    y = np.broadcast_to(yn, depth.shape)[mask]
+    step_x = np.repeat(stride / k[:, 0, 0], counts)
+    step_y = np.repeat(stride / k[:, 1, 1], counts)
+
+    pu = np.stack([zu * x + z * step_x, zu * y, zu], axis=1)
+    pv = np.stack([zv * x, zv * y + z * step_y, zv], axis=1)
+    camera = np.cross(pv, pu)
+
+    world = np.zeros_like(camera)
+    for i in range(3):
+        for j in range(3):
+            world[:, i] += np.repeat(poses[:, i, j], counts) * camera[:, j]
+    return _normalize(world)
+
+
+def _gather_colors(colors: ImageBatch, stride: int, shape: tuple) -> np.ndarray:
+    """Return subsampled colors as one (N, h, w, 3) array matching the mask."""
+    if isinstance(colors, np.ndarray) and colors.ndim == 4:
+        sampled = colors[:, ::stride, ::stride, :3]
+    else:
+        # Views of different sizes are packed into one zero-padded array
+        sampled = np.zeros(shape + (3,), dtype=np.uint8)
+        for i, image in enumerate(colors):
+            image = np.asarray(image)[::stride, ::stride]
+            if image.ndim == 2:
+                image = image[:, :, None]
+            sampled[i, : image.shape[0], : image.shape[1]] = _to_uint8(image[:, :, :3])
+    return sampled
+
+
+def _to_uint8(image: np.ndarray) -> np.ndarray:
+    if image.dtype == np.uint8:
+        return image
+    return np.clip(image, 0, 255).astype(np.uint8)
@@ -0,0 +1,251 @@
+"""
+On-disk cache of reconstruction results keyed by the input view set.
+"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Union
+import numpy as np
+from .artifacts import save_array
+
+logger = logging.getLogger(__name__)
+
+ArrayOrList = Union[np.ndarray, List[np.ndarray]]
+
+
+class ResultCache:
+    """
+    Caches generated artifacts and arrays so repeat reconstructions are free.
+
+    Each entry is a directory ``<cache_dir>/<key>/`` holding the artifact,
+    one ``.npy`` file per array and a ``meta.json`` written last. Entries are
+    built in a private temporary directory and published with a single
+    ``os.rename``, so several worker processes sharing the directory never
+    observe a half-written entry; when two workers publish the same key the
+    first one wins and the other discards its copy. All bookkeeping lives on
+    disk, so every process sees the same TTL and size eviction.
+    """
+
+    META_FILE = "meta.json"
+    _TEMP_PREFIX = ".tmp-"
+
+    def __init__(
+        self,
+        cache_dir: str,
+        ttl_seconds: Optional[float] = 3600,
+        max_bytes: Optional[int] = None,
+    ):
+        """
+        Initialize the ResultCache.
+
+        Args:
+            cache_dir: Directory holding cache entries
+            ttl_seconds: Age after which an entry is discarded; None never expires
+            max_bytes: Total size budget for all entries; None is unbounded
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        # Size of the cache as last scanned, so stats never walk the entries
+        entries = self._entries()
+        self._num_entries = len(entries)
+        self._total_bytes = sum(size for _, _, size in entries)
+
+    @staticmethod
+    def make_key(view_hashes: Sequence[str], model_id: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Build a cache key for a reconstruction.
+
+        Args:
+            view_hashes: Content hashes of the input views, in order
+            model_id: Identifier of the model producing the result
+            params: Generation parameters that change the output
+
+        Returns:
+            Hex digest identifying the reconstruction
+        """
+        payload = json.dumps(
+            {"views": list(view_hashes), "model": model_id, "params": params or {}},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result.
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            Dictionary with "artifact_path", "arrays" (read-only memory
+            maps) and "metadata", or None on a miss
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        try:
+            with open(os.path.join(entry_dir, self.META_FILE)) as f:
+                meta = json.load(f)
+            if self._expired(meta):
+                size = self._entry_size(entry_dir)
+                if self._remove(entry_dir):
+                    with self._lock:
+                        self._num_entries = max(0, self._num_entries - 1)
+                        self._total_bytes = max(0, self._total_bytes - size)
+                raise FileNotFoundError(entry_dir)
+            arrays = {
+                name: self._load_array(entry_dir, name, spec)
+                for name, spec in meta["arrays"].items()
+            }
+        except (OSError, ValueError, KeyError):
+            self._count("misses")
+            return None
+
+        self._count("hits")
+        return {
+            "artifact_path": os.path.join(entry_dir, meta["artifact"]),
+            "arrays": arrays,
+            "metadata": meta["metadata"],
+        }
+
+    def put(
+        self,
+        key: str,
+        artifact_path: str,
+        arrays: Dict[str, ArrayOrList],
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Store a result. Failures are logged and otherwise ignored.
+
+        Args:
+            key: Key from make_key
+            artifact_path: Path of the generated artifact to copy in
+            arrays: Named arrays, or lists of arrays, to store alongside it
+            metadata: JSON-serializable details returned on a hit
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        if os.path.exists(entry_dir):
+            return
+
+        temp_dir = os.path.join(self.cache_dir, f"{self._TEMP_PREFIX}{uuid.uuid4().hex}")
+        try:
+            os.makedirs(temp_dir)
+            artifact = os.path.basename(artifact_path)
+            shutil.copyfile(artifact_path, os.path.join(temp_dir, artifact))
+            specs = {name: self._save_array(temp_dir, name, value) for name, value in arrays.items()}
+            meta = {
+                "created_at": time.time(),
+                "artifact": artifact,
+                "arrays": specs,
+                "metadata": metadata or {},
+            }
+            with open(os.path.join(temp_dir, self.META_FILE), "w") as f:
+                json.dump(meta, f)
+            os.rename(temp_dir, entry_dir)
+        except OSError as e:
+            # Includes losing the race to another worker publishing the key
+            if not os.path.exists(entry_dir):
+                logger.warning(f"Could not cache result {key}: {e}")
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return
+
+        self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters for this process and the size of the cache.
+
+        The size is kept in memory and rescanned from disk whenever this
+        process stores an entry, so reading it costs nothing; entries other
+        processes add show up after this process next stores one.
+        """
+        with self._lock:
+            return {
+                **self._counters,
+                "entries": self._num_entries,
+                "bytes": self._total_bytes,
+            }
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _expired(self, meta: Dict[str, Any]) -> bool:
+        if self.ttl_seconds is None:
+            return False
+        return time.time() - meta["created_at"] > self.ttl_seconds
+
+    def _entries(self) -> List[tuple]:
+        """Return (created_at, path, size) for every published entry."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(self._TEMP_PREFIX):
+                continue
+            entry_dir = os.path.join(self.cache_dir, name)
+            try:
+                with open(os.path.join(entry_dir, self.META_FILE)) as f:
+                    created_at = json.load(f)["created_at"]
+                size = self._entry_size(entry_dir)
+            except (OSError, ValueError, KeyError):
+                continue
+            entries.append((created_at, entry_dir, size))
+        return entries
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        count = len(entries)
+        total = sum(size for _, _, size in entries)
+        for created_at, entry_dir, size in entries:
+            expired = self._expired({"created_at": created_at})
+            over_budget = self.max_bytes is not None and total > self.max_bytes
+            if not expired and not over_budget:
+                continue
+            self._remove(entry_dir)
+            count -= 1
+            total -= size
+            self._count("evictions")
+        with self._lock:
+            self._num_entries = count
+            self._total_bytes = total
+
+    def _remove(self, entry_dir: str) -> bool:
+        # Rename first so concurrent readers see either the whole entry or none
+        trash = os.path.join(self.cache_dir, f"{self._TEMP_PREFIX}{uuid.uuid4().hex}")
+        try:
+            os.rename(entry_dir, trash)
+        except OSError:
+            return False
+        shutil.rmtree(trash, ignore_errors=True)
+        return True
+
+    @staticmethod
+    def _entry_size(entry_dir: str) -> int:
+        return sum(e.stat().st_size for e in os.scandir(entry_dir))
+
+    @staticmethod
+    def _save_array(directory: str, name: str, value: ArrayOrList) -> Dict[str, Any]:
+        # Arrays mapped from job or cache files are linked rather than copied
+        if isinstance(value, np.ndarray):
+            save_array(os.path.join(directory, f"{name}.npy"), value)
+            return {"kind": "array"}
+        for i, item in enumerate(value):
+            save_array(os.path.join(directory, f"{name}_{i:05d}.npy"), item)
+        return {"kind": "list", "count": len(value)}
+
+    @staticmethod
+    def _load_array(directory: str, name: str, spec: Dict[str, Any]) -> ArrayOrList:
+        if spec["kind"] == "array":
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+        return [
+            np.load(os.path.join(directory, f"{name}_{i:05d}.npy"), mmap_mode="r")
+            for i in range(spec["count"])
+        ]
@@ -0,0 +1,132 @@
+"""
+Configuration defaults and construction of the reconstruction services.
+
+The web application and standalone workers build their image processor,
+caches, model generator and pipeline from the same configuration here.
+"""
+
+import os
+import logging
+from typing import Any, Dict, NamedTuple, Optional
+from .image_processor import ImageProcessor
+from .model_generator import ModelGenerator
+from .pipeline import ReconstructionPipeline
+from .view_cache import ViewCache
+from .result_cache import ResultCache
+from .memory_budget import MemoryBudget, default_memory_budget
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "UPLOAD_FOLDER": "uploads",
+    "OUTPUT_FOLDER": "outputs",
+    "MAX_CONTENT_LENGTH": 50 * 1024 * 1024,  # 50MB max request size
+    "MAX_IMAGE_SIZE": ImageProcessor.MAX_IMAGE_SIZE,  # Per-file limit
+    "DECODE_WORKERS": ImageProcessor.DEFAULT_MAX_WORKERS,  # Per job
+    "DECODE_EXECUTOR": "thread",  # "thread" or "process"
+    "MAX_IMAGE_EDGE": 1024,  # Downscale longer side at decode; None keeps full size
+    "UPLOAD_STORE_MAX_BYTES": 2 * 1024 * 1024 * 1024,  # Dedup cache of past uploads
+    "UPLOAD_SESSION_DIR": None,  # Incomplete session uploads; defaults to UPLOAD_FOLDER/.sessions
+    "UPLOAD_SESSION_TTL": 3600,  # Idle seconds before an upload session is discarded
+    "UPLOAD_SESSION_MAX_IMAGES": 1000,
+    "UPLOAD_SESSION_NODE": None,  # Node id returned in X-Upload-Node; defaults to host and pid
+    "UPLOAD_PREFETCH_WORKERS": 1,  # Threads decoding session images as they arrive; 0 disables
+    "VIEW_CACHE_MAX_BYTES": 512 * 1024 * 1024,  # Decoded views kept in memory
+    "VIEW_CACHE_DIR": None,  # Optional on-disk tier for evicted views
+    "VIEW_CACHE_DISK_MAX_BYTES": None,
+    "RESULT_CACHE_DIR": None,  # Defaults to OUTPUT_FOLDER/.result_cache
+    "RESULT_CACHE_TTL": 3600,  # Seconds a reconstruction is reused
+    "RESULT_CACHE_MAX_BYTES": 1024 * 1024 * 1024,
+    "OUTPUT_RETENTION_SECONDS": 24 * 3600,  # Job artifacts kept this long
+    "OUTPUT_MAX_BYTES": None,  # Optional size budget for job artifacts
+    "MODEL_POOL_SIZE": 1,  # Model instances for concurrent inference
+    "INFERENCE_MAX_BATCH_SIZE": 1,  # Views per batched forward pass; 1 disables batching
+    "INFERENCE_MAX_BATCH_WAIT_MS": 10,  # Longest wait for other jobs to join a batch
+    "POINT_CLOUD_STRIDE": 4,  # Pixel stride when back-projecting depth
+    "POINT_CLOUD_VOXEL_SIZE": 0.01,  # Downsampling voxel edge; None keeps every point
+    "OUTPUT_FORMAT": "ply",  # Default model format: "ply", "glb" or "obj"
+    "DOWNLOAD_PRECOMPRESS": ["zstd", "gzip"],  # zstd needs the zstandard package
+    "TILE_MAX_POINTS": 50_000,  # Points per LOD tile; None skips tiling
+    "MODEL_WARMUP": "background",  # "background", "sync" or "none"
+    "JOB_WORKERS": 2,  # Reconstructions running concurrently
+    "JOB_QUEUE_SIZE": 16,  # Jobs allowed to wait for a worker
+    "JOB_HISTORY": 100,  # Finished jobs kept for status queries
+    "JOB_BROKER_URL": None,  # "sqlite:///queue.db" or "redis://host:6379/0" to run jobs on workers
+    "MEMORY_BUDGET_BYTES": default_memory_budget(),  # Shared by running jobs; None disables
+    "MEMORY_WAIT_SECONDS": 300,  # Longest wait for budget before a job fails
+    "EVENTS_KEEPALIVE_SECONDS": 15,  # Idle time before a progress stream sends a keepalive
+}
+
+
+class Services(NamedTuple):
+    """The components a reconstruction runs on."""
+
+    view_cache: ViewCache
+    image_processor: ImageProcessor
+    result_cache: ResultCache
+    model_generator: ModelGenerator
+    memory_budget: Optional[MemoryBudget]
+    pipeline: ReconstructionPipeline
+
+    def shutdown(self) -> None:
+        """Stop the background processes the services started."""
+        self.image_processor.shutdown()
+
+
+def create_services(config: Dict[str, Any]) -> Services:
+    """
+    Build the reconstruction services from a configuration.
+
+    The model is not loaded here; callers warm it up as they need.
+
+    Args:
+        config: Configuration with every key of DEFAULT_CONFIG
+
+    Returns:
+        The constructed services
+    """
+    view_cache = ViewCache(
+        max_bytes=config["VIEW_CACHE_MAX_BYTES"],
+        disk_dir=config["VIEW_CACHE_DIR"],
+        disk_max_bytes=config["VIEW_CACHE_DISK_MAX_BYTES"],
+    )
+    image_processor = ImageProcessor(
+        upload_dir=config["UPLOAD_FOLDER"],
+        max_image_size=config["MAX_IMAGE_SIZE"],
+        max_workers=config["DECODE_WORKERS"],
+        executor=config["DECODE_EXECUTOR"],
+        max_long_edge=config["MAX_IMAGE_EDGE"],
+        store_max_bytes=config["UPLOAD_STORE_MAX_BYTES"],
+        view_cache=view_cache,
+    )
+    result_cache = ResultCache(
+        config["RESULT_CACHE_DIR"] or os.path.join(config["OUTPUT_FOLDER"], ".result_cache"),
+        ttl_seconds=config["RESULT_CACHE_TTL"],
+        max_bytes=config["RESULT_CACHE_MAX_BYTES"],
+    )
+    model_generator = ModelGenerator(
+        output_dir=config["OUTPUT_FOLDER"],
+        result_cache=result_cache,
+        retention_seconds=config["OUTPUT_RETENTION_SECONDS"],
+        max_output_bytes=config["OUTPUT_MAX_BYTES"],
+        pool_size=config["MODEL_POOL_SIZE"],
+        max_batch_size=config["INFERENCE_MAX_BATCH_SIZE"],
+        max_batch_wait_ms=config["INFERENCE_MAX_BATCH_WAIT_MS"],
+        point_stride=config["POINT_CLOUD_STRIDE"],
+        voxel_size=config["POINT_CLOUD_VOXEL_SIZE"],
+        output_format=config["OUTPUT_FORMAT"],
+        precompress=config["DOWNLOAD_PRECOMPRESS"],
+        tile_max_points=config["TILE_MAX_POINTS"],
+    )
+    memory_budget = (
+        MemoryBudget(config["MEMORY_BUDGET_BYTES"]) if config["MEMORY_BUDGET_BYTES"] else None
+    )
+    pipeline = ReconstructionPipeline(
+        image_processor,
+        model_generator,
+        memory_budget=memory_budget,
+        memory_wait_seconds=config["MEMORY_WAIT_SECONDS"],
+    )
+    return Services(
+        view_cache, image_processor, result_cache, model_generator, memory_budget, pipeline
+    )
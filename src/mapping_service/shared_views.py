@@ -0,0 +1,136 @@
+"""
+Decoded views packed into a shared memory-mapped arena.
+"""
+
+import os
+import uuid
+import logging
+import tempfile
+from typing import Any, List, Optional, Sequence, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _default_dir() -> str:
+    """RAM-backed /dev/shm where available, else the temp directory."""
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+class ViewArena:
+    """
+    Image arrays of one job laid out in a single memory-mapped file.
+
+    Every process that maps the file sees the same pages, so worker
+    processes can decode straight into their slot, given only the file
+    path and the slot's offset, and the owner reads the results as arrays
+    backed by the same memory without anything being pickled or copied
+    back.
+
+    The creating process owns the file and removes it on close. Arrays
+    already taken from the arena stay valid after that, since a mapping
+    outlives the file's name; the memory is freed once the last of them
+    is dropped.
+    """
+
+    ALIGNMENT = 64  # Slot alignment in bytes, one cache line
+    PREFIX = "views-"
+    SUFFIX = ".arena"
+
+    def __init__(self, path: str, slots: List[Optional[Tuple[int, Tuple[int, ...]]]]):
+        """
+        Map an arena file and take ownership of it; use allocate instead.
+
+        Args:
+            path: Arena file
+            slots: (offset, shape) of each array, or None for an empty slot
+        """
+        self.path = path
+        self.slots = slots
+        self.nbytes = os.path.getsize(path)
+        self._buffer: Optional[np.memmap] = (
+            np.memmap(path, dtype=np.uint8, mode="r+") if self.nbytes else None
+        )
+
+    @classmethod
+    def allocate(
+        cls, shapes: Sequence[Optional[Tuple[int, ...]]], directory: Optional[str] = None
+    ) -> "ViewArena":
+        """
+        Create an arena with one zeroed uint8 slot per shape.
+
+        Args:
+            shapes: Array shape of each slot; None leaves the slot empty
+            directory: Where to create the file; defaults to /dev/shm
+
+        Returns:
+            Arena owned by the caller
+        """
+        slots: List[Optional[Tuple[int, Tuple[int, ...]]]] = []
+        size = 0
+        for shape in shapes:
+            if shape is None:
+                slots.append(None)
+                continue
+            shape = tuple(int(n) for n in shape)
+            slots.append((size, shape))
+            size += -(-int(np.prod(shape)) // cls.ALIGNMENT) * cls.ALIGNMENT
+
+        directory = directory or _default_dir()
+        path = os.path.join(directory, f"{cls.PREFIX}{uuid.uuid4().hex}{cls.SUFFIX}")
+        with open(path, "wb") as f:
+            # Sparse: pages are only backed once written
+            f.truncate(size)
+        try:
+            return cls(path, slots)
+        except Exception:
+            os.remove(path)
+            raise
+
+    def array(self, index: int) -> Optional[np.ndarray]:
+        """
+        Return the array in a slot without copying it.
+
+        Args:
+            index: Slot index
+
+        Returns:
+            uint8 array backed by the arena, or None for an empty slot
+        """
+        slot = self.slots[index]
+        if slot is None or self._buffer is None:
+            return None
+        offset, shape = slot
+        count = int(np.prod(shape))
+        # A plain ndarray on the mapping; slicing a memmap would keep its subclass
+        return np.asarray(self._buffer[offset : offset + count]).reshape(shape)
+
+    def close(self) -> None:
+        """Drop this mapping and remove the file."""
+        self._buffer = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove view arena {self.path}: {e}")
+
+    def __enter__(self) -> "ViewArena":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def write_to_arena(path: str, offset: int, img: np.ndarray) -> None:
+    """
+    Write an array into a slot of an arena from any process.
+
+    Args:
+        path: Arena file
+        offset: Offset of the slot, from the arena's slots
+        img: uint8 array of the slot's shape
+    """
+    target = np.memmap(path, dtype=np.uint8, mode="r+", offset=offset, shape=img.shape)
+    target[...] = img
+    del target
@@ -0,0 +1,158 @@
+"""
+Octree level-of-detail tiling of point clouds for progressive viewing.
+"""
+
+import os
+import json
+import logging
+from typing import Any, Dict, List, Optional
+import numpy as np
+from .artifacts import atomic_write
+from .exporters import get_exporter
+from .pointcloud import PointCloud, voxel_downsample
+
+logger = logging.getLogger(__name__)
+
+TILESET_FILE = "tileset.json"
+
+
+def build_tiles(
+    cloud: PointCloud,
+    output_dir: str,
+    max_points: int = 50_000,
+    max_depth: int = 8,
+    lod_resolution: int = 64,
+    tile_format: str = "glb",
+) -> Optional[Dict[str, Any]]:
+    """
+    Split a point cloud into an octree of multi-resolution tiles.
+
+    The root tile covers the whole cloud's bounding cube. A tile holding
+    more than ``max_points`` points stores a coarse version of them,
+    downsampled to ``lod_resolution`` voxels along each edge, and is split
+    into up to eight child tiles covering its octants at full detail, so a
+    viewer can render the root first and refine only the tiles in view.
+    Tiles are written as ``<name><ext>`` files, the root being ``r`` and
+    each child appending its octant digit, plus a ``tileset.json`` laid out
+    like a 3D Tiles tileset with "REPLACE" refinement.
+
+    Args:
+        cloud: Point cloud to tile
+        output_dir: Directory receiving the tiles and tileset
+        max_points: Largest number of points in a tile
+        max_depth: Depth at which tiles are no longer split
+        lod_resolution: Voxels along each edge of a coarse tile
+        tile_format: Exporter name used for the tile files
+
+    Returns:
+        The tileset document, or None if the cloud is empty
+
+    Raises:
+        ValueError: If the tile format is unknown
+    """
+    exporter = get_exporter(tile_format)
+    if exporter is None:
+        raise ValueError(f"Unknown tile format: {tile_format}")
+    if len(cloud) == 0:
+        return None
+    os.makedirs(output_dir, exist_ok=True)
+
+    low = cloud.points.min(axis=0).astype(np.float64)
+    size = float((cloud.points.max(axis=0) - low).max()) or 1.0
+    root = {"name": "r", "index": np.arange(len(cloud)), "origin": low, "size": size, "depth": 0}
+    nodes: Dict[str, Dict[str, Any]] = {}
+    stack = [root]
+    num_tiles = 0
+
+    while stack:
+        node = stack.pop()
+        subset = _subset(cloud, node["index"])
+        leaf = len(subset) <= max_points or node["depth"] >= max_depth
+        if leaf:
+            content = subset
+            geometric_error = 0.0
+        else:
+            geometric_error = node["size"] / lod_resolution
+            content = voxel_downsample(subset, geometric_error)
+
+        uri = node["name"] + exporter.extension
+        with atomic_write(os.path.join(output_dir, uri)) as f:
+            exporter.write(f, content, None)
+        num_tiles += 1
+
+        tile = {
+            "boundingVolume": {"box": _box(subset.points)},
+            "geometricError": geometric_error,
+            "content": {"uri": uri},
+            "extras": {"name": node["name"], "points": len(content)},
+        }
+        nodes[node["name"]] = tile
+        if node["name"] != "r":
+            nodes[node["name"][:-1]].setdefault("children", []).append(tile)
+        if not leaf:
+            stack.extend(_split(node, subset.points))
+
+    root_tile = nodes["r"]
+    root_tile["refine"] = "REPLACE"
+    _sort_children(root_tile)
+    tileset = {
+        "asset": {"version": "1.1", "generator": "3D Mapping Service"},
+        "geometricError": root_tile["geometricError"] * 2 or size,
+        "root": root_tile,
+    }
+    with atomic_write(os.path.join(output_dir, TILESET_FILE), "w") as f:
+        json.dump(tileset, f)
+    logger.info(f"Wrote {num_tiles} tiles for {len(cloud)} points")
+    return tileset
+
+
+def _subset(cloud: PointCloud, index: np.ndarray) -> PointCloud:
+    return PointCloud(
+        cloud.points[index],
+        cloud.colors[index] if cloud.colors is not None else None,
+        None,
+        cloud.normals[index] if cloud.normals is not None else None,
+    )
+
+
+def _split(node: Dict[str, Any], points: np.ndarray) -> List[Dict[str, Any]]:
+    """Group a node's points by octant with one stable sort."""
+    half = node["size"] / 2.0
+    upper = points >= (node["origin"] + half)
+    octant = upper[:, 0] * 4 + upper[:, 1] * 2 + upper[:, 2]
+    order = np.argsort(octant, kind="stable")
+    counts = np.bincount(octant, minlength=8)
+    children = []
+    start = 0
+    for code in range(8):
+        stop = start + counts[code]
+        if counts[code]:
+            offset = np.array([code >> 2 & 1, code >> 1 & 1, code & 1]) * half
+            children.append(
+                {
+                    "name": f"{node['name']}{code}",
+                    "index": node["index"][order[start:stop]],
+                    "origin": node["origin"] + offset,
+                    "size": half,
+                    "depth": node["depth"] + 1,
+                }
+            )
+        start = stop
+    return children
+
+
+def _box(points: np.ndarray) -> List[float]:
+    """3D Tiles oriented box: center followed by three half-axis vectors."""
+    low = points.min(axis=0).astype(np.float64)
+    high = points.max(axis=0).astype(np.float64)
+    center = (low + high) / 2.0
+    half = (high - low) / 2.0
+    return [*center, half[0], 0.0, 0.0, 0.0, half[1], 0.0, 0.0, 0.0, half[2]]
+
+
+def _sort_children(tile: Dict[str, Any]) -> None:
+    children = tile.get("children")
+    if children:
+        children.sort(key=lambda child: child["extras"]["name"])
+        for child in children:
+            _sort_children(child)
@@ -0,0 +1,505 @@
+"""
+Resumable upload sessions for capture sets too large for one request.
+"""
+
+import os
+import re
+import time
+import uuid
+import shutil
+import socket
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+from .content_store import UploadTooLargeError
+from .image_processor import ImageProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class UploadSessionError(Exception):
+    """Raised when a part cannot be written or a session cannot be committed."""
+
+
+class ChunkOffsetError(UploadSessionError):
+    """Raised when a chunk does not continue where its part left off."""
+
+    def __init__(self, name: str, received: int):
+        super().__init__(f"{name} has {received} bytes; the next chunk must start there")
+        self.received = received
+
+
+class _Part:
+    """Bookkeeping for one image of a session."""
+
+    __slots__ = ("name", "partial_path", "received", "size", "path", "writing", "prefetch")
+
+    def __init__(self, name: str, partial_path: str):
+        self.name = name
+        self.partial_path = partial_path
+        self.received = 0
+        self.size: Optional[int] = None
+        self.path: Optional[str] = None  # Stored upload once complete
+        self.writing = False
+        self.prefetch: Optional[Future] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        prefetch = self.prefetch
+        decoded = (
+            prefetch is not None
+            and prefetch.done()
+            and not prefetch.cancelled()
+            and prefetch.result()
+        )
+        return {
+            "name": self.name,
+            "received": self.received,
+            "size": self.size,
+            "complete": self.path is not None,
+            "decoded": bool(decoded),
+        }
+
+
+class UploadSession:
+    """
+    Images uploaded one request at a time ahead of a reconstruction.
+
+    Each image is a named part written by one or more requests; chunks are
+    appended at the offset the part has reached, so an interrupted upload
+    resumes instead of starting over.
+    """
+
+    def __init__(self, session_id: str, directory: str, output_format: Optional[str]):
+        """
+        Initialize the UploadSession.
+
+        Args:
+            session_id: Identifier handed to the client
+            directory: Directory holding the incomplete parts
+            output_format: Model format of the job the session starts
+        """
+        self.id = session_id
+        self.directory = directory
+        self.output_format = output_format
+        self.started = time.perf_counter()
+        self.last_active = time.time()
+        self.parts: Dict[str, _Part] = {}
+        self.committing = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the session and the state of each part, ordered by name."""
+        parts = [self.parts[name].to_dict() for name in sorted(self.parts)]
+        return {
+            "session_id": self.id,
+            "format": self.output_format,
+            "parts": parts,
+            "complete": sum(1 for part in parts if part["complete"]),
+            "bytes_received": sum(part["received"] for part in parts),
+        }
+
+
+class UploadSessionManager:
+    """
+    Tracks open upload sessions and turns completed parts into uploads.
+
+    A part that completes is moved into the image processor's upload store,
+    which takes a reference on it for the session, and is decoded into the
+    view cache on a small thread pool while the remaining parts are still
+    arriving. When the session is committed its job finds those views in
+    the cache instead of decoding them again. Sessions idle for longer
+    than ``ttl_seconds`` are discarded.
+
+    Sessions are held in this process's memory. Each session directory
+    records the node that owns it, so when ``directory`` is shared by
+    several API nodes, ``owner`` tells the others where a session lives.
+    """
+
+    DEFAULT_TTL_SECONDS = 3600
+    DEFAULT_MAX_PARTS = 1000
+    CHUNK_SIZE = ImageProcessor.CHUNK_SIZE
+    OWNER_FILE = "node"
+    _ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+    def __init__(
+        self,
+        image_processor: ImageProcessor,
+        directory: str,
+        ttl_seconds: Optional[float] = None,
+        max_parts: Optional[int] = None,
+        prefetch_workers: int = 1,
+        node_id: Optional[str] = None,
+    ):
+        """
+        Initialize the UploadSessionManager.
+
+        Sessions live in memory, so incomplete parts left in ``directory``
+        by a previous process are removed once they are older than
+        ``ttl_seconds``.
+
+        Args:
+            image_processor: Processor whose upload store and view cache
+                receive the parts
+            directory: Directory for incomplete parts, one subdirectory per
+                session; created when the first session opens
+            ttl_seconds: Idle time after which a session is discarded
+            max_parts: Most images a session may hold
+            prefetch_workers: Threads decoding completed parts ahead of the
+                job; 0 disables eager decoding, as does a processor
+                without a view cache
+            node_id: Identifier of this node, recorded with its sessions;
+                defaults to the host name and process id
+        """
+        self.image_processor = image_processor
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds or self.DEFAULT_TTL_SECONDS
+        self.max_parts = max_parts or self.DEFAULT_MAX_PARTS
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}"
+        self._sessions: Dict[str, UploadSession] = {}
+        self._lock = threading.Lock()
+        self._prefetch = None
+        if prefetch_workers > 0 and image_processor.view_cache is not None:
+            self._prefetch = ThreadPoolExecutor(
+                max_workers=prefetch_workers, thread_name_prefix="prefetch"
+            )
+        self._remove_stale()
+
+    def create(self, output_format: Optional[str] = None) -> UploadSession:
+        """
+        Open a new session.
+
+        Args:
+            output_format: Model format of the job the session starts
+
+        Returns:
+            The new session
+        """
+        self._prune()
+        session_id = uuid.uuid4().hex
+        directory = os.path.join(self.directory, session_id)
+        os.makedirs(directory)
+        with open(os.path.join(directory, self.OWNER_FILE), "w") as f:
+            f.write(self.node_id)
+        session = UploadSession(session_id, directory, output_format)
+        with self._lock:
+            self._sessions[session_id] = session
+        logger.info(f"Opened upload session {session_id}")
+        return session
+
+    def get(self, session_id: str) -> Optional[UploadSession]:
+        """
+        Look up an open session.
+
+        Args:
+            session_id: Identifier returned by ``create``
+
+        Returns:
+            The session, or None if it is unknown, closed or expired
+        """
+        self._prune()
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def owner(self, session_id: str) -> Optional[str]:
+        """
+        Return the node holding a session, as recorded in its directory.
+
+        Args:
+            session_id: Identifier returned by ``create`` on any node
+
+        Returns:
+            Node id, or None if no session directory has that id
+        """
+        if not self._ID_PATTERN.match(session_id):
+            return None
+        try:
+            with open(os.path.join(self.directory, session_id, self.OWNER_FILE)) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def write_part(
+        self,
+        session: UploadSession,
+        name: str,
+        stream: BinaryIO,
+        offset: int = 0,
+        total: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Write an image, or one chunk of it, into a session.
+
+        A write at offset 0 (re)starts the part and replaces any earlier
+        content; any other offset must equal the bytes already received.
+        The part completes once ``total`` bytes have arrived, or at the end
+        of the stream when ``total`` is None. If the stream breaks off, the
+        bytes that did arrive are kept for the client to resume from.
+
+        Args:
+            session: Session receiving the part
+            name: Filename of the image within the session
+            stream: Readable binary stream with the chunk
+            offset: Position of the chunk within the image
+            total: Size of the whole image, if known
+
+        Returns:
+            State of the part after the write
+
+        Raises:
+            ChunkOffsetError: If ``offset`` is not where the part left off
+            UploadTooLargeError: If the image exceeds the maximum image size
+            UploadSessionError: If the chunk is longer than ``total``
+                declares, the part is being written by another request,
+                the session is full or is closed
+        """
+        max_size = self.image_processor.max_image_size
+        if total is not None and max_size is not None and total > max_size:
+            raise UploadTooLargeError(f"{name} exceeds {max_size} bytes")
+
+        replaced = None
+        with self._lock:
+            self._check_open(session)
+            part = session.parts.get(name)
+            if part is None:
+                if len(session.parts) >= self.max_parts:
+                    raise UploadSessionError(f"Sessions hold at most {self.max_parts} images")
+                # Unique so a removed part's name is never reused by a live one
+                partial_path = os.path.join(session.directory, f"{uuid.uuid4().hex}.part")
+                part = session.parts[name] = _Part(name, partial_path)
+            if part.writing:
+                raise UploadSessionError(f"{name} is already being uploaded")
+            if offset and (part.path is not None or offset != part.received):
+                raise ChunkOffsetError(name, part.received)
+            if offset == 0:
+                replaced = self._reset(part)
+            part.writing = True
+            part.size = total if total is not None else part.size
+            session.last_active = time.time()
+        if replaced is not None:
+            self.image_processor.release_uploads([replaced])
+
+        path = None
+        try:
+            received = self._append(part, stream, offset, total, max_size)
+            if total is None or received == total:
+                with open(part.partial_path, "rb") as f:
+                    path = self.image_processor.save_uploaded_stream(f, name)
+                os.remove(part.partial_path)
+                part.size = received
+        except BaseException:
+            with self._lock:
+                part.writing = False
+                part.received = _file_size(part.partial_path)
+            raise
+
+        with self._lock:
+            part.writing = False
+            part.received = received
+            session.last_active = time.time()
+            if path is not None and session.id not in self._sessions:
+                # The session was closed while the part was being written
+                self.image_processor.release_uploads([path])
+            elif path is not None:
+                part.path = path
+                if self._prefetch is not None:
+                    part.prefetch = self._prefetch.submit(self._decode, path)
+            return part.to_dict()
+
+    def remove_part(self, session: UploadSession, name: str) -> bool:
+        """
+        Drop an image from a session.
+
+        Args:
+            session: Session holding the part
+            name: Filename of the image
+
+        Returns:
+            True if the part existed
+
+        Raises:
+            UploadSessionError: If the part is being written or the session
+                is being committed
+        """
+        with self._lock:
+            self._check_open(session)
+            part = session.parts.get(name)
+            if part is None:
+                return False
+            if part.writing:
+                raise UploadSessionError(f"{name} is being uploaded")
+            del session.parts[name]
+            replaced = self._reset(part)
+            session.last_active = time.time()
+        if replaced is not None:
+            self.image_processor.release_uploads([replaced])
+        return True
+
+    def begin_commit(self, session: UploadSession) -> Tuple[List[str], List[str]]:
+        """
+        Hand a session's images to a job.
+
+        Every part must be complete. An extra reference is taken on each
+        stored image for the job, which releases it like any other upload.
+        Until ``end_commit`` is called the session refuses further writes.
+
+        Args:
+            session: Session to commit
+
+        Returns:
+            Tuple of (file paths, filenames), ordered by filename
+
+        Raises:
+            UploadSessionError: If the session is empty, has incomplete
+                parts or is already being committed
+        """
+        with self._lock:
+            self._check_open(session)
+            incomplete = sorted(name for name, part in session.parts.items() if part.path is None)
+            if incomplete:
+                raise UploadSessionError(f"Incomplete images: {', '.join(incomplete)}")
+            if not session.parts:
+                raise UploadSessionError("No images uploaded")
+            names = sorted(session.parts)
+            file_paths = [session.parts[name].path for name in names]
+            for path in file_paths:
+                self.image_processor.store.acquire(path)
+            session.committing = True
+        return file_paths, names
+
+    def end_commit(self, session: UploadSession, queued: bool) -> None:
+        """
+        Finish a commit started by ``begin_commit``.
+
+        Args:
+            session: Session being committed
+            queued: True if the job was queued, which closes the session;
+                False reopens it so the client can retry
+        """
+        if queued:
+            self.close(session)
+            return
+        with self._lock:
+            session.committing = False
+
+    def close(self, session: UploadSession) -> None:
+        """
+        Discard a session, releasing its images and incomplete parts.
+
+        Args:
+            session: Session to close
+        """
+        with self._lock:
+            if self._sessions.pop(session.id, None) is None:
+                return
+        self._discard(session)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of open sessions, their parts and bytes received."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            parts = [part for session in sessions for part in session.parts.values()]
+            return {
+                "sessions": len(sessions),
+                "parts": len(parts),
+                "bytes": sum(part.received for part in parts),
+            }
+
+    def shutdown(self) -> None:
+        """Stop eager decoding; decodes already running finish in the background."""
+        if self._prefetch is not None:
+            self._prefetch.shutdown(wait=False, cancel_futures=True)
+
+    def _check_open(self, session: UploadSession) -> None:
+        if session.id not in self._sessions:
+            raise UploadSessionError("Upload session is closed")
+        if session.committing:
+            raise UploadSessionError("Upload session is being committed")
+
+    def _reset(self, part: _Part) -> Optional[str]:
+        """Forget a part's content and return the stored upload to release."""
+        if part.prefetch is not None:
+            part.prefetch.cancel()
+        replaced, part.path, part.prefetch = part.path, None, None
+        part.received = 0
+        part.size = None
+        return replaced
+
+    def _append(
+        self,
+        part: _Part,
+        stream: BinaryIO,
+        offset: int,
+        total: Optional[int],
+        max_size: Optional[int],
+    ) -> int:
+        """Write a chunk at offset, returning the bytes now received."""
+        limit = total if total is not None else max_size
+        with open(part.partial_path, "r+b" if offset else "wb") as f:
+            f.seek(offset)
+            f.truncate()
+            received = offset
+            for chunk in iter(lambda: stream.read(self.CHUNK_SIZE), b""):
+                received += len(chunk)
+                if limit is not None and received > limit:
+                    f.truncate(offset)
+                    if total is None:
+                        raise UploadTooLargeError(f"{part.name} exceeds {max_size} bytes")
+                    raise UploadSessionError(f"{part.name} is longer than its declared {total} bytes")
+                f.write(chunk)
+        return received
+
+    def _decode(self, path: str) -> bool:
+        """Decode a completed part into the view cache."""
+        try:
+            return len(self.image_processor.preprocess_images([path])) == 1
+        except Exception as e:
+            logger.warning(f"Eager decode of {path} failed: {e}")
+            return False
+
+    def _discard(self, session: UploadSession) -> None:
+        stored = []
+        with self._lock:
+            for part in session.parts.values():
+                replaced = self._reset(part)
+                if replaced is not None:
+                    stored.append(replaced)
+        self.image_processor.release_uploads(stored)
+        shutil.rmtree(session.directory, ignore_errors=True)
+        logger.info(f"Closed upload session {session.id}")
+
+    def _prune(self) -> None:
+        """Discard sessions idle for longer than ttl_seconds."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [
+                session
+                for session in self._sessions.values()
+                if session.last_active < cutoff
+                and not session.committing
+                and not any(part.writing for part in session.parts.values())
+            ]
+            for session in expired:
+                del self._sessions[session.id]
+        for session in expired:
+            self._discard(session)
+
+    def _remove_stale(self) -> None:
+        """Remove session directories not written to for ttl_seconds."""
+        if not os.path.isdir(self.directory):
+            return
+        cutoff = time.time() - self.ttl_seconds
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not os.path.isdir(path):
+                continue
+            paths = [path] + [os.path.join(path, f) for f in os.listdir(path)]
+            if max(os.path.getmtime(p) for p in paths) < cutoff:
+                logger.info(f"Removing stale upload session {name}")
+                shutil.rmtree(path, ignore_errors=True)
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
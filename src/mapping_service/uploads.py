@@ -0,0 +1,65 @@
+"""
+Streaming multipart upload handling.
+"""
+
+import tempfile
+from typing import IO, Any, Optional
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+
+
+class SizeLimitedFile:
+    """
+    File wrapper that refuses writes past a byte limit.
+
+    Werkzeug's multipart parser writes each part into the stream returned
+    by ``Request._get_file_stream`` as the body arrives, so raising from
+    ``write`` aborts the request as soon as one file grows too large.
+    """
+
+    def __init__(self, file: IO[bytes], max_size: Optional[int] = None):
+        """
+        Initialize the SizeLimitedFile.
+
+        Args:
+            file: Underlying binary file object
+            max_size: Maximum number of bytes that may be written
+        """
+        self._file = file
+        self.max_size = max_size
+        self.bytes_written = 0
+
+    def write(self, data: bytes) -> int:
+        """Write data, raising RequestEntityTooLarge past the limit."""
+        self.bytes_written += len(data)
+        if self.max_size is not None and self.bytes_written > self.max_size:
+            raise RequestEntityTooLarge(
+                f"Uploaded file exceeds the {self.max_size} byte limit"
+            )
+        return self._file.write(data)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+
+class UploadRequest(Request):
+    """
+    Request class that spools uploaded files straight to disk.
+
+    The default stream factory keeps parts up to 500KB in memory; here every
+    part goes to an unnamed temporary file so memory use per request stays
+    bounded by the parser's chunk size regardless of upload size.
+    """
+
+    def _get_file_stream(
+        self,
+        total_content_length: Optional[int],
+        content_type: Optional[str],
+        filename: Optional[str] = None,
+        content_length: Optional[int] = None,
+    ) -> IO[bytes]:
+        max_size = current_app.config.get("MAX_IMAGE_SIZE")
+        return SizeLimitedFile(tempfile.TemporaryFile("w+b"), max_size)
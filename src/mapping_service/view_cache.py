@@ -0,0 +1,204 @@
+"""
+Cache of decoded views keyed by image content hash.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCache:
+    """
+    LRU cache of decoded image arrays with an optional on-disk tier.
+
+    Entries are keyed by image content hash plus the preprocessing
+    parameters, so the same photo decoded at a different resolution is a
+    different entry. The memory tier is bounded by the total ``nbytes`` of
+    its arrays. When a disk directory is configured, arrays evicted from
+    memory are spilled to raw ``.npy`` files and served back as read-only
+    memory maps, so a disk hit costs page faults rather than a decode.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 512 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: Optional[int] = None,
+    ):
+        """
+        Initialize the ViewCache.
+
+        Args:
+            max_bytes: Memory budget for cached arrays
+            disk_dir: Optional directory for the on-disk tier
+            disk_max_bytes: Size budget for the on-disk tier; None is unbounded
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: "OrderedDict[str, Tuple[np.ndarray, Dict[str, Any]]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    @staticmethod
+    def make_key(content_hash: str, params: Tuple[Any, ...] = ()) -> str:
+        """
+        Build a cache key from a content hash and preprocessing parameters.
+
+        Args:
+            content_hash: Hex digest of the image file contents
+            params: Parameters that change the decoded output
+
+        Returns:
+            Key safe to use as a file name
+        """
+        params_digest = hashlib.sha256(repr(params).encode()).hexdigest()[:16]
+        return f"{content_hash}-{params_digest}"
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, Dict[str, Any]]]:
+        """
+        Look up a cached view.
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            Tuple of (read-only image array, metadata), or None on a miss
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry
+            on_disk = key in self._disk
+            if on_disk:
+                self._disk.move_to_end(key)
+
+        if on_disk:
+            entry = self._read_disk(key)
+            if entry is not None:
+                with self._lock:
+                    self._counters["disk_hits"] += 1
+                return entry
+
+        with self._lock:
+            self._counters["misses"] += 1
+        return None
+
+    def put(self, key: str, img: np.ndarray, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Add a decoded view to the cache.
+
+        The array is marked read-only, since it is shared by every view
+        served from the cache.
+
+        Args:
+            key: Key from make_key
+            img: Decoded image array
+            metadata: JSON-serializable details such as scale and original size
+        """
+        if img.nbytes > self.max_bytes:
+            return
+        img.flags.writeable = False
+        spilled = []
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= previous[0].nbytes
+            self._memory[key] = (img, dict(metadata or {}))
+            self._memory_bytes += img.nbytes
+            while self._memory_bytes > self.max_bytes:
+                old_key, old_entry = self._memory.popitem(last=False)
+                self._memory_bytes -= old_entry[0].nbytes
+                self._counters["evictions"] += 1
+                spilled.append((old_key, old_entry))
+
+        if self.disk_dir:
+            for old_key, (old_img, old_metadata) in spilled:
+                self._write_disk(old_key, old_img, old_metadata)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current sizes of both tiers."""
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["disk_hits"] + self._counters["misses"]
+            hits = self._counters["hits"] + self._counters["disk_hits"]
+            return {
+                **self._counters,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "entries": len(self._memory),
+                "bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.disk_dir, key)
+        return base + ".npy", base + ".json"
+
+    def _write_disk(self, key: str, img: np.ndarray, metadata: Dict[str, Any]) -> None:
+        array_path, meta_path = self._paths(key)
+        try:
+            temp_path = array_path + ".tmp"
+            with open(temp_path, "wb") as f:
+                np.save(f, img)
+            os.replace(temp_path, array_path)
+            with open(meta_path, "w") as f:
+                json.dump(metadata, f)
+        except OSError as e:
+            logger.warning(f"Could not spill view {key} to disk: {e}")
+            return
+
+        with self._lock:
+            self._disk_bytes -= self._disk.pop(key, 0)
+            self._disk[key] = img.nbytes
+            self._disk_bytes += img.nbytes
+            expired = []
+            while self.disk_max_bytes is not None and self._disk_bytes > self.disk_max_bytes:
+                old_key, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                expired.append(old_key)
+
+        for old_key in expired:
+            for path in self._paths(old_key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _read_disk(self, key: str) -> Optional[Tuple[np.ndarray, Dict[str, Any]]]:
+        array_path, meta_path = self._paths(key)
+        try:
+            img = np.load(array_path, mmap_mode="r")
+            with open(meta_path) as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self._disk_bytes -= self._disk.pop(key, 0)
+            return None
+        return img, metadata
+
+    def _load_disk_index(self) -> None:
+        names = [n for n in os.listdir(self.disk_dir) if n.endswith(".npy")]
+        paths = sorted(
+            (os.path.join(self.disk_dir, n) for n in names), key=os.path.getmtime
+        )
+        for path in paths:
+            key = os.path.basename(path)[: -len(".npy")]
+            if os.path.exists(self._paths(key)[1]):
+                size = os.path.getsize(path)
+                self._disk[key] = size
+                self._disk_bytes += size
@@ -0,0 +1,208 @@
+"""
+Standalone worker that runs brokered reconstruction jobs.
+
+Start any number of these next to stateless API nodes configured with the
+same JOB_BROKER_URL. Upload and output folders must be shared storage
+mounted at the same paths on every node.
+
+Usage:
+    python -m mapping_service.worker --broker sqlite:///var/lib/mapping/queue.db \\
+        --upload-folder /shared/uploads --output-folder /shared/outputs
+"""
+
+import os
+import socket
+import logging
+import argparse
+import threading
+from typing import List, Optional
+from .broker import Broker, Lease, open_broker
+from .job_manager import Job
+from .pipeline import ReconstructionPipeline
+from .services import DEFAULT_CONFIG, create_services
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """
+    Leases jobs from a broker and runs them on a local pipeline.
+
+    While a job runs, a heartbeat thread renews its lease and publishes the
+    job's state and events as they happen, so API nodes can stream
+    progress. If the worker dies, its lease expires and another worker
+    runs the job again from the start.
+    """
+
+    METHODS = ("run", "extend")  # Pipeline methods a task may name
+    DEFAULT_LEASE_SECONDS = 30.0
+
+    def __init__(
+        self,
+        broker: Broker,
+        pipeline: ReconstructionPipeline,
+        worker_id: Optional[str] = None,
+        lease_seconds: Optional[float] = None,
+        poll_seconds: float = 1.0,
+    ):
+        """
+        Initialize the Worker.
+
+        Args:
+            broker: Broker shared with the API nodes
+            pipeline: Pipeline running the jobs
+            worker_id: Identifier reported to the broker; defaults to the
+                host name and process id
+            lease_seconds: How long a job stays leased without a heartbeat;
+                heartbeats are sent three times per lease
+            poll_seconds: Wait between polls when the queue is empty
+        """
+        self.broker = broker
+        self.pipeline = pipeline
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds or self.DEFAULT_LEASE_SECONDS
+        self.heartbeat_seconds = self.lease_seconds / 3
+        self.poll_seconds = poll_seconds
+
+    def run_once(self) -> bool:
+        """
+        Lease and run one job.
+
+        Returns:
+            True if a job was run, False if none was waiting
+        """
+        self.broker.worker_seen(self.worker_id)
+        lease = self.broker.lease(self.worker_id, self.lease_seconds)
+        if lease is None:
+            return False
+        self._execute(lease)
+        return True
+
+    def run(self, stop: Optional[threading.Event] = None) -> None:
+        """
+        Run jobs until ``stop`` is set.
+
+        Args:
+            stop: Event ending the loop once the current job finishes
+        """
+        stop = stop or threading.Event()
+        logger.info(f"Worker {self.worker_id} started")
+        while not stop.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception as e:
+                # A broker outage should not kill the worker
+                logger.error(f"Worker {self.worker_id} could not lease a job: {e}")
+            stop.wait(self.poll_seconds)
+        logger.info(f"Worker {self.worker_id} stopped")
+
+    def _execute(self, lease: Lease) -> None:
+        job = Job.restore(lease.state, lease.events)
+        published = [lease.events[-1]["id"] if lease.events else 0]
+        heartbeat = threading.Thread(
+            target=self._heartbeat,
+            args=(lease, job, published),
+            name=f"heartbeat-{job.id[:8]}",
+            daemon=True,
+        )
+        heartbeat.start()
+
+        method = lease.task.get("method")
+        if method in self.METHODS:
+            job.run(getattr(self.pipeline, method), *lease.task["args"], **lease.task["kwargs"])
+        else:
+            job.run(_unknown_method, method)
+        heartbeat.join()
+
+        events = job.events_since(published[0], timeout=0)
+        try:
+            finished = self.broker.finish(lease, job.to_dict(), events, job.result, job.error)
+        except Exception as e:
+            logger.error(f"Could not record the outcome of job {job.id}: {e}")
+            return
+        if not finished:
+            logger.warning(f"Lease on job {job.id} was lost; its outcome was discarded")
+
+    def _heartbeat(self, lease: Lease, job: Job, published: List[int]) -> None:
+        """Renew the lease and publish new events until the job finishes."""
+        while True:
+            events = job.events_since(published[0], timeout=self.heartbeat_seconds)
+            if job.is_finished:
+                # _execute publishes the remaining events with the outcome
+                return
+            try:
+                if not self.broker.heartbeat(lease, self.lease_seconds, job.to_dict(), events):
+                    logger.warning(f"Lease on job {job.id} was taken over by another worker")
+                    return
+            except Exception as e:
+                logger.warning(f"Heartbeat for job {job.id} failed: {e}")
+                continue
+            if events:
+                published[0] = events[-1]["id"]
+
+
+def _unknown_method(job: Job, method: str) -> None:
+    raise ValueError(f"Unknown task method: {method}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run workers from the command line until interrupted."""
+    parser = argparse.ArgumentParser(description="Run reconstruction jobs from a broker.")
+    parser.add_argument("--broker", default=os.getenv("JOB_BROKER_URL"), help="Broker URL")
+    parser.add_argument("--upload-folder", default=DEFAULT_CONFIG["UPLOAD_FOLDER"])
+    parser.add_argument("--output-folder", default=DEFAULT_CONFIG["OUTPUT_FOLDER"])
+    parser.add_argument("--concurrency", type=int, default=1, help="Jobs run at once")
+    parser.add_argument("--lease-seconds", type=float, default=Worker.DEFAULT_LEASE_SECONDS)
+    parser.add_argument("--worker-id", help="Defaults to the host name and process id")
+    args = parser.parse_args(argv)
+    if not args.broker:
+        parser.error("--broker or JOB_BROKER_URL is required")
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    config = dict(
+        DEFAULT_CONFIG,
+        UPLOAD_FOLDER=args.upload_folder,
+        OUTPUT_FOLDER=args.output_folder,
+        # API nodes own the upload store; a worker never evicts uploads
+        UPLOAD_STORE_MAX_BYTES=None,
+    )
+    services = create_services(config)
+    services.model_generator.warm_up(background=False)
+    broker = open_broker(args.broker)
+
+    worker_id = args.worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    stop = threading.Event()
+    threads = [
+        threading.Thread(
+            target=Worker(
+                broker,
+                services.pipeline,
+                worker_id=f"{worker_id}-{i}" if args.concurrency > 1 else worker_id,
+                lease_seconds=args.lease_seconds,
+            ).run,
+            args=(stop,),
+            name=f"worker-{i}",
+        )
+        for i in range(max(1, args.concurrency))
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(1.0)
+    except KeyboardInterrupt:
+        logger.info("Stopping after the current jobs")
+        stop.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        broker.close()
+        services.shutdown()
+
+
+if __name__ == "__main__":
+    main()
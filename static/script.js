@@ -60,18 +60,20 @@ document.addEventListener('DOMContentLoaded', function() {
             Array.from(files).forEach(file => {
                 formData.append('images', file);
             });
+            formData.append('format', document.getElementById('formatSelect').value);
 
             const response = await fetch('/api/upload', {
                 method: 'POST',
                 body: formData
             });
 
-            const data = await response.json();
+            const job = await response.json();
 
             if (!response.ok) {
-                throw new Error(data.error || 'Failed to generate 3D model');
+                throw new Error(job.error || 'Failed to generate 3D model');
             }
 
+            const data = await waitForResult(job);
             showResults(data);
         } catch (err) {
             showError(err.message);
@@ -81,6 +83,83 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
 
+    const loadingStatus = document.getElementById('loadingStatus');
+    const stageLabels = {
+        ingest: 'Uploading images',
+        decode: 'Decoding images',
+        inference: 'Estimating depth and camera poses',
+        fusion: 'Fusing point cloud',
+        export: 'Writing 3D model'
+    };
+
+    // Follow the job's progress stream, falling back to polling without it
+    async function waitForResult(job) {
+        loadingStatus.textContent = 'Waiting for a worker...';
+        if (window.EventSource && job.events_url) {
+            try {
+                await followEvents(job.events_url);
+            } catch (err) {
+                await pollStatus(job);
+            }
+        } else {
+            await pollStatus(job);
+        }
+
+        const resultResponse = await fetch(job.result_url);
+        const data = await resultResponse.json();
+
+        if (!resultResponse.ok) {
+            throw new Error(data.error || 'Failed to generate 3D model');
+        }
+        return data;
+    }
+
+    // Resolve once the job finishes; reject if the stream cannot be opened
+    function followEvents(url) {
+        return new Promise((resolve, reject) => {
+            const source = new EventSource(url);
+            let received = false;
+
+            source.addEventListener('progress', function(e) {
+                received = true;
+                const event = JSON.parse(e.data);
+                const label = stageLabels[event.stage] || event.stage;
+                loadingStatus.textContent = `${label}... ${Math.round(event.progress * 100)}%`;
+            });
+            source.addEventListener('status', function(e) {
+                received = true;
+                const event = JSON.parse(e.data);
+                if (event.status === 'done' || event.status === 'failed') {
+                    source.close();
+                    resolve();
+                }
+            });
+            source.onerror = function() {
+                // EventSource reconnects on its own once events have arrived
+                if (!received) {
+                    source.close();
+                    reject(new Error('Progress stream unavailable'));
+                }
+            };
+        });
+    }
+
+    // Poll the job until it finishes
+    async function pollStatus(job) {
+        while (true) {
+            const statusResponse = await fetch(job.status_url);
+            const status = await statusResponse.json();
+
+            if (!statusResponse.ok) {
+                throw new Error(status.error || 'Failed to get job status');
+            }
+            if (status.status === 'done' || status.status === 'failed') {
+                break;
+            }
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    }
+
     function showResults(data) {
         results.style.display = 'block';
         
@@ -106,6 +185,11 @@ document.addEventListener('DOMContentLoaded', function() {
                 <a href="${data.download_url}" class="download-btn" download>
                     📥 Download 3D Model
                 </a>
+                ${data.tileset_url ? `
+                <div class="result-item">
+                    <span class="result-label">Streaming Tileset:</span>
+                    <a class="result-value" href="${data.tileset_url}">${data.tileset_url}</a>
+                </div>` : ''}
             </div>
         `;
         
@@ -3,10 +3,37 @@
 import os
 import json
 import io
+import gzip
+import hashlib
+import time
 import pytest
 from PIL import Image
 
 
+def wait_for_job(client, job_id, timeout=10.0):
+    """Poll a job until it finishes and return its final state."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        data = json.loads(client.get(f"/api/jobs/{job_id}").data)
+        if data["status"] in ("done", "failed"):
+            return data
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish in {timeout}s")
+
+
+def upload_and_wait(client, data):
+    """Upload images, wait for the job and return the result response."""
+    response = client.post(
+        "/api/upload",
+        data=data,
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 202
+    job_id = json.loads(response.data)["job_id"]
+    wait_for_job(client, job_id)
+    return client.get(f"/api/jobs/{job_id}/result")
+
+
 class TestFlaskApp:
     """Test suite for Flask application."""
 
@@ -26,6 +53,51 @@ class TestFlaskApp:
         assert data["service"] == "3d-mapping"
         assert "model_ready" in data
 
+    def test_liveness_endpoint(self, client):
+        """Test that the liveness probe always succeeds."""
+        response = client.get("/api/health/live")
+        assert response.status_code == 200
+        assert json.loads(response.data)["status"] == "alive"
+
+    def test_readiness_endpoint(self, client, app):
+        """Test that readiness reports the model pool and its load time."""
+        app.extensions["model_generator"].pool.wait_ready(5)
+
+        response = client.get("/api/health/ready")
+        data = json.loads(response.data)
+
+        assert response.status_code == 200
+        assert data["ready"] is True
+        assert data["model"]["state"] == "ready"
+        assert data["model"]["load_seconds"] is not None
+
+    def test_readiness_endpoint_before_warm_up(self, temp_dir):
+        """Test that readiness fails until the model is loaded."""
+        from mapping_service.app import create_app
+
+        app = create_app({
+            "TESTING": True,
+            "UPLOAD_FOLDER": os.path.join(temp_dir, "uploads"),
+            "OUTPUT_FOLDER": os.path.join(temp_dir, "outputs"),
+            "MODEL_WARMUP": "none",
+        })
+        client = app.test_client()
+
+        assert client.get("/api/health/ready").status_code == 503
+        assert json.loads(client.get("/api/health").data)["model_ready"] is False
+        assert client.get("/api/health/ready").status_code == 503
+
+    def test_stats_endpoint(self, client):
+        """Test that cache and queue statistics are exposed."""
+        response = client.get("/api/stats")
+        assert response.status_code == 200
+
+        data = json.loads(response.data)
+        assert "hits" in data["view_cache"]
+        assert "misses" in data["view_cache"]
+        assert "dedup_hits" in data["upload_store"]
+        assert "queued" in data["jobs"]
+
     def test_upload_no_files(self, client):
         """Test upload endpoint with no files."""
         response = client.post("/api/upload")
@@ -51,11 +123,7 @@ class TestFlaskApp:
         img.save(img_io, "JPEG")
         img_io.seek(0)
 
-        response = client.post(
-            "/api/upload",
-            data={"images": (img_io, "test.jpg")},
-            content_type="multipart/form-data",
-        )
+        response = upload_and_wait(client, {"images": (img_io, "test.jpg")})
         
         assert response.status_code == 200
         
@@ -75,11 +143,7 @@ class TestFlaskApp:
             img_io.seek(0)
             images.append((img_io, f"test_{i}.jpg"))
 
-        response = client.post(
-            "/api/upload",
-            data={"images": images},
-            content_type="multipart/form-data",
-        )
+        response = upload_and_wait(client, {"images": images})
         
         assert response.status_code == 200
         
@@ -88,6 +152,202 @@ class TestFlaskApp:
         assert data["num_images"] == 3
         assert data["num_views_processed"] == 3
 
+    def test_repeat_upload_reuses_cached_result(self, client):
+        """Test that reconstructing the same images twice hits the result cache."""
+        img = Image.new("RGB", (100, 100), color=(0, 255, 0))
+
+        def payload():
+            img_io = io.BytesIO()
+            img.save(img_io, "JPEG")
+            img_io.seek(0)
+            return {"images": (img_io, "same.jpg")}
+
+        first = json.loads(upload_and_wait(client, payload()).data)
+        second = json.loads(upload_and_wait(client, payload()).data)
+
+        assert first["cached"] is False
+        assert second["cached"] is True
+        stats = json.loads(client.get("/api/stats").data)
+        assert stats["result_cache"]["hits"] == 1
+
+    def test_job_events_stream(self, client):
+        """Test that a job's progress is streamed as Server-Sent Events."""
+        img_io = io.BytesIO()
+        Image.new("RGB", (100, 100), color=(255, 0, 0)).save(img_io, "JPEG")
+        img_io.seek(0)
+        response = client.post(
+            "/api/upload",
+            data={"images": (img_io, "test.jpg")},
+            content_type="multipart/form-data",
+        )
+        events_url = json.loads(response.data)["events_url"]
+
+        stream = client.get(events_url)
+        assert stream.mimetype == "text/event-stream"
+        messages = [m for m in stream.get_data(as_text=True).split("\n\n") if m.startswith("id:")]
+        events = [json.loads(m.split("data: ", 1)[1]) for m in messages]
+
+        stages = [e["stage"] for e in events if e["event"] == "stage"]
+        assert stages == ["ingest", "decode", "inference", "fusion", "export"]
+        assert events[-1]["status"] == "done"
+        assert set(events[-1]["timings"]) >= set(stages)
+
+        # Resuming after the last event returns nothing more
+        resumed = client.get(events_url, headers={"Last-Event-ID": str(events[-1]["id"])})
+        assert "id:" not in resumed.get_data(as_text=True)
+
+    def test_metrics_endpoint(self, client):
+        """Test that stage timings and download bytes are exposed as metrics."""
+        img_io = io.BytesIO()
+        Image.new("RGB", (100, 100), color=(255, 0, 0)).save(img_io, "JPEG")
+        img_io.seek(0)
+        result = json.loads(upload_and_wait(client, {"images": (img_io, "test.jpg")}).data)
+        download = client.get(result["download_url"])
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+        text = response.get_data(as_text=True)
+        assert 'mapping_jobs_total{status="done"} 1' in text
+        for stage in ("ingest", "queued", "decode", "inference", "fusion", "export"):
+            assert f'mapping_stage_seconds_count{{stage="{stage}"}} 1' in text
+        assert f'mapping_download_bytes_total{{route="model",encoding="identity"}} {len(download.data)}' in text
+        assert "mapping_upload_files_total 1" in text
+        assert 'mapping_result_cache_lookups_total{result="miss"} 1' in text
+        assert "mapping_jobs_queued 0" in text
+        assert 'mapping_http_request_seconds_count{endpoint="upload_images",method="POST",status="202"} 1' in text
+
+    def test_job_events_unknown_job(self, client):
+        """Test that streaming events of an unknown job returns 404."""
+        assert client.get("/api/jobs/missing/events").status_code == 404
+
+    def test_upload_session_end_to_end(self, client, app, sample_images):
+        """Test uploading images whole and in chunks, then committing the session."""
+        response = client.post("/api/uploads", json={"format": "glb"})
+        assert response.status_code == 201
+        session = json.loads(response.data)
+        images_url = session["images_url"]
+
+        with open(sample_images[0], "rb") as f:
+            first = f.read()
+        with open(sample_images[1], "rb") as f:
+            second = f.read()
+        assert client.put(f"{images_url}/b.jpg", data=first).status_code == 200
+        half = len(second) // 2
+        response = client.put(
+            f"{images_url}/a.jpg",
+            data=second[:half],
+            headers={"Content-Range": f"bytes 0-{half - 1}/{len(second)}"},
+        )
+        assert json.loads(response.data)["complete"] is False
+        response = client.put(
+            f"{images_url}/a.jpg",
+            data=second[half:],
+            headers={"Content-Range": f"bytes {half}-{len(second) - 1}/{len(second)}"},
+        )
+        assert json.loads(response.data)["complete"] is True
+
+        # Images are decoded while the session is still open
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            status = json.loads(client.get(session["session_url"]).data)
+            if all(part["decoded"] for part in status["parts"]):
+                break
+            time.sleep(0.01)
+        assert [part["name"] for part in status["parts"]] == ["a.jpg", "b.jpg"]
+        assert status["complete"] == 2
+
+        response = client.post(session["commit_url"])
+        assert response.status_code == 202
+        job_id = json.loads(response.data)["job_id"]
+        assert wait_for_job(client, job_id)["status"] == "done"
+        result = json.loads(client.get(f"/api/jobs/{job_id}/result").data)
+        assert result["num_views_processed"] == 2
+        assert result["output_file"].endswith(".glb")
+        assert app.extensions["upload_sessions"].image_processor.view_cache.stats()["hits"] == 2
+        assert client.get(session["session_url"]).status_code == 404
+
+    def test_upload_session_errors(self, client):
+        """Test resumption conflicts, malformed ranges and incomplete commits."""
+        assert client.put("/api/uploads/missing/images/a.jpg", data=b"x").status_code == 404
+        assert client.post("/api/uploads", json={"format": "stl"}).status_code == 400
+        session = json.loads(client.post("/api/uploads").data)
+        image_url = f"{session['images_url']}/a.jpg"
+
+        response = client.put(image_url, data=b"x" * 4, headers={"Content-Range": "bytes 0-3/10"})
+        assert response.status_code == 200
+        response = client.put(image_url, data=b"x" * 2, headers={"Content-Range": "bytes 8-9/10"})
+        assert response.status_code == 409
+        assert json.loads(response.data)["received"] == 4
+        response = client.put(image_url, data=b"x" * 2, headers={"Content-Range": "bytes 4-9/10"})
+        assert response.status_code == 400
+        response = client.put(image_url, data=b"x", headers={"Content-Range": "bytes 4-4/*"})
+        assert response.status_code == 400
+
+        response = client.post(session["commit_url"])
+        assert response.status_code == 409
+        assert json.loads(response.data)["parts"][0]["received"] == 4
+        assert client.delete(image_url).status_code == 204
+        assert client.delete(session["session_url"]).status_code == 204
+        assert client.get(session["session_url"]).status_code == 404
+
+    def test_upload_session_pinned_to_its_node(self, temp_dir):
+        """Test that nodes sharing storage redirect session requests to the owner."""
+        from mapping_service.app import create_app
+
+        config = {
+            "TESTING": True,
+            "UPLOAD_FOLDER": os.path.join(temp_dir, "uploads"),
+            "OUTPUT_FOLDER": os.path.join(temp_dir, "outputs"),
+        }
+        first = create_app({**config, "UPLOAD_SESSION_NODE": "node-a"}).test_client()
+        second = create_app({**config, "UPLOAD_SESSION_NODE": "node-b"}).test_client()
+
+        response = first.post("/api/uploads")
+        assert response.headers["X-Upload-Node"] == "node-a"
+        session = json.loads(response.data)
+
+        response = second.put(f"{session['images_url']}/a.jpg", data=b"x")
+        assert response.status_code == 421
+        assert json.loads(response.data)["node"] == "node-a"
+        assert first.get(session["session_url"]).status_code == 200
+        assert second.get("/api/uploads/missing").status_code == 404
+
+    def test_add_views_to_finished_job(self, client):
+        """Test that views can be appended to a finished reconstruction."""
+
+        def payload(color):
+            img_io = io.BytesIO()
+            Image.new("RGB", (100, 100), color=color).save(img_io, "JPEG")
+            img_io.seek(0)
+            return {"images": (img_io, "view.jpg")}
+
+        parent = json.loads(upload_and_wait(client, payload((255, 0, 0))).data)
+        response = client.post(
+            f"/api/jobs/{parent['job_id']}/views",
+            data=payload((0, 0, 255)),
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 202
+        job_id = json.loads(response.data)["job_id"]
+        assert wait_for_job(client, job_id)["status"] == "done"
+
+        result = json.loads(client.get(f"/api/jobs/{job_id}/result").data)
+        assert result["parent_job_id"] == parent["job_id"]
+        assert result["num_images"] == 1
+        assert result["num_views_processed"] == 2
+        assert client.get(result["download_url"]).status_code == 200
+
+    def test_add_views_to_unknown_job(self, client):
+        """Test that appending views to an unknown job returns 404."""
+        response = client.post(
+            "/api/jobs/missing/views",
+            data={"images": (io.BytesIO(b"data"), "view.jpg")},
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 404
+
     def test_download_generated_model(self, client):
         """Test downloading a generated model."""
         # First upload and generate a model
@@ -96,11 +356,7 @@ class TestFlaskApp:
         img.save(img_io, "JPEG")
         img_io.seek(0)
 
-        upload_response = client.post(
-            "/api/upload",
-            data={"images": (img_io, "test.jpg")},
-            content_type="multipart/form-data",
-        )
+        upload_response = upload_and_wait(client, {"images": (img_io, "test.jpg")})
         
         upload_data = json.loads(upload_response.data)
         download_url = upload_data["download_url"]
@@ -108,13 +364,278 @@ class TestFlaskApp:
         # Now download the model
         download_response = client.get(download_url)
         assert download_response.status_code == 200
-        assert b"# Mock 3D Model Output" in download_response.data
+        assert download_url.endswith(".ply")
+        assert download_response.data.startswith(b"ply\nformat binary_little_endian 1.0\n")
+
+    def test_upload_selects_output_format(self, client):
+        """Test that the format field picks the exporter."""
+        img = Image.new("RGB", (100, 100), color=(255, 0, 0))
+        img_io = io.BytesIO()
+        img.save(img_io, "JPEG")
+        img_io.seek(0)
+
+        response = upload_and_wait(client, {"images": (img_io, "test.jpg"), "format": "glb"})
+        download_url = json.loads(response.data)["download_url"]
+        download = client.get(download_url)
+
+        assert download_url.endswith(".glb")
+        assert download.mimetype == "model/gltf-binary"
+        assert download.data[:4] == b"glTF"
+
+    def test_download_supports_etag_and_range(self, client):
+        """Test strong ETags, 304 revalidation and ranged resume."""
+        img = Image.new("RGB", (100, 100), color=(255, 0, 0))
+        img_io = io.BytesIO()
+        img.save(img_io, "JPEG")
+        img_io.seek(0)
+        result = upload_and_wait(client, {"images": (img_io, "test.jpg")})
+        download_url = json.loads(result.data)["download_url"]
+
+        full = client.get(download_url)
+        etag = full.headers["ETag"]
+        assert etag == '"' + hashlib.sha256(full.data).hexdigest() + '"'
+        assert full.headers["Accept-Ranges"] == "bytes"
+
+        cached = client.get(download_url, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+
+        partial = client.get(download_url, headers={"Range": "bytes=10-19"})
+        assert partial.status_code == 206
+        assert partial.data == full.data[10:20]
+        assert partial.headers["Content-Range"] == f"bytes 10-19/{len(full.data)}"
+
+        resumed = client.get(download_url, headers={"Range": "bytes=10-", "If-Range": etag})
+        assert resumed.status_code == 206
+        stale = client.get(download_url, headers={"Range": "bytes=10-", "If-Range": '"stale"'})
+        assert stale.status_code == 200
+
+    def test_download_serves_precompressed_variant(self, client):
+        """Test that gzip-accepting clients get the pre-compressed file."""
+        img = Image.new("RGB", (100, 100), color=(255, 0, 0))
+        img_io = io.BytesIO()
+        img.save(img_io, "JPEG")
+        img_io.seek(0)
+        result = upload_and_wait(client, {"images": (img_io, "test.jpg"), "format": "obj"})
+        download_url = json.loads(result.data)["download_url"]
+
+        plain = client.get(download_url)
+        compressed = client.get(download_url, headers={"Accept-Encoding": "gzip"})
+
+        assert "Content-Encoding" not in plain.headers
+        assert compressed.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in compressed.headers["Vary"]
+        assert gzip.decompress(compressed.data) == plain.data
+        assert len(compressed.data) < len(plain.data)
+        assert compressed.headers["ETag"] != plain.headers["ETag"]
+
+    def test_tiles_endpoint(self, client):
+        """Test that the tileset and its tiles are served per job."""
+        img = Image.new("RGB", (100, 100), color=(255, 0, 0))
+        img_io = io.BytesIO()
+        img.save(img_io, "JPEG")
+        img_io.seek(0)
+        result = json.loads(upload_and_wait(client, {"images": (img_io, "test.jpg")}).data)
+
+        tileset = client.get(result["tileset_url"])
+        assert tileset.status_code == 200
+        root_uri = tileset.get_json()["root"]["content"]["uri"]
+        tile = client.get(f"/api/tiles/{result['job_id']}/{root_uri}")
+        assert tile.status_code == 200
+        assert tile.data[:4] == b"glTF"
+        assert client.get(f"/api/tiles/{result['job_id']}/missing.glb").status_code == 404
+        assert client.get(f"/api/tiles/{result['job_id']}/..%2Fmodel.ply").status_code == 404
+
+    def test_upload_rejects_unknown_format(self, client):
+        """Test that an unsupported format is rejected before queueing."""
+        img_io = io.BytesIO(b"not used")
+        response = client.post(
+            "/api/upload",
+            data={"images": (img_io, "test.jpg"), "format": "fbx"},
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 400
+
+    def test_concurrent_jobs_get_distinct_downloads(self, client):
+        """Test that each job gets its own artifact download URL."""
+        urls = []
+        for color in ((255, 0, 0), (0, 0, 255)):
+            img = Image.new("RGB", (100, 100), color=color)
+            img_io = io.BytesIO()
+            img.save(img_io, "JPEG")
+            img_io.seek(0)
+            data = json.loads(upload_and_wait(client, {"images": (img_io, "test.jpg")}).data)
+            assert data["download_url"] == f"/api/download/{data['job_id']}/{data['output_file']}"
+            urls.append(data["download_url"])
+
+        assert urls[0] != urls[1]
+        for url in urls:
+            assert client.get(url).status_code == 200
+
+    def test_download_rejects_path_traversal(self, client):
+        """Test that job ids cannot escape the output folder."""
+        response = client.get("/api/download/../model.obj")
+        assert response.status_code == 404
 
     def test_download_nonexistent_model(self, client):
         """Test downloading a non-existent model returns 404."""
         response = client.get("/api/download/nonexistent.obj")
         assert response.status_code == 404
 
+    def test_upload_returns_job_immediately(self, client):
+        """Test that upload queues a job and returns its URLs."""
+        img = Image.new("RGB", (100, 100), color=(255, 0, 0))
+        img_io = io.BytesIO()
+        img.save(img_io, "JPEG")
+        img_io.seek(0)
+
+        response = client.post(
+            "/api/upload",
+            data={"images": (img_io, "test.jpg")},
+            content_type="multipart/form-data",
+        )
+
+        assert response.status_code == 202
+        data = json.loads(response.data)
+        assert data["status_url"] == f"/api/jobs/{data['job_id']}"
+        assert data["result_url"] == f"/api/jobs/{data['job_id']}/result"
+
+        final = wait_for_job(client, data["job_id"])
+        assert final["status"] == "done"
+        assert final["progress"] == 1.0
+
+    def test_upload_invalid_image_job_fails(self, client):
+        """Test that a job with no decodable images reports failure."""
+        response = client.post(
+            "/api/upload",
+            data={"images": (io.BytesIO(b"not an image"), "bad.jpg")},
+            content_type="multipart/form-data",
+        )
+        job_id = json.loads(response.data)["job_id"]
+
+        final = wait_for_job(client, job_id)
+        assert final["status"] == "failed"
+
+        result = client.get(f"/api/jobs/{job_id}/result")
+        assert result.status_code == 500
+        assert "error" in json.loads(result.data)
+
+    def test_upload_rejected_when_queue_full(self, client, app):
+        """Test that uploads are rejected with 503 once the queue is full."""
+        job_manager = app.extensions["job_manager"]
+        job_manager.enqueue = lambda *args, **kwargs: None
+
+        response = client.post(
+            "/api/upload",
+            data={"images": (io.BytesIO(b"data"), "test.jpg")},
+            content_type="multipart/form-data",
+        )
+
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers
+
+    def test_broker_mode_runs_jobs_on_workers(self, temp_dir, sample_images):
+        """Test that with a broker the API only queues and a worker runs the job."""
+        from mapping_service.app import create_app
+        from mapping_service.broker import open_broker
+        from mapping_service.services import DEFAULT_CONFIG, create_services
+        from mapping_service.worker import Worker
+
+        config = {
+            "UPLOAD_FOLDER": os.path.join(temp_dir, "uploads"),
+            "OUTPUT_FOLDER": os.path.join(temp_dir, "outputs"),
+            "JOB_BROKER_URL": "sqlite:///" + os.path.join(temp_dir, "queue.db"),
+        }
+        app = create_app({"TESTING": True, **config})
+        client = app.test_client()
+        assert client.get("/api/health/ready").status_code == 200
+
+        with open(sample_images[0], "rb") as f:
+            response = client.post(
+                "/api/upload",
+                data={"images": (io.BytesIO(f.read()), "view.jpg")},
+                content_type="multipart/form-data",
+            )
+        assert response.status_code == 202
+        job_id = json.loads(response.data)["job_id"]
+        assert json.loads(client.get(f"/api/jobs/{job_id}").data)["status"] == "queued"
+        # Nodes sharing the upload folder never evict from it
+        store = app.extensions["upload_sessions"].image_processor.store
+        assert store.max_bytes is None
+
+        services = create_services({**DEFAULT_CONFIG, **config})
+        broker = open_broker(config["JOB_BROKER_URL"])
+        assert Worker(broker, services.pipeline).run_once() is True
+        # The API node records the outcome of jobs it queued
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            text = client.get("/metrics").get_data(as_text=True)
+            if 'mapping_jobs_total{status="done"} 1' in text:
+                break
+            time.sleep(0.02)
+        assert 'mapping_jobs_total{status="done"} 1' in text
+        assert 'mapping_stage_seconds_count{stage="inference"} 1' in text
+
+        data = json.loads(client.get(f"/api/jobs/{job_id}").data)
+        assert data["status"] == "done"
+        assert "ingest" in data["timings"]
+        result = json.loads(client.get(f"/api/jobs/{job_id}/result").data)
+        assert client.get(result["download_url"]).status_code == 200
+        stream = client.get(f"/api/jobs/{job_id}/events").get_data(as_text=True)
+        assert '"status": "done"' in stream.split("\n\n")[-2]
+        broker.close()
+
+    def test_upload_rejected_over_memory_budget(self, temp_dir):
+        """Test that images needing more than the memory budget get 413."""
+        from mapping_service.app import create_app
+
+        app = create_app({
+            "TESTING": True,
+            "UPLOAD_FOLDER": os.path.join(temp_dir, "uploads"),
+            "OUTPUT_FOLDER": os.path.join(temp_dir, "outputs"),
+            "MEMORY_BUDGET_BYTES": 1024 * 1024,
+        })
+        image = io.BytesIO()
+        Image.new("RGB", (2000, 2000)).save(image, format="PNG")
+        image.seek(0)
+
+        response = app.test_client().post(
+            "/api/upload",
+            data={"images": (image, "large.png")},
+            content_type="multipart/form-data",
+        )
+
+        assert response.status_code == 413
+        data = json.loads(response.data)
+        assert data["estimated_bytes"] > data["memory_budget_bytes"]
+        assert app.extensions["job_manager"].stats()["queued"] == 0
+        app.extensions["job_manager"].shutdown()
+
+    def test_job_status_unknown_job(self, client):
+        """Test that unknown job ids return 404."""
+        assert client.get("/api/jobs/missing").status_code == 404
+        assert client.get("/api/jobs/missing/result").status_code == 404
+
+    def test_upload_rejects_oversized_file(self, temp_dir):
+        """Test that a file over MAX_IMAGE_SIZE is rejected with 413."""
+        from mapping_service.app import create_app
+
+        app = create_app({
+            "TESTING": True,
+            "UPLOAD_FOLDER": os.path.join(temp_dir, "uploads"),
+            "OUTPUT_FOLDER": os.path.join(temp_dir, "outputs"),
+            "MAX_IMAGE_SIZE": 1024,
+        })
+
+        response = app.test_client().post(
+            "/api/upload",
+            data={"images": (io.BytesIO(b"x" * 2048), "big.jpg")},
+            content_type="multipart/form-data",
+        )
+
+        assert response.status_code == 413
+        assert "error" in json.loads(response.data)
+        assert os.listdir(os.path.join(temp_dir, "uploads")) == []
+
     def test_app_config(self, app):
         """Test that app configuration is set correctly."""
         assert app.config["TESTING"] is True
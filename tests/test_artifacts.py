@@ -0,0 +1,173 @@
+"""Tests for artifact storage helpers."""
+
+import os
+import gzip
+import time
+import hashlib
+from unittest.mock import patch
+import pytest
+import numpy as np
+from mapping_service.artifacts import (
+    ArtifactStore,
+    atomic_write,
+    available_encodings,
+    load_manifest,
+    publish_artifact,
+    save_array,
+)
+
+
+def make_job(store, job_id, size=10, age=0.0):
+    """Create a job directory with one file, backdated by age seconds."""
+    _, path = store.create_job_dir(job_id)
+    file_path = os.path.join(path, "model.obj")
+    with open(file_path, "wb") as f:
+        f.write(b"x" * size)
+    mtime = time.time() - age
+    os.utime(file_path, (mtime, mtime))
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+class TestAtomicWrite:
+    """Test suite for atomic_write and save_array."""
+
+    def test_atomic_write_replaces_file(self, temp_dir):
+        """Test that the file only changes once writing completes."""
+        path = os.path.join(temp_dir, "model.obj")
+        with atomic_write(path, "w") as f:
+            f.write("new")
+            assert not os.path.exists(path)
+
+        assert open(path).read() == "new"
+        assert os.listdir(temp_dir) == ["model.obj"]
+
+    def test_atomic_write_failure_leaves_no_file(self, temp_dir):
+        """Test that a failed write removes its temporary file."""
+        path = os.path.join(temp_dir, "model.obj")
+        with pytest.raises(RuntimeError):
+            with atomic_write(path) as f:
+                f.write(b"partial")
+                raise RuntimeError("interrupted")
+
+        assert os.listdir(temp_dir) == []
+
+    def test_save_array(self, temp_dir):
+        """Test that arrays round-trip through save_array."""
+        path = os.path.join(temp_dir, "poses.npy")
+        save_array(path, np.eye(4))
+        assert np.array_equal(np.load(path), np.eye(4))
+
+    def test_save_array_links_mapped_file(self, temp_dir):
+        """Test that a whole memory-mapped .npy file is linked, but views of it are written."""
+        source = os.path.join(temp_dir, "source.npy")
+        save_array(source, np.arange(12, dtype=np.float32).reshape(3, 4))
+        mapped = np.load(source, mmap_mode="r")
+
+        save_array(os.path.join(temp_dir, "linked.npy"), mapped)
+        save_array(os.path.join(temp_dir, "rows.npy"), mapped[1:])
+        save_array(os.path.join(temp_dir, "flat.npy"), mapped.reshape(-1))
+
+        assert os.path.samefile(source, os.path.join(temp_dir, "linked.npy"))
+        assert not os.path.samefile(source, os.path.join(temp_dir, "rows.npy"))
+        assert np.load(os.path.join(temp_dir, "rows.npy")).shape == (2, 4)
+        assert np.load(os.path.join(temp_dir, "flat.npy")).shape == (12,)
+
+
+class TestPublishArtifact:
+    """Test suite for publish_artifact and load_manifest."""
+
+    def test_records_hash_and_gzip_variant(self, temp_dir):
+        """Test that the hash is recorded and a compressible file gets a .gz variant."""
+        path = os.path.join(temp_dir, "model.obj")
+        data = b"v 0.0 0.0 0.0\n" * 1000
+        with open(path, "wb") as f:
+            f.write(data)
+
+        manifest = publish_artifact(path, ["gzip"])
+
+        assert manifest == load_manifest(path)
+        assert manifest["sha256"] == hashlib.sha256(data).hexdigest()
+        assert manifest["size"] == len(data)
+        with gzip.open(path + ".gz") as f:
+            assert f.read() == data
+        assert manifest["encodings"]["gzip"]["size"] == os.path.getsize(path + ".gz")
+
+    def test_drops_variants_that_do_not_save_space(self, temp_dir):
+        """Test that incompressible files get no variant."""
+        path = os.path.join(temp_dir, "model.ply")
+        with open(path, "wb") as f:
+            f.write(os.urandom(4096))
+
+        manifest = publish_artifact(path, ["gzip"])
+
+        assert manifest["encodings"] == {}
+        assert not os.path.exists(path + ".gz")
+
+    def test_skips_zstd_without_zstandard(self, temp_dir):
+        """Test that zstd is skipped when the optional package is missing."""
+        path = os.path.join(temp_dir, "model.obj")
+        with open(path, "wb") as f:
+            f.write(b"a" * 1000)
+
+        with patch("mapping_service.artifacts.zstandard", None):
+            assert "zstd" not in available_encodings()
+            manifest = publish_artifact(path, ["zstd", "gzip"])
+
+        assert list(manifest["encodings"]) == ["gzip"]
+
+    def test_missing_manifest(self, temp_dir):
+        """Test that unpublished files have no manifest."""
+        assert load_manifest(os.path.join(temp_dir, "missing.ply")) is None
+
+
+class TestArtifactStore:
+    """Test suite for ArtifactStore."""
+
+    def test_create_job_dir(self, temp_dir):
+        """Test that each job gets its own directory."""
+        store = ArtifactStore(temp_dir)
+
+        first_id, first = store.create_job_dir()
+        second_id, second = store.create_job_dir()
+
+        assert first_id != second_id
+        assert os.path.isdir(first) and os.path.isdir(second)
+        assert store.create_job_dir("job-1")[1] == os.path.join(temp_dir, "job-1")
+
+    def test_create_job_dir_rejects_unsafe_ids(self, temp_dir):
+        """Test that job ids cannot escape the output directory."""
+        store = ArtifactStore(temp_dir)
+        with pytest.raises(ValueError):
+            store.create_job_dir("../escape")
+
+    def test_collect_garbage_by_age(self, temp_dir):
+        """Test that expired job directories are removed."""
+        store = ArtifactStore(temp_dir, max_age_seconds=100, min_age_seconds=0)
+        old = make_job(store, "old", age=1000)
+        new = make_job(store, "new")
+
+        assert store.collect_garbage() == 1
+        assert not os.path.exists(old)
+        assert os.path.exists(new)
+
+    def test_collect_garbage_by_size(self, temp_dir):
+        """Test that the oldest directories go first over the size budget."""
+        store = ArtifactStore(temp_dir, max_bytes=25, min_age_seconds=0)
+        oldest = make_job(store, "a", age=300)
+        make_job(store, "b", age=200)
+        make_job(store, "c", age=100)
+
+        assert store.collect_garbage() == 1
+        assert not os.path.exists(oldest)
+        assert store.stats() == {"jobs": 2, "bytes": 20}
+
+    def test_collect_garbage_spares_recent_and_hidden(self, temp_dir):
+        """Test that in-progress jobs and hidden directories are kept."""
+        store = ArtifactStore(temp_dir, max_bytes=0, min_age_seconds=60)
+        recent = make_job(store, "recent")
+        hidden = os.path.join(temp_dir, ".result_cache")
+        os.makedirs(hidden)
+
+        assert store.collect_garbage() == 0
+        assert os.path.exists(recent) and os.path.exists(hidden)
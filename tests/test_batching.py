@@ -0,0 +1,142 @@
+"""Tests for BatchScheduler class."""
+
+import time
+import threading
+import pytest
+from mapping_service.batching import BatchScheduler
+
+
+def echo_batch(groups):
+    """Return each group's views unchanged, one result per group."""
+    return [list(group) for group in groups]
+
+
+class TestBatchScheduler:
+    """Test suite for BatchScheduler."""
+
+    def test_single_request(self):
+        """Test that a lone request gets its own result after the wait."""
+        scheduler = BatchScheduler(echo_batch, max_batch_size=4, max_wait_seconds=0.01)
+        try:
+            assert scheduler.infer([1, 2], timeout=5) == [1, 2]
+            assert scheduler.stats()["batches"] == 1
+        finally:
+            scheduler.shutdown()
+
+    def test_groups_concurrent_requests(self):
+        """Test that requests arriving together share one batch."""
+        calls = []
+
+        def batch_fn(groups):
+            calls.append([len(group) for group in groups])
+            return echo_batch(groups)
+
+        scheduler = BatchScheduler(batch_fn, max_batch_size=8, max_wait_seconds=0.5)
+        try:
+            futures = [scheduler.submit([i] * 2) for i in range(3)]
+            results = [future.result(timeout=5) for future in futures]
+        finally:
+            scheduler.shutdown()
+
+        assert results == [[0, 0], [1, 1], [2, 2]]
+        assert calls == [[2, 2, 2]]
+        assert scheduler.stats()["mean_batch_views"] == 6
+
+    def test_requests_queue_while_workers_busy(self):
+        """Test that requests arriving during inference form the next batch."""
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def batch_fn(groups):
+            calls.append(len(groups))
+            started.set()
+            release.wait(5)
+            return echo_batch(groups)
+
+        scheduler = BatchScheduler(
+            batch_fn, max_batch_size=8, max_wait_seconds=0.01, num_workers=1
+        )
+        try:
+            futures = [scheduler.submit([0])]
+            assert started.wait(5)
+            for i in range(1, 8):
+                futures.append(scheduler.submit([i]))
+                time.sleep(0.02)  # Longer than the wait, so they never arrive together
+            release.set()
+            results = [future.result(timeout=5) for future in futures]
+        finally:
+            release.set()
+            scheduler.shutdown()
+
+        assert results == [[i] for i in range(8)]
+        assert calls == [1, 7]
+
+    def test_respects_max_batch_size(self):
+        """Test that a request that would overflow a batch starts the next one."""
+        calls = []
+
+        def batch_fn(groups):
+            calls.append(sum(len(group) for group in groups))
+            return echo_batch(groups)
+
+        scheduler = BatchScheduler(batch_fn, max_batch_size=4, max_wait_seconds=0.2)
+        try:
+            futures = [scheduler.submit([i] * 3) for i in range(3)]
+            for future in futures:
+                future.result(timeout=5)
+        finally:
+            scheduler.shutdown()
+
+        assert calls == [3, 3, 3]
+
+    def test_oversized_request_runs_alone(self):
+        """Test that a request larger than the batch size is not split."""
+        scheduler = BatchScheduler(echo_batch, max_batch_size=2, max_wait_seconds=0.01)
+        try:
+            assert scheduler.infer(list(range(5)), timeout=5) == list(range(5))
+        finally:
+            scheduler.shutdown()
+
+    def test_error_propagates_to_every_request(self):
+        """Test that a failed batch fails each of its requests."""
+        def fail(groups):
+            raise RuntimeError("inference failed")
+
+        scheduler = BatchScheduler(fail, max_batch_size=8, max_wait_seconds=0.2)
+        try:
+            futures = [scheduler.submit([i]) for i in range(2)]
+            for future in futures:
+                with pytest.raises(RuntimeError, match="inference failed"):
+                    future.result(timeout=5)
+        finally:
+            scheduler.shutdown()
+
+    def test_result_count_mismatch_fails(self):
+        """Test that a batch function returning too few results is an error."""
+        scheduler = BatchScheduler(lambda groups: [], max_batch_size=4, max_wait_seconds=0.01)
+        try:
+            with pytest.raises(RuntimeError):
+                scheduler.infer([1], timeout=5)
+        finally:
+            scheduler.shutdown()
+
+    def test_concurrent_callers(self):
+        """Test that results are routed back to the right callers."""
+        scheduler = BatchScheduler(echo_batch, max_batch_size=6, max_wait_seconds=0.01)
+        results = {}
+
+        def call(i):
+            results[i] = scheduler.infer([i] * (i % 3 + 1), timeout=5)
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(12)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            scheduler.shutdown()
+
+        assert results == {i: [i] * (i % 3 + 1) for i in range(12)}
+        assert scheduler.stats()["requests"] == 12
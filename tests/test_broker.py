@@ -0,0 +1,288 @@
+"""Tests for the job brokers."""
+
+import os
+import time
+import pytest
+from mapping_service import broker as broker_module
+from mapping_service.broker import (
+    Broker,
+    BrokerJobManager,
+    RedisBroker,
+    SQLiteBroker,
+    open_broker,
+)
+from mapping_service.job_manager import Job
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def make_broker(request, temp_dir, monkeypatch):
+    """Return a factory of brokers sharing one SQLite file or Redis server."""
+    if request.param == "sqlite":
+        def create(**kwargs):
+            return SQLiteBroker(os.path.join(temp_dir, "queue.db"), **kwargs)
+    else:
+        pytest.importorskip("redis")
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")  # Runs the broker's Lua scripts
+        server = fakeredis.FakeServer()
+        monkeypatch.setattr(
+            broker_module.redis.Redis,
+            "from_url",
+            lambda url, **kwargs: fakeredis.FakeRedis(server=server, **kwargs),
+        )
+
+        def create(**kwargs):
+            return RedisBroker("redis://localhost:6379/0", **kwargs)
+
+    brokers = []
+
+    def make(**kwargs):
+        brokers.append(create(**kwargs))
+        return brokers[-1]
+
+    yield make
+    for broker in brokers:
+        broker.close()
+
+
+@pytest.fixture
+def broker(make_broker):
+    """Create a broker on each backend."""
+    return make_broker()
+
+
+def submit(broker, task=None, max_queued=None):
+    """Queue a job the way an API node does and return it."""
+    job = Job()
+    job.record_stage("ingest", 0.1, files=1)
+    queued = broker.submit(
+        job.id, task or {"method": "run"}, job.to_dict(), job.events_since(0, 0), max_queued
+    )
+    return job if queued else None
+
+
+class TestBrokerBackends:
+    """Test suite for SQLiteBroker and RedisBroker."""
+
+    def test_submit_and_lease(self, broker):
+        """Test that a leased job carries its task, state and events."""
+        job = submit(broker, {"method": "run", "args": [["a.jpg"]]})
+
+        lease = broker.lease("worker-1", 30)
+
+        assert lease.job_id == job.id
+        assert lease.task == {"method": "run", "args": [["a.jpg"]]}
+        assert lease.state["created_at"] == job.created_at
+        assert [e["stage"] for e in lease.events] == ["ingest"]
+        assert lease.attempts == 1
+        assert broker.get(job.id)["status"] == "running"
+        assert broker.lease("worker-2", 30) is None
+
+    def test_nodes_share_jobs(self, make_broker):
+        """Test that a job queued through one broker is leased through another."""
+        api, worker = make_broker(), make_broker()
+        job = submit(api)
+
+        lease = worker.lease("w", 30)
+        worker.finish(lease, job.to_dict(), [{"id": 2, "event": "status"}], result={})
+
+        assert lease.job_id == job.id
+        assert api.get(job.id)["status"] == "done"
+        assert [e["id"] for e in api.events(job.id)] == [1, 2]
+
+    def test_jobs_are_leased_in_order(self, broker):
+        """Test that the oldest waiting job is leased first."""
+        first = submit(broker)
+        second = submit(broker)
+
+        assert broker.lease("w", 30).job_id == first.id
+        assert broker.lease("w", 30).job_id == second.id
+
+    def test_submit_refused_when_queue_full(self, broker):
+        """Test that max_queued limits waiting jobs only."""
+        assert submit(broker, max_queued=1) is not None
+        assert submit(broker, max_queued=1) is None
+
+        broker.lease("w", 30)
+        assert submit(broker, max_queued=1) is not None
+        assert broker.stats()["queued"] == 1
+        assert broker.stats()["running"] == 1
+
+    def test_heartbeat_and_finish_publish_progress(self, broker):
+        """Test that worker updates reach readers of the job."""
+        job = submit(broker)
+        lease = broker.lease("w", 30)
+        events = [{"id": 2, "event": "status", "status": "running"}]
+
+        assert broker.heartbeat(lease, 30, {"job_id": job.id, "stage": "decode"}, events)
+        assert broker.get(job.id)["state"]["stage"] == "decode"
+        # Publishing the same events again is harmless
+        assert broker.heartbeat(lease, 30, {"job_id": job.id, "stage": "decode"}, events)
+        assert [e["id"] for e in broker.events(job.id)] == [1, 2]
+
+        final = [{"id": 3, "event": "status", "status": "done"}]
+        assert broker.finish(lease, {"job_id": job.id}, final, result={"points": 5})
+        record = broker.get(job.id)
+        assert record["status"] == "done"
+        assert record["result"] == {"points": 5}
+        assert [e["id"] for e in broker.events(job.id, after=2)] == [3]
+
+    def test_expired_lease_is_leased_again(self, broker):
+        """Test that a job whose worker stopped heartbeating is re-leased."""
+        job = submit(broker)
+        stale = broker.lease("dead-worker", 0.01)
+        time.sleep(0.02)
+
+        lease = broker.lease("live-worker", 30)
+
+        assert lease.job_id == job.id
+        assert lease.attempts == 2
+        # The first worker can no longer write to the job
+        assert not broker.heartbeat(stale, 30, {}, [])
+        assert not broker.finish(stale, {}, [], result={})
+        assert broker.finish(lease, {"job_id": job.id}, [], result={})
+
+    def test_job_fails_after_max_attempts(self, make_broker):
+        """Test that a job abandoned max_attempts times is failed after its events."""
+        broker = make_broker(max_attempts=2)
+        job = submit(broker)
+        broker.lease("dead-worker", 0.01)
+        time.sleep(0.02)
+        lease = broker.lease("stalled-worker", 0.01)
+        assert lease.attempts == 2
+        broker.heartbeat(lease, 0.01, job.to_dict(), [{"id": 2, "event": "status"}])
+        time.sleep(0.02)
+
+        assert broker.lease("w", 30) is None
+        record = broker.get(job.id)
+        assert record["status"] == "failed"
+        assert record["error"] == broker.ABANDONED_ERROR
+        events = broker.events(job.id)
+        assert [e["id"] for e in events] == [1, 2, 3]
+        assert events[-1]["status"] == "failed"
+        assert events[-1]["error"] == broker.ABANDONED_ERROR
+        assert broker.stats()["running"] == 0
+
+    def test_finished_jobs_are_pruned(self, make_broker):
+        """Test that jobs finished longer than history_seconds ago are deleted."""
+        broker = make_broker(history_seconds=0.01)
+        job = submit(broker)
+        broker.finish(broker.lease("w", 30), {}, [], result={})
+        time.sleep(0.02)
+
+        submit(broker)
+        assert broker.get(job.id) is None
+        assert broker.events(job.id) == []
+
+    def test_stats_count_live_workers(self, broker):
+        """Test that workers are counted while they keep polling."""
+        broker.worker_seen("a")
+        broker.worker_seen("b")
+
+        assert broker.stats()["workers"] == 2
+        assert broker.stats(worker_window=0)["workers"] == 0
+
+
+class TestBroker:
+    """Test suite for the Broker interface."""
+
+    def test_incomplete_backend_cannot_be_constructed(self):
+        """Test that a backend missing part of the interface fails at construction."""
+
+        class PartialBroker(Broker):
+            def submit(self, job_id, task, state, events, max_queued=None):
+                return True
+
+        with pytest.raises(TypeError):
+            PartialBroker()
+
+
+class TestOpenBroker:
+    """Test suite for open_broker."""
+
+    def test_sqlite_url(self, temp_dir):
+        """Test that sqlite URLs open a SQLite broker at the given path."""
+        path = os.path.join(temp_dir, "nested", "queue.db")
+        broker = open_broker(f"sqlite:///{path}")
+
+        assert isinstance(broker, SQLiteBroker)
+        assert os.path.exists(path)
+        broker.close()
+
+    def test_unknown_scheme(self):
+        """Test that unsupported URLs raise ValueError."""
+        with pytest.raises(ValueError):
+            open_broker("amqp://localhost")
+
+    def test_redis_needs_package(self, monkeypatch):
+        """Test that Redis URLs explain the missing optional dependency."""
+        monkeypatch.setattr(broker_module, "redis", None)
+        with pytest.raises(RuntimeError, match="redis"):
+            open_broker("redis://localhost:6379/0")
+
+
+class TestBrokerJobManager:
+    """Test suite for BrokerJobManager."""
+
+    def test_enqueue_hands_over_method_and_arguments(self, broker):
+        """Test that jobs are queued by pipeline method name."""
+
+        def run(job, file_paths, filenames=None, memory_bytes=None):
+            return {}
+
+        manager = BrokerJobManager(broker, max_queued=1)
+        job = Job()
+        remote = manager.enqueue(job, run, ["a.jpg"], ["a.jpg"], memory_bytes=10)
+
+        assert remote.id == job.id
+        assert remote.status == Job.QUEUED
+        assert broker.lease("w", 30).task == {
+            "method": "run",
+            "args": [["a.jpg"], ["a.jpg"]],
+            "kwargs": {"memory_bytes": 10},
+        }
+        assert manager.enqueue(Job(), run) is not None
+        assert manager.enqueue(Job(), run) is None
+        assert manager.get("missing") is None
+
+    def test_on_finish_reports_finished_jobs(self, broker):
+        """Test that jobs queued by the manager are reported once when they finish."""
+
+        def run(job, file_paths):
+            return {}
+
+        finished = []
+        manager = BrokerJobManager(broker, poll_seconds=0.01, on_finish=finished.append)
+        job = Job()
+        manager.enqueue(job, run, ["a.jpg"])
+        lease = broker.lease("w", 30)
+        time.sleep(0.05)
+        assert finished == []
+
+        broker.finish(lease, job.to_dict(), [], result={"num_views_processed": 1})
+        deadline = time.time() + 2
+        while not finished and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+
+        assert [j.id for j in finished] == [job.id]
+        assert finished[0].status == Job.DONE
+        manager._stop.set()
+        manager._watcher.join()
+
+    def test_remote_job_streams_events(self, broker):
+        """Test that a remote job's events arrive as a worker publishes them."""
+        manager = BrokerJobManager(broker, poll_seconds=0.01)
+        job = submit(broker)
+        remote = manager.get(job.id)
+        lease = broker.lease("w", 30)
+
+        assert remote.events_since(1, timeout=0.02) == []
+        final = [{"id": 2, "event": "status"}]
+        broker.finish(lease, {**job.to_dict(), "stage": "export"}, final, error="boom")
+
+        assert [e["id"] for e in remote.events_since(1, timeout=1)] == [2]
+        assert remote.is_finished
+        assert remote.to_dict()["status"] == "failed"
+        assert remote.to_dict()["error"] == "boom"
+        assert remote.to_dict()["stage"] == "export"
@@ -0,0 +1,147 @@
+"""Tests for ContentStore class."""
+
+import io
+import os
+import hashlib
+import pytest
+from mapping_service.content_store import ContentStore, UploadTooLargeError
+
+
+class NonSeekable(io.RawIOBase):
+    """Readable stream that cannot seek, like a raw socket."""
+
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        return self._data.read(size)
+
+
+class TestContentStore:
+    """Test suite for ContentStore."""
+
+    def test_put_stream_names_file_by_digest(self, temp_dir):
+        """Test that files are stored under the hash of their contents."""
+        store = ContentStore(temp_dir)
+        data = b"image bytes"
+
+        digest, path = store.put_stream(io.BytesIO(data), suffix=".JPG")
+
+        assert digest == hashlib.sha256(data).hexdigest()
+        assert path == os.path.join(temp_dir, digest + ".jpg")
+        with open(path, "rb") as f:
+            assert f.read() == data
+        assert store.digest_for_path(path) == digest
+
+    def test_same_name_different_content_does_not_collide(self, temp_dir):
+        """Test that two uploads never overwrite each other."""
+        store = ContentStore(temp_dir)
+
+        _, first = store.put_stream(io.BytesIO(b"first"), suffix=".jpg")
+        _, second = store.put_stream(io.BytesIO(b"second"), suffix=".jpg")
+
+        assert first != second
+        with open(first, "rb") as f:
+            assert f.read() == b"first"
+
+    def test_duplicate_upload_is_deduplicated(self, temp_dir):
+        """Test that identical content is stored once."""
+        store = ContentStore(temp_dir)
+
+        _, first = store.put_stream(io.BytesIO(b"same"), suffix=".png")
+        mtime = os.stat(first).st_mtime_ns
+        _, second = store.put_stream(NonSeekable(b"same"), suffix=".png")
+        _, third = store.put_stream(io.BytesIO(b"same"), suffix=".png")
+
+        assert first == second == third
+        assert os.stat(first).st_mtime_ns == mtime
+        assert store.stats()["files"] == 1
+        assert store.stats()["dedup_hits"] == 2
+        assert len(os.listdir(temp_dir)) == 1
+
+    def test_size_limit_enforced_while_streaming(self, temp_dir):
+        """Test that oversized streams are rejected without leftovers."""
+        store = ContentStore(temp_dir)
+
+        for stream in (io.BytesIO(b"x" * 100), NonSeekable(b"x" * 100)):
+            with pytest.raises(UploadTooLargeError):
+                store.put_stream(stream, suffix=".jpg", max_size=10, chunk_size=4)
+
+        assert os.listdir(temp_dir) == []
+
+    def test_eviction_skips_referenced_files(self, temp_dir):
+        """Test that only unreferenced files are evicted, oldest first."""
+        store = ContentStore(temp_dir, max_bytes=25)
+
+        _, a = store.put_stream(io.BytesIO(b"a" * 10))
+        _, b = store.put_stream(io.BytesIO(b"b" * 10))
+        store.release(a)
+        _, c = store.put_stream(io.BytesIO(b"c" * 10))
+
+        assert not os.path.exists(a)
+        assert os.path.exists(b) and os.path.exists(c)
+        assert store.stats()["evictions"] == 1
+
+        store.release(b)
+        store.release(c)
+        assert store.stats()["bytes"] <= 25
+
+    def test_acquire_and_release(self, temp_dir):
+        """Test explicit reference counting."""
+        store = ContentStore(temp_dir, max_bytes=0)
+
+        _, path = store.put_stream(io.BytesIO(b"data"))
+        assert store.acquire(path) is True
+        store.release(path)
+        assert os.path.exists(path)
+
+        store.release(path)
+        assert not os.path.exists(path)
+        assert store.acquire(path) is False
+
+    def test_index_rebuilt_on_restart(self, temp_dir):
+        """Test that existing files are indexed and stale temp files removed."""
+        store = ContentStore(temp_dir)
+        _, path = store.put_stream(io.BytesIO(b"persisted"), suffix=".jpg")
+        for name in (".tmp-partial", ".tmp-in-flight"):
+            with open(os.path.join(temp_dir, name), "wb") as f:
+                f.write(b"partial")
+        os.utime(os.path.join(temp_dir, ".tmp-partial"), (0, 0))
+
+        reopened = ContentStore(temp_dir)
+        _, again = reopened.put_stream(io.BytesIO(b"persisted"), suffix=".jpg")
+
+        assert again == path
+        assert reopened.stats()["dedup_hits"] == 1
+        assert not os.path.exists(os.path.join(temp_dir, ".tmp-partial"))
+        # Another node may still be writing a recent temp file
+        assert os.path.exists(os.path.join(temp_dir, ".tmp-in-flight"))
+
+    def test_file_deleted_by_another_store_is_rewritten(self, temp_dir):
+        """Test that a dedup hit on a file removed elsewhere writes it again."""
+        first = ContentStore(temp_dir, max_bytes=0)
+        _, path = first.put_stream(io.BytesIO(b"shared"), suffix=".jpg")
+        second = ContentStore(temp_dir)
+        first.release(path)
+        assert not os.path.exists(path)
+
+        for stream in (io.BytesIO(b"shared"), NonSeekable(b"shared")):
+            _, again = second.put_stream(stream, suffix=".jpg")
+            assert again == path
+            with open(path, "rb") as f:
+                assert f.read() == b"shared"
+            os.remove(path)
+
+        assert second.stats()["files"] == 1
+        assert second.stats()["bytes"] == len(b"shared")
+        assert second.stats()["referenced"] == 1
+        assert second.stats()["dedup_hits"] == 0
+
+    def test_digest_for_path_outside_store(self, temp_dir):
+        """Test that foreign paths have no digest."""
+        store = ContentStore(os.path.join(temp_dir, "store"))
+        assert store.digest_for_path(os.path.join(temp_dir, "a" * 64)) is None
+        assert store.digest_for_path(os.path.join(store.root, "photo.jpg")) is None
@@ -0,0 +1,157 @@
+"""Tests for the model exporters."""
+
+import io
+import json
+import struct
+import numpy as np
+from mapping_service.exporters import (
+    available_formats,
+    exporter_for_path,
+    get_exporter,
+    write_glb,
+    write_obj,
+    write_ply,
+)
+from mapping_service.pointcloud import PointCloud
+
+
+def make_cloud(normals=True):
+    """A three-point colored cloud."""
+    return PointCloud(
+        points=np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0]], dtype=np.float32),
+        colors=np.array([[255, 0, 0], [0, 255, 0], [0, 0, 255]], dtype=np.uint8),
+        normals=np.tile(np.array([0, 0, 1], dtype=np.float32), (3, 1)) if normals else None,
+    )
+
+
+def split_ply(data):
+    """Return the header lines and binary body of a PLY file."""
+    header, body = data.split(b"end_header\n", 1)
+    return header.decode().splitlines(), body
+
+
+class TestRegistry:
+    """Test suite for exporter lookup."""
+
+    def test_builtin_formats(self):
+        """Test that OBJ, PLY and GLB are registered."""
+        assert available_formats() == ["glb", "obj", "ply"]
+        assert get_exporter("GLB").extension == ".glb"
+        assert get_exporter("fbx") is None
+
+    def test_exporter_for_path(self):
+        """Test lookup by file extension."""
+        assert exporter_for_path("model.PLY").name == "ply"
+        assert exporter_for_path("model.txt") is None
+
+
+class TestWritePly:
+    """Test suite for write_ply."""
+
+    def test_vertex_layout(self):
+        """Test that vertices are written as packed little-endian records."""
+        f = io.BytesIO()
+        write_ply(f, make_cloud())
+
+        header, body = split_ply(f.getvalue())
+        assert header[1] == "format binary_little_endian 1.0"
+        assert "element vertex 3" in header
+        assert header.count("property uchar red") == 1
+        # 6 floats and 3 bytes per vertex
+        assert len(body) == 3 * (6 * 4 + 3)
+        x, y, z = struct.unpack_from("<fff", body, 27)
+        assert (x, y, z) == (1.0, 0.0, 0.0)
+        assert tuple(body[27 + 24:27 + 27]) == (0, 255, 0)
+
+    def test_faces(self):
+        """Test that faces are written as uchar-counted int lists."""
+        f = io.BytesIO()
+        write_ply(f, make_cloud(normals=False), faces=np.array([[0, 1, 2]]))
+
+        header, body = split_ply(f.getvalue())
+        assert "element face 1" in header
+        assert body[-13:] == struct.pack("<Biii", 3, 0, 1, 2)
+
+
+class TestWriteGlb:
+    """Test suite for write_glb."""
+
+    def parse(self, data):
+        """Return the JSON document and binary chunk of a GLB file."""
+        magic, version, length = struct.unpack_from("<III", data)
+        assert (magic, version, length) == (0x46546C67, 2, len(data))
+        json_length, _ = struct.unpack_from("<II", data, 12)
+        document = json.loads(data[20:20 + json_length])
+        bin_length, _ = struct.unpack_from("<II", data, 20 + json_length)
+        binary = data[28 + json_length:28 + json_length + bin_length]
+        return document, binary
+
+    def test_point_cloud(self):
+        """Test that a cloud becomes a points primitive with aligned buffers."""
+        f = io.BytesIO()
+        write_glb(f, make_cloud())
+
+        document, binary = self.parse(f.getvalue())
+        primitive = document["meshes"][0]["primitives"][0]
+        assert primitive["mode"] == 0
+        assert set(primitive["attributes"]) == {"POSITION", "NORMAL", "COLOR_0"}
+        position = document["accessors"][primitive["attributes"]["POSITION"]]
+        assert position["max"] == [1.0, 1.0, 0.0]
+        for view in document["bufferViews"]:
+            assert view["byteOffset"] % 4 == 0
+        view = document["bufferViews"][position["bufferView"]]
+        points = np.frombuffer(binary, "<f4", 9, view["byteOffset"]).reshape(3, 3)
+        assert np.array_equal(points, make_cloud().points)
+
+    def test_mesh(self):
+        """Test that faces become a triangles primitive with indices."""
+        f = io.BytesIO()
+        write_glb(f, make_cloud(), faces=np.array([[0, 1, 2]]))
+
+        document, _ = self.parse(f.getvalue())
+        primitive = document["meshes"][0]["primitives"][0]
+        assert primitive["mode"] == 4
+        assert document["accessors"][primitive["indices"]]["count"] == 3
+
+
+    def test_empty_cloud(self):
+        """Test that an empty cloud is a valid scene without mesh or buffers."""
+        f = io.BytesIO()
+        write_glb(f, PointCloud(np.zeros((0, 3), dtype=np.float32)))
+
+        data = f.getvalue()
+        magic, version, length = struct.unpack_from("<III", data)
+        assert (magic, version, length) == (0x46546C67, 2, len(data))
+        json_length, _ = struct.unpack_from("<II", data, 12)
+        assert len(data) == 20 + json_length
+        document = json.loads(data[20:])
+        assert document["scenes"] == [{}]
+        assert not {"meshes", "accessors", "bufferViews", "buffers"} & set(document)
+
+    def test_binary_chunk_length_matches_padded_buffers(self):
+        """Test that buffers written one by one fill the declared binary chunk."""
+        cloud = PointCloud(
+            points=np.zeros((5, 3), dtype=np.float32),
+            colors=np.zeros((5, 3), dtype=np.uint8),
+        )
+        f = io.BytesIO()
+        write_glb(f, cloud, faces=np.array([[0, 1, 2]]))
+
+        document, binary = self.parse(f.getvalue())
+        assert len(binary) == document["buffers"][0]["byteLength"] == 60 + 20 + 12
+        last = document["bufferViews"][-1]
+        indices = np.frombuffer(binary, "<u4", 3, last["byteOffset"])
+        assert indices.tolist() == [0, 1, 2]
+
+
+class TestWriteObj:
+    """Test suite for write_obj."""
+
+    def test_vertices_and_faces(self):
+        """Test that OBJ output holds colored vertices and 1-based faces."""
+        f = io.BytesIO()
+        write_obj(f, make_cloud(normals=False), faces=np.array([[0, 1, 2]]))
+
+        lines = f.getvalue().decode().splitlines()
+        assert lines[2] == "v 0.000000 0.000000 0.000000 1.0000 0.0000 0.0000"
+        assert lines[-1] == "f 1 2 3"
@@ -1,10 +1,11 @@
 """Tests for ImageProcessor class."""
 
+import io
 import os
 import pytest
 from PIL import Image
 import numpy as np
-from mapping_service.image_processor import ImageProcessor
+from mapping_service.image_processor import ImageProcessor, UploadTooLargeError
 
 
 class TestImageProcessor:
@@ -111,3 +112,255 @@ class TestImageProcessor:
         # Should be saved in the upload directory only
         assert upload_dir in saved_path
         assert os.path.dirname(saved_path) == upload_dir
+
+    def test_save_uploaded_stream(self, temp_dir):
+        """Test streaming an uploaded file to disk in chunks."""
+        upload_dir = os.path.join(temp_dir, "uploads")
+        processor = ImageProcessor(upload_dir)
+        processor.CHUNK_SIZE = 4
+
+        test_data = b"streamed image data"
+        saved_path = processor.save_uploaded_stream(io.BytesIO(test_data), "stream.jpg")
+
+        assert os.path.dirname(saved_path) == upload_dir
+        with open(saved_path, "rb") as f:
+            assert f.read() == test_data
+
+    def test_save_uploaded_stream_enforces_size_limit(self, temp_dir):
+        """Test that oversized streams are rejected without leaving files behind."""
+        upload_dir = os.path.join(temp_dir, "uploads")
+        processor = ImageProcessor(upload_dir, max_image_size=10)
+        processor.CHUNK_SIZE = 4
+
+        with pytest.raises(UploadTooLargeError):
+            processor.save_uploaded_stream(io.BytesIO(b"x" * 11), "big.jpg")
+
+        assert os.listdir(upload_dir) == []
+
+    def test_decode_image_valid(self, sample_image_path):
+        """Test that decode_image returns the decoded array."""
+        processor = ImageProcessor()
+        result = processor.decode_image(sample_image_path)
+
+        assert result.ok
+        assert result.reason is None
+        assert result.img.shape == (100, 100, 3)
+
+    def test_decode_image_rejection_reasons(self, temp_dir):
+        """Test that decode_image reports why a file was rejected."""
+        processor = ImageProcessor(max_image_size=1024)
+
+        text_path = os.path.join(temp_dir, "notes.txt")
+        corrupt_path = os.path.join(temp_dir, "corrupt.jpg")
+        large_path = os.path.join(temp_dir, "large.png")
+        with open(text_path, "w") as f:
+            f.write("Not an image")
+        with open(corrupt_path, "wb") as f:
+            f.write(b"\xff\xd8 truncated")
+        Image.fromarray(
+            np.random.randint(0, 255, (64, 64, 3), dtype=np.uint8)
+        ).save(large_path)
+
+        assert processor.decode_image(text_path).reason == ImageProcessor.REJECT_UNSUPPORTED_FORMAT
+        assert processor.decode_image(corrupt_path).reason == ImageProcessor.REJECT_DECODE_ERROR
+        assert processor.decode_image(large_path).reason == ImageProcessor.REJECT_TOO_LARGE
+        assert (
+            processor.decode_image(os.path.join(temp_dir, "missing.jpg")).reason
+            == ImageProcessor.REJECT_MISSING
+        )
+
+    def test_preprocess_images_with_report(self, sample_images, temp_dir):
+        """Test that rejected files are reported alongside the views."""
+        invalid_path = os.path.join(temp_dir, "invalid.txt")
+        with open(invalid_path, "w") as f:
+            f.write("Not an image")
+
+        processor = ImageProcessor()
+        views, rejected = processor.preprocess_images_with_report(sample_images + [invalid_path])
+
+        assert [v["file_path"] for v in views] == sample_images
+        assert len(rejected) == 1
+        assert rejected[0]["file_path"] == invalid_path
+        assert rejected[0]["reason"] == ImageProcessor.REJECT_UNSUPPORTED_FORMAT
+
+    def test_init_rejects_unknown_executor(self):
+        """Test that an unknown executor name raises ValueError."""
+        with pytest.raises(ValueError):
+            ImageProcessor(executor="gpu")
+
+    def test_parallel_preprocess_preserves_order(self, temp_dir):
+        """Test that concurrent decoding keeps views in input order."""
+        paths = []
+        for i in range(12):
+            path = os.path.join(temp_dir, f"view_{i}.png")
+            Image.new("RGB", (20 + i, 10), color=(i, 0, 0)).save(path)
+            paths.append(path)
+
+        processor = ImageProcessor(max_workers=4)
+        views = processor.preprocess_images(paths)
+
+        assert [v["file_path"] for v in views] == paths
+        assert [v["img"].shape[1] for v in views] == [20 + i for i in range(12)]
+
+    def test_process_executor_decodes_via_shared_memory(self, sample_images, temp_dir):
+        """Test decoding in worker processes with invalid files mixed in."""
+        invalid_path = os.path.join(temp_dir, "invalid.txt")
+        with open(invalid_path, "w") as f:
+            f.write("Not an image")
+
+        processor = ImageProcessor(max_workers=2, executor="process")
+        views, rejected = processor.preprocess_images_with_report(
+            [sample_images[0], invalid_path, sample_images[1]]
+        )
+
+        assert [v["file_path"] for v in views] == sample_images[:2]
+        assert views[0]["img"].shape == (100, 100, 3)
+        assert rejected[0]["reason"] == ImageProcessor.REJECT_UNSUPPORTED_FORMAT
+
+    def test_process_executor_reuses_one_pool(self, sample_images):
+        """Test that jobs share long-lived decode processes that are not forked."""
+        processor = ImageProcessor(max_workers=2, executor="process")
+        try:
+            processor.preprocess_images(sample_images)
+            pool = processor._process_pool
+            processor.preprocess_images(sample_images)
+
+            assert processor._process_pool is pool
+            assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+        finally:
+            processor.shutdown()
+        assert processor._process_pool is None
+
+    def test_process_executor_decodes_into_arena(self, temp_dir):
+        """Test that worker processes decode straight into a shared arena."""
+        from mapping_service.shared_views import ViewArena
+
+        paths = []
+        for i, size in enumerate([(400, 200), (60, 90)]):
+            path = os.path.join(temp_dir, f"view_{i}.jpg")
+            Image.new("RGB", size, color=(0, 50 * i, 0)).save(path)
+            paths.append(path)
+        with ViewArena.allocate([]) as probe:
+            arena_dir = os.path.dirname(probe.path)
+        before = {name for name in os.listdir(arena_dir) if name.endswith(".arena")}
+
+        processor = ImageProcessor(max_workers=2, executor="process", max_long_edge=100)
+        views = processor.preprocess_images(paths)
+
+        assert [v["img"].shape for v in views] == [(50, 100, 3), (90, 60, 3)]
+        # Backed by the arena's mapping rather than copied out
+        assert all(not v["img"].flags.owndata for v in views)
+        processor.shutdown()
+        assert {name for name in os.listdir(arena_dir) if name.endswith(".arena")} == before
+
+    def test_process_executor_caches_copies_of_arena_views(self, temp_dir, sample_images):
+        """Test that cached views do not keep a decode arena mapped."""
+        from mapping_service.view_cache import ViewCache
+
+        cache = ViewCache(max_bytes=16 * 1024 * 1024)
+        processor = ImageProcessor(max_workers=2, executor="process", view_cache=cache)
+        views = processor.preprocess_images(sample_images)
+
+        assert all(v["img"].flags.owndata for v in views)
+        cached = processor.preprocess_images(sample_images)
+        assert cache.stats()["hits"] == len(sample_images)
+        assert all(v["img"].flags.owndata for v in cached)
+        assert cache.stats()["bytes"] == sum(v["img"].nbytes for v in views)
+
+    def test_decode_image_downscales_to_max_long_edge(self, temp_dir):
+        """Test that large JPEGs are decoded at a reduced size."""
+        path = os.path.join(temp_dir, "large.jpg")
+        Image.new("RGB", (1600, 1200), color=(0, 128, 255)).save(path)
+
+        processor = ImageProcessor(max_long_edge=400)
+        result = processor.decode_image(path)
+
+        assert result.img.shape == (300, 400, 3)
+        assert result.scale == 0.25
+        assert result.original_size == (1600, 1200)
+
+    def test_decode_image_downscales_png(self, temp_dir):
+        """Test that non-JPEG formats are resized without draft decoding."""
+        path = os.path.join(temp_dir, "large.png")
+        Image.new("RGB", (300, 150), color=(0, 128, 255)).save(path)
+
+        processor = ImageProcessor(max_long_edge=100)
+        result = processor.decode_image(path)
+
+        assert result.img.shape == (50, 100, 3)
+        assert result.scale == pytest.approx(1 / 3)
+
+    def test_decode_image_keeps_small_images(self, sample_image_path):
+        """Test that images within max_long_edge are left at full size."""
+        processor = ImageProcessor(max_long_edge=1024)
+        result = processor.decode_image(sample_image_path)
+
+        assert result.img.shape == (100, 100, 3)
+        assert result.scale == 1.0
+
+    def test_preprocess_records_scale_in_view(self, temp_dir):
+        """Test that views carry the applied scale and original size."""
+        path = os.path.join(temp_dir, "large.jpg")
+        Image.new("RGB", (800, 400), color=(10, 20, 30)).save(path)
+
+        processor = ImageProcessor(max_long_edge=200)
+        views = processor.preprocess_images([path])
+
+        assert views[0]["img"].shape == (100, 200, 3)
+        assert views[0]["scale"] == 0.25
+        assert views[0]["original_size"] == (800, 400)
+
+    def test_save_uploaded_file_same_name_does_not_overwrite(self, temp_dir):
+        """Test that two uploads with the same filename are both kept."""
+        processor = ImageProcessor(os.path.join(temp_dir, "uploads"))
+
+        first = processor.save_uploaded_file(b"first client", "IMG_0001.jpg")
+        second = processor.save_uploaded_file(b"second client", "IMG_0001.jpg")
+
+        assert first != second
+        with open(first, "rb") as f:
+            assert f.read() == b"first client"
+
+    def test_preprocess_uses_view_cache(self, sample_images, temp_dir):
+        """Test that repeated preprocessing is served from the view cache."""
+        from mapping_service.view_cache import ViewCache
+
+        cache = ViewCache()
+        processor = ImageProcessor(os.path.join(temp_dir, "uploads"), view_cache=cache)
+
+        first = processor.preprocess_images(sample_images)
+        second = processor.preprocess_images(sample_images)
+
+        assert cache.stats()["misses"] == 3
+        assert cache.stats()["hits"] == 3
+        for a, b in zip(first, second):
+            assert a["content_hash"] == b["content_hash"]
+            assert np.array_equal(a["img"], b["img"])
+            assert a["scale"] == b["scale"]
+
+    def test_content_hash_of_stored_upload(self, sample_image_path, temp_dir):
+        """Test that stored uploads and external files hash identically."""
+        processor = ImageProcessor(os.path.join(temp_dir, "uploads"))
+        with open(sample_image_path, "rb") as f:
+            stored = processor.save_uploaded_stream(f, "view.jpg")
+
+        assert processor.content_hash(stored) == processor.content_hash(sample_image_path)
+        assert processor.content_hash(os.path.join(temp_dir, "missing.jpg")) is None
+
+    def test_estimate_memory_from_headers(self, temp_dir):
+        """Test that memory is estimated from image sizes without decoding."""
+        large = os.path.join(temp_dir, "large.jpg")
+        Image.new("RGB", (800, 400)).save(large)
+        small = os.path.join(temp_dir, "small.png")
+        Image.new("RGB", (100, 50)).save(small)
+        invalid = os.path.join(temp_dir, "invalid.jpg")
+        with open(invalid, "wb") as f:
+            f.write(b"not an image")
+
+        processor = ImageProcessor(max_long_edge=200, max_workers=1)
+        estimate, shapes = processor.estimate_memory([large, small, invalid])
+
+        assert shapes.tolist() == [[100, 200], [50, 100]]
+        # Decoded views plus one full-size decode buffer at a time
+        decoded = (100 * 200 + 50 * 100) * 3
+        assert estimate == decoded + 800 * 400 * ImageProcessor.DECODE_BYTES_PER_PIXEL
@@ -0,0 +1,196 @@
+"""Tests for JobManager class."""
+
+import threading
+from mapping_service.job_manager import Job, JobManager
+
+
+class TestJobManager:
+    """Test suite for JobManager."""
+
+    def test_submit_runs_job(self):
+        """Test that a submitted job runs and stores its result."""
+        manager = JobManager(max_workers=1)
+
+        job = manager.submit(lambda job, x: {"value": x * 2}, 21)
+
+        assert job is not None
+        assert job.wait(5)
+        assert job.status == Job.DONE
+        assert job.result == {"value": 42}
+        assert job.progress == 1.0
+        manager.shutdown()
+
+    def test_failed_job_records_error(self):
+        """Test that exceptions mark the job as failed."""
+        manager = JobManager(max_workers=1)
+
+        def fail(job):
+            raise ValueError("boom")
+
+        job = manager.submit(fail)
+
+        assert job.wait(5)
+        assert job.status == Job.FAILED
+        assert job.error == "boom"
+        assert job.result is None
+        manager.shutdown()
+
+    def test_job_reports_progress(self):
+        """Test that jobs can report their stage and progress."""
+        manager = JobManager(max_workers=1)
+        release = threading.Event()
+
+        def work(job):
+            job.update(stage="working", progress=0.5)
+            release.wait(5)
+            return {}
+
+        job = manager.submit(work)
+        for _ in range(100):
+            if job.stage == "working":
+                break
+            release.wait(0.01)
+
+        snapshot = job.to_dict()
+        assert snapshot["status"] == Job.RUNNING
+        assert snapshot["stage"] == "working"
+        assert snapshot["progress"] == 0.5
+
+        release.set()
+        assert job.wait(5)
+        manager.shutdown()
+
+    def test_submit_rejects_when_queue_full(self):
+        """Test admission control once the queue is full."""
+        manager = JobManager(max_workers=1, max_queued=1)
+        release = threading.Event()
+        started = threading.Event()
+
+        def block(job):
+            started.set()
+            release.wait(5)
+            return {}
+
+        running = manager.submit(block)
+        assert started.wait(5)
+        queued = manager.submit(block)
+
+        assert queued is not None
+        assert manager.queue_depth() == 1
+        assert manager.submit(block) is None
+
+        release.set()
+        assert running.wait(5) and queued.wait(5)
+        manager.shutdown()
+
+    def test_get_unknown_job(self):
+        """Test that unknown job ids return None."""
+        manager = JobManager()
+        assert manager.get("missing") is None
+
+    def test_finished_jobs_are_pruned(self):
+        """Test that only the most recent finished jobs are retained."""
+        manager = JobManager(max_workers=1, max_finished=2)
+
+        jobs = [manager.submit(lambda job: {}) for _ in range(3)]
+        for job in jobs:
+            assert job.wait(5)
+        manager.shutdown()
+
+        assert manager.get(jobs[0].id) is None
+        assert manager.get(jobs[2].id) is jobs[2]
+
+    def test_update_clamps_progress(self):
+        """Test that progress is clamped to the [0, 1] range."""
+        job = Job()
+        job.update(progress=1.5)
+        assert job.progress == 1.0
+        job.update(progress=-1)
+        assert job.progress == 0.0
+
+    def test_stats(self):
+        """Test the queue and worker summary."""
+        manager = JobManager(max_workers=3)
+        assert manager.stats() == {"queued": 0, "running": 0, "workers": 3}
+
+
+class TestJobEvents:
+    """Test suite for the Job event log."""
+
+    def test_events_record_stages_and_timings(self):
+        """Test that stage changes emit progress and duration events."""
+        manager = JobManager(max_workers=1)
+
+        def work(job):
+            job.update(stage="decode", progress=0.1, images=2)
+            job.update(stage="export", progress=0.8)
+            return {}
+
+        job = Job()
+        job.record_stage("ingest", 0.5, files=2)
+        assert manager.enqueue(job, work) is job
+        assert job.wait(5)
+
+        events = job.events_since(0)
+        assert [event["id"] for event in events] == list(range(1, len(events) + 1))
+        assert [(event["event"], event.get("stage") or event.get("status")) for event in events] == [
+            ("stage", "ingest"),
+            ("status", Job.RUNNING),
+            ("progress", "decode"),
+            ("stage", "decode"),
+            ("progress", "export"),
+            ("stage", "export"),
+            ("status", Job.DONE),
+        ]
+        assert events[2]["images"] == 2
+        assert set(events[-1]["timings"]) == {"ingest", "queued", "decode", "export"}
+        assert job.to_dict()["timings"]["ingest"] == 0.5
+        manager.shutdown()
+
+    def test_events_since_waits_for_new_events(self):
+        """Test that events_since blocks until an event arrives."""
+        job = Job()
+        timer = threading.Timer(0.05, job.update, kwargs={"stage": "decode"})
+        timer.start()
+
+        events = job.events_since(0, timeout=5)
+
+        assert [event["stage"] for event in events] == ["decode"]
+        assert job.events_since(1, timeout=0.01) == []
+        timer.join()
+
+    def test_events_since_returns_when_finished(self):
+        """Test that waiting on a finished job does not block."""
+        job = Job()
+        job._finish(result={})
+        last_id = job.events_since(0)[-1]["id"]
+
+        assert job.events_since(last_id, timeout=5) == []
+
+    def test_run_records_result_or_error(self):
+        """Test that run marks the job done or failed instead of raising."""
+        job = Job()
+        job.run(lambda job, value: {"value": value}, 3)
+        assert job.status == Job.DONE
+        assert job.result == {"value": 3}
+
+        def fail(job):
+            raise RuntimeError("boom")
+
+        failed = Job()
+        failed.run(fail)
+        assert failed.status == Job.FAILED
+        assert failed.error == "boom"
+
+    def test_restore_continues_event_log(self):
+        """Test that a restored job keeps its id, timings and event ids."""
+        job = Job()
+        job.record_stage("ingest", 0.5)
+
+        restored = Job.restore(job.to_dict(), job.events_since(0, timeout=0))
+        restored.run(lambda job: {})
+
+        assert restored.id == job.id
+        assert restored.created_at == job.created_at
+        assert restored.timings["ingest"] == 0.5
+        assert [e["id"] for e in restored.events_since(0)] == [1, 2, 3]
@@ -0,0 +1,91 @@
+"""Tests for MemoryBudget class."""
+
+import threading
+import time
+import pytest
+from mapping_service.memory_budget import MemoryBudget, MemoryBudgetExceeded, default_memory_budget
+
+
+class TestMemoryBudget:
+    """Test suite for MemoryBudget."""
+
+    def test_grants_reservations_that_fit(self):
+        """Test that reservations are granted until the budget is used up."""
+        budget = MemoryBudget(100)
+
+        assert budget.try_acquire(60) is True
+        assert budget.try_acquire(60) is False
+        assert budget.try_acquire(40) is True
+        assert budget.stats()["reserved"] == 100
+
+        budget.release(60)
+        assert budget.stats()["reserved"] == 40
+
+    def test_rejects_non_positive_capacity(self):
+        """Test that a budget must be positive."""
+        with pytest.raises(ValueError):
+            MemoryBudget(0)
+
+    def test_refuses_reservation_larger_than_budget(self):
+        """Test that a reservation that can never fit raises at once."""
+        budget = MemoryBudget(100)
+
+        with pytest.raises(MemoryBudgetExceeded):
+            budget.acquire(101)
+        assert budget.stats()["refused"] == 1
+
+    def test_acquire_times_out(self):
+        """Test that acquire returns False when the budget stays full."""
+        budget = MemoryBudget(100)
+        budget.try_acquire(100)
+
+        assert budget.acquire(10, timeout=0.05) is False
+        stats = budget.stats()
+        assert stats["timeouts"] == 1
+        assert stats["waiting"] == 0
+
+    def test_waiter_is_granted_after_release(self):
+        """Test that a waiting reservation is granted once memory is released."""
+        budget = MemoryBudget(100)
+        budget.try_acquire(80)
+        granted = []
+        waiter = threading.Thread(target=lambda: granted.append(budget.acquire(50, timeout=5)))
+        waiter.start()
+
+        time.sleep(0.05)
+        assert budget.stats()["waiting"] == 1
+        budget.release(80)
+        waiter.join(5)
+
+        assert granted == [True]
+        assert budget.stats()["reserved"] == 50
+
+    def test_waiters_are_granted_in_order(self):
+        """Test that a small request does not overtake a waiting large one."""
+        budget = MemoryBudget(100)
+        budget.try_acquire(60)
+        large = threading.Thread(target=budget.acquire, args=(80, 5))
+        large.start()
+        time.sleep(0.05)
+
+        # 30 bytes would fit, but the large request is waiting first
+        assert budget.try_acquire(30) is False
+        budget.release(60)
+        large.join(5)
+        assert budget.stats()["reserved"] == 80
+
+    def test_reserve_releases_on_exit(self):
+        """Test that the context manager returns its reservation."""
+        budget = MemoryBudget(100)
+
+        with budget.reserve(70):
+            assert budget.stats()["reserved"] == 70
+        assert budget.stats()["reserved"] == 0
+
+    def test_default_budget_is_positive(self):
+        """Test that the default budget is a share of available memory."""
+        half = default_memory_budget()
+        if half is None:
+            pytest.skip("Available memory cannot be determined here")
+        assert half > 0
+        assert default_memory_budget(0.25) <= half
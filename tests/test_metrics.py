@@ -0,0 +1,121 @@
+"""Tests for the metrics module."""
+
+import pytest
+from mapping_service.job_manager import Job
+from mapping_service.metrics import (
+    MetricsRegistry,
+    ServiceMetrics,
+    _Metric,
+    counter_family,
+    current_rss_bytes,
+    gauge_family,
+)
+
+
+class TestMetricsRegistry:
+    """Test suite for MetricsRegistry."""
+
+    def test_counter_renders_total(self):
+        """Test that counters render with a _total suffix per label set."""
+        registry = MetricsRegistry(namespace="test")
+        counter = registry.counter("bytes", "Bytes sent", ("route",))
+        counter.inc(10, route="model")
+        counter.inc(5, route="model")
+        counter.inc(1, route="tile")
+
+        text = registry.render()
+
+        assert "# TYPE test_bytes counter" in text
+        assert 'test_bytes_total{route="model"} 15' in text
+        assert 'test_bytes_total{route="tile"} 1' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that histogram buckets, sum and count are rendered."""
+        registry = MetricsRegistry(namespace="test")
+        histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value)
+
+        text = registry.render()
+
+        assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'test_latency_seconds_bucket{le="1"} 3' in text
+        assert 'test_latency_seconds_bucket{le="+Inf"} 4' in text
+        assert "test_latency_seconds_sum 6.05" in text
+        assert "test_latency_seconds_count 4" in text
+
+    def test_labels_are_checked_and_escaped(self):
+        """Test that wrong label names raise and values are escaped."""
+        registry = MetricsRegistry(namespace="test")
+        gauge = registry.gauge("state", "State", ("name",))
+        with pytest.raises(ValueError):
+            gauge.set(1, other="x")
+
+        gauge.set(2, name='a "quoted"\nvalue')
+
+        assert 'test_state{name="a \\"quoted\\"\\nvalue"} 2' in registry.render()
+
+    def test_registering_twice_returns_same_metric(self):
+        """Test that metrics are looked up by name and type."""
+        registry = MetricsRegistry()
+        counter = registry.counter("jobs", "Jobs")
+
+        assert registry.counter("jobs", "Jobs") is counter
+        with pytest.raises(ValueError):
+            registry.gauge("jobs", "Jobs")
+
+    def test_collectors_run_at_render_time(self):
+        """Test that collector families are rendered and failures skipped."""
+        registry = MetricsRegistry(namespace="test")
+        calls = []
+
+        def collect():
+            calls.append(1)
+            yield gauge_family("queued", "Queued jobs", {"": 3})
+            yield counter_family("hits", "Hits", {"hit": 2, "miss": 1}, label="result")
+
+        def broken():
+            raise RuntimeError("boom")
+
+        registry.add_collector(collect)
+        registry.add_collector(broken)
+        assert calls == []
+
+        text = registry.render()
+
+        assert "test_queued 3" in text
+        assert 'test_hits_total{result="miss"} 1' in text
+
+
+    def test_metric_without_samples_cannot_be_constructed(self):
+        """Test that metric kinds must implement samples."""
+
+        class Incomplete(_Metric):
+            kind = "gauge"
+
+        with pytest.raises(TypeError):
+            Incomplete("broken", "Missing samples")
+
+
+class TestServiceMetrics:
+    """Test suite for ServiceMetrics."""
+
+    def test_observe_job_records_stages(self):
+        """Test that a finished job's stage timings and result are recorded."""
+        metrics = ServiceMetrics()
+        job = Job()
+        job.record_stage("ingest", 0.2)
+        job.update(stage="decode")
+        job._finish(result={"num_views_processed": 3, "rejected": [{"reason": "too_large"}]})
+
+        metrics.observe_job(job)
+
+        assert metrics.jobs.value(status="done") == 1
+        assert metrics.stage_seconds.count(stage="ingest") == 1
+        assert metrics.stage_seconds.count(stage="decode") == 1
+        assert metrics.views.value() == 3
+        assert metrics.rejected.value(reason="too_large") == 1
+
+    def test_current_rss_bytes(self):
+        """Test that the process memory can be read."""
+        assert current_rss_bytes() > 0
@@ -1,6 +1,8 @@
 """Tests for ModelGenerator class."""
 
 import os
+import shutil
+import threading
 import pytest
 import numpy as np
 from mapping_service.model_generator import ModelGenerator
@@ -21,12 +23,26 @@ class TestModelGenerator:
         assert generator.load_model() is True
         assert generator.model_loaded is True
 
-    def test_is_ready_loads_model(self, temp_dir):
-        """Test that is_ready loads the model if not loaded."""
+    def test_is_ready_does_not_load_model(self, temp_dir):
+        """Test that is_ready reports state without triggering a load."""
         generator = ModelGenerator(output_dir=temp_dir)
         assert generator.model_loaded is False
+        assert generator.is_ready() is False
+        assert generator.model_loaded is False
+
+        generator.warm_up()
         assert generator.is_ready() is True
-        assert generator.model_loaded is True
+
+    def test_warm_up_in_background(self, temp_dir):
+        """Test that a background warm-up reports readiness and load time."""
+        generator = ModelGenerator(output_dir=temp_dir, pool_size=2)
+        generator.warm_up(background=True)
+
+        assert generator.pool.wait_ready(5)
+        status = generator.model_status()
+        assert status["state"] == "ready"
+        assert status["size"] == 2
+        assert status["load_seconds"] is not None
 
     def test_generate_3d_model_with_valid_views(self, temp_dir):
         """Test 3D model generation with valid views."""
@@ -66,10 +82,10 @@ class TestModelGenerator:
         
         # Check file content
         with open(output_path, "r") as f:
-            content = f.read()
-            assert "# Mock 3D Model Output" in content
-            assert "v " in content  # Vertices
-            assert "f " in content  # Faces
+            lines = f.read().splitlines()
+        vertices = [line for line in lines if line.startswith("v ")]
+        assert len(vertices) == results["num_points"] > 0
+        assert len(vertices[0].split()) == 7  # Position and color
 
     def test_generate_mock_depth_maps(self, temp_dir):
         """Test generation of mock depth maps."""
@@ -82,10 +98,12 @@ class TestModelGenerator:
         
         depth_maps = generator._generate_mock_depth_maps(views)
         
-        assert len(depth_maps) == 2
-        assert depth_maps[0].shape == (50, 50)
-        assert depth_maps[1].shape == (100, 100)
-        assert isinstance(depth_maps[0], np.ndarray)
+        assert depth_maps.shape == (2, 100, 100)
+        assert depth_maps.dtype == np.float32
+        assert depth_maps[0, 49, 49] == 1.0
+        assert not depth_maps[0, 50:, :].any()  # Padding
+        assert not depth_maps[0, :, 50:].any()
+        assert depth_maps[1, 99, 99] == 1.0
 
     def test_generate_mock_camera_poses(self, temp_dir):
         """Test generation of mock camera poses."""
@@ -93,7 +111,7 @@ class TestModelGenerator:
         
         poses = generator._generate_mock_camera_poses(3)
         
-        assert len(poses) == 3
+        assert poses.shape == (3, 4, 4)
         for i, pose in enumerate(poses):
             assert pose.shape == (4, 4)
             assert np.allclose(pose[:3, :3], np.eye(3))  # Rotation is identity
@@ -111,5 +129,229 @@ class TestModelGenerator:
         assert "output_path" in results
         assert "depth_maps" in results
         assert "camera_poses" in results
+        assert "view_shapes" in results
         assert "metric_scale" in results
         assert results["metric_scale"] == 1.0
+
+    def test_generate_3d_model_reuses_cached_result(self, temp_dir):
+        """Test that identical view sets are served from the result cache."""
+        from mapping_service.result_cache import ResultCache
+
+        cache = ResultCache(os.path.join(temp_dir, "cache"))
+        generator = ModelGenerator(output_dir=temp_dir, result_cache=cache)
+        views = [
+            {"img": np.zeros((20, 20, 3)), "content_hash": "a" * 64},
+            {"img": np.zeros((20, 20, 3)), "content_hash": "b" * 64},
+        ]
+
+        first = generator.generate_3d_model(views, output_name="first.obj")
+        generator._generate_mock_depth_maps = None  # Must not be called again
+        second = generator.generate_3d_model(views, output_name="second.obj")
+
+        assert "cached" not in first
+        assert second["cached"] is True
+        assert second["num_views"] == 2
+        assert os.path.exists(second["output_path"])
+        assert np.array_equal(second["camera_poses"], first["camera_poses"])
+        assert np.array_equal(second["depth_maps"], first["depth_maps"])
+        assert second["view_shapes"].tolist() == [[20, 20], [20, 20]]
+
+    def test_cache_misses_when_geometry_settings_change(self, temp_dir):
+        """Test that stride, voxel size and view resolution are part of the cache key."""
+        from mapping_service.result_cache import ResultCache
+
+        cache = ResultCache(os.path.join(temp_dir, "cache"))
+        views = [
+            {"img": np.zeros((20, 20, 3)), "content_hash": "a" * 64},
+            {"img": np.zeros((20, 20, 3)), "content_hash": "b" * 64},
+        ]
+        ModelGenerator(output_dir=temp_dir, result_cache=cache).generate_3d_model(views)
+
+        variants = [
+            (ModelGenerator(output_dir=temp_dir, result_cache=cache, point_stride=2), views),
+            (ModelGenerator(output_dir=temp_dir, result_cache=cache, voxel_size=0.5), views),
+            (
+                ModelGenerator(output_dir=temp_dir, result_cache=cache),
+                [dict(view, img=np.zeros((10, 10, 3))) for view in views],
+            ),
+        ]
+        for generator, variant_views in variants:
+            assert "cached" not in generator.generate_3d_model(variant_views)
+        assert ModelGenerator(output_dir=temp_dir, result_cache=cache).generate_3d_model(
+            views
+        )["cached"] is True
+
+    def test_generate_3d_model_skips_cache_without_hashes(self, temp_dir):
+        """Test that views without content hashes bypass the cache."""
+        from mapping_service.result_cache import ResultCache
+
+        cache = ResultCache(os.path.join(temp_dir, "cache"))
+        generator = ModelGenerator(output_dir=temp_dir, result_cache=cache)
+        views = [{"img": np.zeros((20, 20, 3))}]
+
+        generator.generate_3d_model(views)
+        generator.generate_3d_model(views)
+
+        assert cache.stats()["entries"] == 0
+
+    def test_generate_3d_model_uses_per_job_directories(self, temp_dir):
+        """Test that concurrent jobs never share an output file."""
+        generator = ModelGenerator(output_dir=temp_dir)
+        views = [{"img": np.zeros((20, 20, 3))}]
+
+        first = generator.generate_3d_model(views, job_id="job-a")
+        second = generator.generate_3d_model(views)
+
+        assert first["job_id"] == "job-a"
+        assert first["artifact_dir"] == os.path.join(temp_dir, "job-a")
+        assert first["output_path"] != second["output_path"]
+        assert os.path.dirname(first["output_path"]) == first["artifact_dir"]
+
+    def test_generate_3d_model_saves_depth_and_poses(self, temp_dir):
+        """Test that depth maps and poses are written with the model."""
+        generator = ModelGenerator(output_dir=temp_dir)
+        views = [{"img": np.zeros((20, 30, 3))}, {"img": np.zeros((20, 30, 3))}]
+
+        results = generator.generate_3d_model(views)
+
+        segment = os.path.join(results["artifact_dir"], ModelGenerator.SEGMENTS_DIR, "00000")
+        depth = np.load(os.path.join(segment, ModelGenerator.DEPTH_MAPS_FILE))
+        poses = np.load(os.path.join(segment, ModelGenerator.CAMERA_POSES_FILE))
+        shapes = np.load(os.path.join(segment, ModelGenerator.VIEW_SHAPES_FILE))
+        assert depth.shape == (2, 20, 30)
+        assert depth.dtype == np.float32
+        assert poses.shape == (2, 4, 4)
+        assert shapes.tolist() == [[20, 30], [20, 30]]
+
+    def test_generate_3d_model_batches_concurrent_jobs(self, temp_dir):
+        """Test that concurrent jobs share a forward pass and get their own results."""
+        generator = ModelGenerator(output_dir=temp_dir, max_batch_size=8, max_batch_wait_ms=200)
+        generator.load_model()
+        sizes = {"a": (10, 10, 3), "b": (20, 30, 3)}
+        results = {}
+
+        def run(name):
+            views = [{"img": np.zeros(sizes[name])}] * 2
+            results[name] = generator.generate_3d_model(views, job_id=f"job-{name}")
+
+        threads = [threading.Thread(target=run, args=(name,)) for name in sizes]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert generator.scheduler.stats()["batches"] == 1
+        assert results["a"]["depth_maps"].shape == (2, 10, 10)
+        assert results["b"]["depth_maps"].shape == (2, 20, 30)
+        assert results["b"]["camera_poses"][0, 0, 3] == 0.0
+
+    def test_generate_3d_model_downsamples_point_cloud(self, temp_dir):
+        """Test that a voxel size reduces the exported point count."""
+        views = [{"img": np.zeros((40, 40, 3))}] * 3
+        full = ModelGenerator(output_dir=temp_dir, point_stride=1).generate_3d_model(views)
+        reduced = ModelGenerator(
+            output_dir=temp_dir, point_stride=1, voxel_size=0.05
+        ).generate_3d_model(views)
+
+        assert 0 < reduced["num_points"] < full["num_points"]
+
+    def test_generate_3d_model_output_formats(self, temp_dir):
+        """Test that the output format picks the exporter and extension."""
+        generator = ModelGenerator(output_dir=temp_dir)
+        views = [{"img": np.zeros((20, 20, 3))}]
+
+        default = generator.generate_3d_model(views)
+        glb = generator.generate_3d_model(views, output_format="glb")
+        named = generator.generate_3d_model(views, output_name="scan.obj")
+
+        assert default["output_path"].endswith("model.ply")
+        assert glb["output_path"].endswith("model.glb")
+        assert named["output_path"].endswith("scan.obj")
+        assert generator.generate_3d_model(views, output_format="fbx") is None
+
+    def test_generate_3d_model_writes_tiles(self, temp_dir):
+        """Test that tiling writes a tileset next to the model."""
+        generator = ModelGenerator(output_dir=temp_dir, tile_max_points=100)
+        views = [{"img": np.zeros((40, 40, 3))}] * 2
+
+        results = generator.generate_3d_model(views)
+
+        assert results["tileset"] == "tiles/tileset.json"
+        assert os.path.exists(os.path.join(results["artifact_dir"], "tiles", "tileset.json"))
+
+    def test_extend_3d_model_processes_only_new_views(self, temp_dir):
+        """Test that extending a job infers only the new views."""
+        generator = ModelGenerator(output_dir=temp_dir)
+        parent = generator.generate_3d_model([{"img": np.zeros((20, 30, 3))}] * 3)
+        inferred = []
+        infer = generator._infer
+        generator._infer = lambda model, views: inferred.append(len(views)) or infer(model, views)
+
+        new_views = [{"img": np.zeros((40, 20, 3))}] * 2
+        results = generator.extend_3d_model(parent["job_id"], new_views)
+
+        assert inferred == [2]
+        assert results["parent_job_id"] == parent["job_id"]
+        assert results["job_id"] != parent["job_id"]
+        assert results["num_views"] == 5
+        assert [d.shape for d in results["depth_maps"]] == [(3, 20, 30), (2, 40, 20)]
+        assert np.concatenate(results["view_shapes"]).tolist() == [[20, 30]] * 3 + [[40, 20]] * 2
+        # Poses continue the parent's trajectory
+        poses = np.concatenate(results["camera_poses"])
+        assert np.allclose(poses[:, 0, 3], np.arange(5) * 0.1)
+        assert results["num_points"] > parent["num_points"]
+        assert os.path.exists(results["output_path"])
+
+    def test_extend_3d_model_can_be_chained(self, temp_dir):
+        """Test that an extended reconstruction can itself be extended."""
+        generator = ModelGenerator(output_dir=temp_dir)
+        views = [{"img": np.zeros((20, 20, 3))}]
+        first = generator.generate_3d_model(views)
+        second = generator.extend_3d_model(first["job_id"], views)
+        third = generator.extend_3d_model(second["job_id"], views)
+
+        assert third["num_views"] == 3
+        saved = generator.load_reconstruction(third["job_id"])
+        assert len(saved["point_cloud"]) == third["num_points"]
+        assert saved["content_hashes"] == [None] * 3
+
+    def test_extend_3d_model_links_parent_segments(self, temp_dir):
+        """Test that an extend links the parent's arrays and writes only the new views'."""
+        generator = ModelGenerator(output_dir=temp_dir)
+        parent = generator.generate_3d_model([{"img": np.zeros((20, 30, 3))}] * 3)
+        child = generator.extend_3d_model(parent["job_id"], [{"img": np.zeros((20, 30, 3))}])
+
+        parent_segment = os.path.join(parent["artifact_dir"], ModelGenerator.SEGMENTS_DIR, "00000")
+        segments = os.path.join(child["artifact_dir"], ModelGenerator.SEGMENTS_DIR)
+        assert sorted(os.listdir(segments)) == ["00000", "00001"]
+        for file in ModelGenerator.SEGMENT_FILES.values():
+            assert os.path.samefile(
+                os.path.join(parent_segment, file), os.path.join(segments, "00000", file)
+            )
+        assert len(np.load(os.path.join(segments, "00001", ModelGenerator.DEPTH_MAPS_FILE))) == 1
+
+        # The child keeps its arrays when the parent's directory is removed
+        shutil.rmtree(parent["artifact_dir"])
+        saved = generator.load_reconstruction(child["job_id"])
+        assert [len(d) for d in saved["depth_maps"]] == [3, 1]
+
+    def test_extend_3d_model_unknown_parent(self, temp_dir):
+        """Test that extending a job without a reconstruction fails."""
+        generator = ModelGenerator(output_dir=temp_dir)
+        views = [{"img": np.zeros((20, 20, 3))}]
+
+        assert generator.extend_3d_model("missing", views) is None
+        assert generator.extend_3d_model("../escape", views) is None
+
+    def test_estimate_memory_grows_with_views(self, temp_dir):
+        """Test that the estimate covers depth maps, points and a parent's arrays."""
+        generator = ModelGenerator(output_dir=temp_dir, point_stride=4)
+
+        assert generator.estimate_memory(np.empty((0, 2))) == 0
+        one = generator.estimate_memory([[40, 40]])
+        assert one == 40 * 40 * 4 + 10 * 10 * ModelGenerator.BYTES_PER_POINT
+        assert generator.estimate_memory([[40, 40]] * 2) == 2 * one
+
+        parent = generator.generate_3d_model([{"img": np.zeros((40, 40, 3))}])
+        assert generator.estimate_memory([[40, 40]], parent["job_id"]) > one
+        assert generator.estimate_memory([[40, 40]], "missing") == one
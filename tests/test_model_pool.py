@@ -0,0 +1,80 @@
+"""Tests for ModelPool class."""
+
+import threading
+import pytest
+from mapping_service.model_pool import ModelPool, ModelPoolError
+
+
+class TestModelPool:
+    """Test suite for ModelPool."""
+
+    def test_load_creates_instances(self):
+        """Test that loading creates one instance per slot."""
+        created = []
+        pool = ModelPool(lambda: created.append(1) or len(created), size=3)
+
+        assert pool.load() is True
+        assert pool.is_ready
+        assert len(created) == 3
+        assert pool.status()["available"] == 3
+        assert pool.load_seconds is not None
+
+    def test_load_is_idempotent(self):
+        """Test that a loaded pool is not loaded again."""
+        created = []
+        pool = ModelPool(lambda: created.append(1), size=1)
+        pool.load()
+        pool.load()
+        assert len(created) == 1
+
+    def test_load_failure(self):
+        """Test that loader errors mark the pool as failed."""
+        def fail():
+            raise RuntimeError("no weights")
+
+        pool = ModelPool(fail)
+
+        assert pool.load() is False
+        assert pool.state == ModelPool.FAILED
+        assert pool.status()["error"] == "no weights"
+
+    def test_acquire_requires_ready_pool(self):
+        """Test that instances cannot be borrowed before loading."""
+        pool = ModelPool(object)
+        with pytest.raises(ModelPoolError):
+            with pool.acquire():
+                pass
+
+    def test_acquire_returns_instance_to_pool(self):
+        """Test that borrowed instances are returned after use."""
+        pool = ModelPool(object, size=1)
+        pool.load()
+
+        with pool.acquire() as model:
+            assert pool.status()["available"] == 0
+            with pytest.raises(ModelPoolError):
+                with pool.acquire(timeout=0.01):
+                    pass
+
+        assert model is not None
+        assert pool.status()["available"] == 1
+
+    def test_background_start(self):
+        """Test that background loading can be awaited."""
+        release = threading.Event()
+
+        def slow_loader():
+            release.wait(5)
+            return object()
+
+        pool = ModelPool(slow_loader)
+        thread = pool.start(background=True)
+
+        assert not pool.wait_ready(0.01)
+        release.set()
+        assert pool.wait_ready(5)
+        thread.join()
+
+    def test_wait_ready_without_load(self):
+        """Test that waiting on an unloaded pool returns immediately."""
+        assert ModelPool(object).wait_ready() is False
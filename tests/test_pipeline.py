@@ -0,0 +1,100 @@
+"""Tests for ReconstructionPipeline class."""
+
+import os
+import pytest
+from mapping_service.image_processor import ImageProcessor
+from mapping_service.model_generator import ModelGenerator
+from mapping_service.job_manager import Job
+from mapping_service.memory_budget import MemoryBudget
+from mapping_service.pipeline import ReconstructionPipeline, PipelineError
+
+
+@pytest.fixture
+def pipeline(temp_dir):
+    """Create a pipeline writing into a temporary directory."""
+    return ReconstructionPipeline(
+        ImageProcessor(os.path.join(temp_dir, "uploads")),
+        ModelGenerator(output_dir=os.path.join(temp_dir, "outputs")),
+    )
+
+
+class TestReconstructionPipeline:
+    """Test suite for ReconstructionPipeline."""
+
+    def test_run_returns_summary(self, pipeline, sample_images):
+        """Test that a run returns the download summary."""
+        job = Job()
+        summary = pipeline.run(job, sample_images)
+
+        assert summary["status"] == "success"
+        assert summary["num_images"] == 3
+        assert summary["num_views_processed"] == 3
+        assert summary["download_url"].endswith(summary["output_file"])
+        assert job.stage == "export"
+        assert set(job.timings) == {"decode", "inference", "fusion"}
+
+    def test_extend_adds_views_to_parent(self, pipeline, sample_images):
+        """Test that extending a job reconstructs the combined views."""
+        parent = pipeline.run(Job(), sample_images[:2])
+        summary = pipeline.extend(Job(), parent["job_id"], sample_images[2:])
+
+        assert summary["num_images"] == 1
+        assert summary["num_views_processed"] == 3
+        assert summary["parent_job_id"] == parent["job_id"]
+        assert parent["parent_job_id"] is None
+
+    def test_extend_unknown_parent_raises(self, pipeline, sample_images):
+        """Test that extending a missing job raises PipelineError."""
+        with pytest.raises(PipelineError):
+            pipeline.extend(Job(), "missing", sample_images)
+
+    def test_run_without_valid_images_raises(self, pipeline, temp_dir):
+        """Test that a run with no usable images raises PipelineError."""
+        invalid_path = os.path.join(temp_dir, "invalid.txt")
+        with open(invalid_path, "w") as f:
+            f.write("Not an image")
+
+        with pytest.raises(PipelineError):
+            pipeline.run(Job(), [invalid_path])
+
+    def test_run_releases_uploads(self, pipeline, sample_image_path):
+        """Test that upload references are released after a run."""
+        store = pipeline.image_processor.store
+        with open(sample_image_path, "rb") as f:
+            path = pipeline.image_processor.save_uploaded_stream(f, "view.jpg")
+        assert store.stats()["referenced"] == 1
+
+        summary = pipeline.run(Job(), [path], ["view.jpg"])
+
+        assert summary["num_views_processed"] == 1
+        assert store.stats()["referenced"] == 0
+
+    def test_run_reserves_estimated_memory(self, pipeline, sample_images):
+        """Test that a run holds its estimate of the memory budget while running."""
+        budget = MemoryBudget(10**9)
+        pipeline.memory_budget = budget
+        reserved = []
+        generate = pipeline.model_generator.generate_3d_model
+
+        def spy(*args, **kwargs):
+            reserved.append(budget.stats()["reserved"])
+            return generate(*args, **kwargs)
+
+        pipeline.model_generator.generate_3d_model = spy
+        pipeline.run(Job(), sample_images)
+
+        assert reserved == [pipeline.estimate_memory(sample_images)]
+        assert budget.stats()["reserved"] == 0
+
+    def test_run_fails_when_memory_is_not_granted(self, pipeline, sample_images):
+        """Test that a run waiting past memory_wait_seconds fails."""
+        budget = MemoryBudget(pipeline.estimate_memory(sample_images))
+        budget.try_acquire(1)
+        pipeline.memory_budget = budget
+        pipeline.memory_wait_seconds = 0.05
+        job = Job()
+
+        with pytest.raises(PipelineError, match="memory"):
+            pipeline.run(job, sample_images)
+        assert job.stage == "memory_wait"
+        assert budget.stats()["reserved"] == 1
@@ -0,0 +1,217 @@
+"""Tests for point cloud back-projection."""
+
+import tracemalloc
+from unittest.mock import patch
+import pytest
+import numpy as np
+from mapping_service.pointcloud import (
+    PointCloud,
+    backproject,
+    merge_point_clouds,
+    pinhole_intrinsics,
+    voxel_downsample,
+)
+
+
+def identity_poses(num_views):
+    """Return camera-to-world poses at the origin."""
+    return np.tile(np.eye(4, dtype=np.float32), (num_views, 1, 1))
+
+
+class TestPinholeIntrinsics:
+    """Test suite for pinhole_intrinsics."""
+
+    def test_principal_point_at_center(self):
+        """Test that the principal point is the image center."""
+        intrinsics = pinhole_intrinsics(np.array([[40, 60]]), fov_degrees=90)
+
+        assert intrinsics.shape == (1, 3, 3)
+        assert intrinsics[0, 0, 2] == 30
+        assert intrinsics[0, 1, 2] == 20
+        assert intrinsics[0, 0, 0] == pytest.approx(30)
+        assert intrinsics[0, 2, 2] == 1
+
+
+class TestBackproject:
+    """Test suite for backproject."""
+
+    def test_principal_point_lies_on_optical_axis(self):
+        """Test that the center pixel lands on the camera's z axis."""
+        depth = np.full((1, 5, 5), 2.0, dtype=np.float32)
+        intrinsics = np.array([[[1, 0, 2], [0, 1, 2], [0, 0, 1]]], dtype=np.float32)
+
+        cloud = backproject(depth, intrinsics, identity_poses(1))
+
+        assert len(cloud) == 25
+        center = cloud.points[12]
+        assert np.allclose(center, [0, 0, 2])
+        assert np.allclose(cloud.points[0], [-4, -4, 2])
+
+    def test_applies_camera_pose(self):
+        """Test that points are moved into world space by each view's pose."""
+        depth = np.ones((2, 1, 1), dtype=np.float32)
+        intrinsics = np.tile(np.eye(3, dtype=np.float32), (2, 1, 1))
+        poses = identity_poses(2)
+        poses[1, 0, 3] = 5.0
+        poses[1, :3, :3] = [[0, 0, 1], [0, 1, 0], [-1, 0, 0]]  # 90 degrees about y
+
+        cloud = backproject(depth, intrinsics, poses)
+
+        assert np.allclose(cloud.points, [[0, 0, 1], [6, 0, 0]])
+        assert cloud.view_index.tolist() == [0, 1]
+
+    def test_masks_invalid_depth(self):
+        """Test that zero, non-finite, out-of-range and masked depths are dropped."""
+        depth = np.array([[[0.0, np.nan, np.inf, 1.0, 50.0, 2.0]]], dtype=np.float32)
+        valid = np.array([[[True, True, True, True, True, False]]])
+
+        cloud = backproject(
+            depth,
+            pinhole_intrinsics(np.array([[1, 6]])),
+            identity_poses(1),
+            max_depth=10.0,
+            valid_mask=valid,
+        )
+
+        assert len(cloud) == 1
+        assert cloud.points[0, 2] == 1.0
+
+    def test_stride_subsamples(self):
+        """Test that stride keeps every n-th pixel with correct coordinates."""
+        depth = np.ones((1, 8, 8), dtype=np.float32)
+        intrinsics = np.array([[[1, 0, 0], [0, 1, 0], [0, 0, 1]]], dtype=np.float32)
+
+        cloud = backproject(depth, intrinsics, identity_poses(1), stride=4)
+
+        assert len(cloud) == 4
+        assert sorted(map(tuple, cloud.points[:, :2].tolist())) == [
+            (0, 0), (0, 4), (4, 0), (4, 4)
+        ]
+
+    def test_colors_from_mixed_size_views(self):
+        """Test that colors follow their pixels and padding is skipped."""
+        depth = np.zeros((2, 2, 3), dtype=np.float32)
+        depth[0, :2, :3] = 1.0
+        depth[1, :1, :1] = 1.0
+        images = [
+            np.full((2, 3, 3), 10, dtype=np.uint8),
+            np.full((1, 1, 3), 200.0),
+        ]
+
+        cloud = backproject(
+            depth, pinhole_intrinsics(np.array([[2, 3], [1, 1]])), identity_poses(2), colors=images
+        )
+
+        assert len(cloud) == 7
+        assert cloud.colors.dtype == np.uint8
+        assert cloud.colors[:6].tolist() == [[10, 10, 10]] * 6
+        assert cloud.colors[6].tolist() == [200, 200, 200]
+
+    def test_rejects_mismatched_inputs(self):
+        """Test that inputs with different view counts are rejected."""
+        with pytest.raises(ValueError):
+            backproject(np.ones((2, 4, 4)), pinhole_intrinsics(np.array([[4, 4]])), identity_poses(2))
+
+    def test_estimates_normals_facing_camera(self):
+        """Test that a fronto-parallel plane gets normals pointing back at the camera."""
+        depth = np.full((1, 6, 6), 2.0, dtype=np.float32)
+
+        cloud = backproject(
+            depth, pinhole_intrinsics(np.array([[6, 6]])), identity_poses(1), normals=True
+        )
+
+        assert cloud.normals.shape == (36, 3)
+        assert np.allclose(cloud.normals, [0, 0, -1], atol=1e-5)
+
+
+class TestVoxelDownsample:
+    """Test suite for voxel_downsample."""
+
+    def make_cloud(self):
+        """Two points sharing a voxel and one point on its own."""
+        return PointCloud(
+            points=np.array([[0.1, 0.1, 0.1], [0.3, 0.3, 0.3], [1.5, 0.0, 0.0]], dtype=np.float32),
+            colors=np.array([[0, 0, 0], [100, 200, 50], [7, 7, 7]], dtype=np.uint8),
+            view_index=np.array([0, 1, 1]),
+            normals=np.array([[0, 0, 1], [0, 1, 0], [1, 0, 0]], dtype=np.float32),
+        )
+
+    def test_merges_points_per_voxel(self):
+        """Test that points in one voxel are averaged into one."""
+        result = voxel_downsample(self.make_cloud(), voxel_size=1.0)
+
+        assert len(result) == 2
+        merged = np.argmin(result.points[:, 0])
+        assert np.allclose(result.points[merged], [0.2, 0.2, 0.2])
+        assert result.colors[merged].tolist() == [50, 100, 25]
+        assert np.allclose(result.normals[merged], [0, np.sqrt(0.5), np.sqrt(0.5)])
+        assert result.view_index is None
+
+    def test_chunked_matches_single_pass(self):
+        """Test that chunking and the sparse path give the same voxels."""
+        rng = np.random.default_rng(0)
+        cloud = PointCloud(
+            rng.random((5000, 3)).astype(np.float32),
+            rng.integers(0, 256, (5000, 3)).astype(np.uint8),
+        )
+        expected = voxel_downsample(cloud, 0.1)
+
+        chunked = voxel_downsample(cloud, 0.1, chunk_size=700)
+        with patch("mapping_service.pointcloud._DENSE_VOXEL_LIMIT", 0):
+            sparse = voxel_downsample(cloud, 0.1, chunk_size=700)
+
+        for result in (chunked, sparse):
+            order = np.lexsort(result.points.T)
+            expected_order = np.lexsort(expected.points.T)
+            assert np.allclose(result.points[order], expected.points[expected_order], atol=1e-6)
+            assert np.array_equal(result.colors[order], expected.colors[expected_order])
+
+    def test_empty_cloud(self):
+        """Test that an empty cloud stays empty."""
+        cloud = PointCloud(np.zeros((0, 3), dtype=np.float32))
+        assert len(voxel_downsample(cloud, 0.5)) == 0
+
+    def test_sparse_cloud_over_large_extent_stays_small(self):
+        """Test that a few points spread over a fine grid do not allocate the whole grid."""
+        rng = np.random.default_rng(0)
+        points = rng.random((1000, 3)).astype(np.float32) * 3.2
+        points[:2] = [[0, 0, 0], [3.2, 3.2, 3.2]]
+        cloud = PointCloud(points)
+
+        tracemalloc.start()
+        try:
+            result = voxel_downsample(cloud, 0.01)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert len(result) == 1000
+        assert peak < 10 * 1024 * 1024
+
+    def test_rejects_invalid_voxel_size(self):
+        """Test that a non-positive voxel size is rejected."""
+        with pytest.raises(ValueError):
+            voxel_downsample(self.make_cloud(), 0)
+
+
+class TestMergePointClouds:
+    """Test suite for merge_point_clouds."""
+
+    def test_concatenates_attributes(self):
+        """Test that points, colors and normals are concatenated in order."""
+        first = PointCloud(np.zeros((2, 3)), np.zeros((2, 3), np.uint8), np.zeros(2), np.ones((2, 3)))
+        second = PointCloud(np.ones((1, 3)), np.ones((1, 3), np.uint8), None, np.ones((1, 3)))
+
+        merged = merge_point_clouds([first, second])
+
+        assert merged.points.tolist() == [[0, 0, 0], [0, 0, 0], [1, 1, 1]]
+        assert merged.colors[:, 0].tolist() == [0, 0, 1]
+        assert merged.normals.shape == (3, 3)
+        assert merged.view_index is None
+
+    def test_drops_attributes_missing_from_any_cloud(self):
+        """Test that colors are dropped when one cloud has none."""
+        first = PointCloud(np.zeros((2, 3)), np.zeros((2, 3), np.uint8))
+        second = PointCloud(np.ones((1, 3)))
+
+        assert merge_point_clouds([first, second]).colors is None
@@ -0,0 +1,106 @@
+"""Tests for ResultCache class."""
+
+import os
+import time
+import pytest
+import numpy as np
+from mapping_service.result_cache import ResultCache
+
+
+@pytest.fixture
+def artifact(temp_dir):
+    """Create a small artifact file to cache."""
+    path = os.path.join(temp_dir, "model.obj")
+    with open(path, "w") as f:
+        f.write("v 0 0 0\n")
+    return path
+
+
+class TestResultCache:
+    """Test suite for ResultCache."""
+
+    def test_make_key_depends_on_order_model_and_params(self):
+        """Test that every input of the reconstruction changes the key."""
+        key = ResultCache.make_key(["a", "b"], "model", {"format": ".obj"})
+
+        assert key == ResultCache.make_key(["a", "b"], "model", {"format": ".obj"})
+        assert key != ResultCache.make_key(["b", "a"], "model", {"format": ".obj"})
+        assert key != ResultCache.make_key(["a", "b"], "other", {"format": ".obj"})
+        assert key != ResultCache.make_key(["a", "b"], "model", {"format": ".ply"})
+
+    def test_put_then_get(self, temp_dir, artifact):
+        """Test that a stored result is returned with its arrays."""
+        cache = ResultCache(os.path.join(temp_dir, "cache"))
+        depth = [np.ones((4, 4)), np.zeros((2, 3))]
+        poses = np.eye(4)[None].repeat(2, axis=0)
+
+        cache.put("key", artifact, {"depth_maps": depth, "camera_poses": poses}, {"num_views": 2})
+        hit = cache.get("key")
+
+        assert hit["metadata"] == {"num_views": 2}
+        assert open(hit["artifact_path"]).read() == "v 0 0 0\n"
+        assert [d.shape for d in hit["arrays"]["depth_maps"]] == [(4, 4), (2, 3)]
+        assert np.array_equal(hit["arrays"]["camera_poses"], poses)
+        assert cache.stats()["hits"] == 1
+
+    def test_miss(self, temp_dir):
+        """Test that unknown keys miss."""
+        cache = ResultCache(temp_dir)
+        assert cache.get("missing") is None
+        assert cache.stats()["misses"] == 1
+
+    def test_ttl_expiry(self, temp_dir, artifact):
+        """Test that entries older than the TTL are discarded."""
+        cache = ResultCache(os.path.join(temp_dir, "cache"), ttl_seconds=0.01)
+        cache.put("key", artifact, {})
+        time.sleep(0.05)
+
+        assert cache.get("key") is None
+        assert cache.stats()["entries"] == 0
+
+    def test_size_eviction_removes_oldest(self, temp_dir, artifact):
+        """Test that the oldest entries are evicted over the size budget."""
+        cache = ResultCache(os.path.join(temp_dir, "cache"), max_bytes=250)
+        for key in ("a", "b", "c"):
+            cache.put(key, artifact, {})
+            time.sleep(0.01)
+
+        assert cache.get("a") is None
+        assert cache.get("c") is not None
+        assert cache.stats()["evictions"] >= 1
+        assert cache.stats()["bytes"] <= 250
+
+    def test_stats_are_kept_in_memory(self, temp_dir, artifact):
+        """Test that stats track puts and evictions without walking the entries."""
+        cache_dir = os.path.join(temp_dir, "cache")
+        ResultCache(cache_dir).put("old", artifact, {})
+        cache = ResultCache(cache_dir, max_bytes=250)
+        assert cache.stats()["entries"] == 1
+
+        cache.put("new", artifact, {"poses": np.eye(4)})
+        on_disk = sum(
+            e.stat().st_size for name in os.listdir(cache_dir)
+            for e in os.scandir(os.path.join(cache_dir, name))
+        )
+        cache._entries = lambda: pytest.fail("stats walked the cache")
+
+        assert cache.stats()["entries"] == len(os.listdir(cache_dir))
+        assert cache.stats()["bytes"] == on_disk
+
+    def test_concurrent_publish_keeps_first_entry(self, temp_dir, artifact):
+        """Test that a second writer of the same key leaves no temp files."""
+        cache_dir = os.path.join(temp_dir, "cache")
+        first = ResultCache(cache_dir)
+        second = ResultCache(cache_dir)
+
+        first.put("key", artifact, {}, {"writer": 1})
+        second.put("key", artifact, {}, {"writer": 2})
+
+        assert second.get("key")["metadata"] == {"writer": 1}
+        assert os.listdir(cache_dir) == ["key"]
+
+    def test_incomplete_entry_is_a_miss(self, temp_dir):
+        """Test that a directory without metadata is never served."""
+        cache = ResultCache(temp_dir)
+        os.makedirs(os.path.join(temp_dir, "key"))
+        assert cache.get("key") is None
@@ -0,0 +1,50 @@
+"""Tests for ViewArena class."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from mapping_service.shared_views import ViewArena, write_to_arena
+
+
+class TestViewArena:
+    """Test suite for ViewArena."""
+
+    def test_slots_are_aligned(self, temp_dir):
+        """Test that every slot starts on an ALIGNMENT boundary."""
+        with ViewArena.allocate([(3, 5, 3), None, (7, 2, 3)], temp_dir) as arena:
+            offsets = [slot[0] for slot in arena.slots if slot is not None]
+
+            assert arena.slots[1] is None
+            assert arena.array(1) is None
+            assert all(offset % ViewArena.ALIGNMENT == 0 for offset in offsets)
+            assert arena.nbytes == 2 * ViewArena.ALIGNMENT
+
+    def test_close_removes_file_but_keeps_arrays(self, temp_dir):
+        """Test that arrays outlive the owner closing the arena."""
+        img = np.arange(5 * 9 * 3, dtype=np.uint8).reshape(5, 9, 3)
+        arena = ViewArena.allocate([img.shape], temp_dir)
+        arena.array(0)[...] = img
+        view = arena.array(0)
+        arena.close()
+
+        assert not os.path.exists(arena.path)
+        assert np.array_equal(view, img)
+
+    def test_write_to_arena(self, temp_dir):
+        """Test writing a slot through its path and offset."""
+        with ViewArena.allocate([(4, 4, 3), (2, 6, 3)], temp_dir) as arena:
+            img = np.full((2, 6, 3), 5, dtype=np.uint8)
+            write_to_arena(arena.path, arena.slots[1][0], img)
+
+            assert np.array_equal(arena.array(1), img)
+            assert not arena.array(0).any()
+
+    def test_write_to_arena_from_another_process(self, temp_dir):
+        """Test that a worker process's writes are visible in the owner's arrays."""
+        img = np.full((30, 40, 3), 7, dtype=np.uint8)
+        with ViewArena.allocate([img.shape], temp_dir) as arena:
+            view = arena.array(0)
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                pool.submit(write_to_arena, arena.path, arena.slots[0][0], img).result()
+
+            assert np.array_equal(view, img)
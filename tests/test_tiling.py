@@ -0,0 +1,79 @@
+"""Tests for octree LOD tiling."""
+
+import os
+import json
+import numpy as np
+import pytest
+from mapping_service.pointcloud import PointCloud
+from mapping_service.tiling import TILESET_FILE, build_tiles
+
+
+def make_cloud(num_points=4000, seed=0):
+    """Random colored points in a unit cube."""
+    rng = np.random.default_rng(seed)
+    return PointCloud(
+        rng.random((num_points, 3)).astype(np.float32),
+        rng.integers(0, 256, (num_points, 3)).astype(np.uint8),
+    )
+
+
+def walk(tile):
+    """Yield every tile of a tileset depth-first."""
+    yield tile
+    for child in tile.get("children", []):
+        yield from walk(child)
+
+
+class TestBuildTiles:
+    """Test suite for build_tiles."""
+
+    def test_small_cloud_is_single_tile(self, temp_dir):
+        """Test that a cloud within the limit becomes one leaf tile."""
+        tileset = build_tiles(make_cloud(100), temp_dir, max_points=500)
+
+        root = tileset["root"]
+        assert "children" not in root
+        assert root["geometricError"] == 0
+        assert root["extras"]["points"] == 100
+        assert os.path.exists(os.path.join(temp_dir, "r.glb"))
+
+    def test_octree_limits_and_refinement(self, temp_dir):
+        """Test that tiles respect the point limit and leaves keep every point."""
+        tileset = build_tiles(make_cloud(4000), temp_dir, max_points=300, lod_resolution=4)
+
+        tiles = list(walk(tileset["root"]))
+        leaves = [t for t in tiles if "children" not in t]
+        assert tileset["root"]["refine"] == "REPLACE"
+        assert all(t["extras"]["points"] <= 300 for t in tiles)
+        assert sum(t["extras"]["points"] for t in leaves) == 4000
+        for tile in tiles:
+            for child in tile.get("children", []):
+                assert child["extras"]["name"][:-1] == tile["extras"]["name"]
+                assert child["geometricError"] < tile["geometricError"]
+            assert os.path.exists(os.path.join(temp_dir, tile["content"]["uri"]))
+
+    def test_writes_tileset_json(self, temp_dir):
+        """Test that the tileset is written next to the tiles."""
+        tileset = build_tiles(make_cloud(1000), temp_dir, max_points=200, tile_format="ply")
+
+        with open(os.path.join(temp_dir, TILESET_FILE)) as f:
+            assert json.load(f) == tileset
+        assert tileset["root"]["content"]["uri"] == "r.ply"
+
+    def test_max_depth_stops_splitting(self, temp_dir):
+        """Test that coincident points end in a leaf at the maximum depth."""
+        cloud = PointCloud(np.zeros((50, 3), dtype=np.float32))
+
+        tileset = build_tiles(cloud, temp_dir, max_points=10, max_depth=2)
+
+        depths = [len(t["extras"]["name"]) - 1 for t in walk(tileset["root"])]
+        assert max(depths) == 2
+
+    def test_empty_cloud(self, temp_dir):
+        """Test that an empty cloud produces no tileset."""
+        assert build_tiles(PointCloud(np.zeros((0, 3), dtype=np.float32)), temp_dir) is None
+
+    def test_unknown_format(self, temp_dir):
+        """Test that an unknown tile format is rejected."""
+        with pytest.raises(ValueError):
+            build_tiles(make_cloud(10), temp_dir, tile_format="fbx")
@@ -0,0 +1,226 @@
+"""Tests for UploadSessionManager class."""
+
+import io
+import os
+import time
+import pytest
+from mapping_service.content_store import UploadTooLargeError
+from mapping_service.image_processor import ImageProcessor
+from mapping_service.upload_sessions import (
+    ChunkOffsetError,
+    UploadSessionError,
+    UploadSessionManager,
+)
+from mapping_service.view_cache import ViewCache
+
+
+@pytest.fixture
+def processor(temp_dir):
+    """Create an image processor with a view cache."""
+    return ImageProcessor(
+        os.path.join(temp_dir, "uploads"),
+        view_cache=ViewCache(max_bytes=16 * 1024 * 1024),
+    )
+
+
+@pytest.fixture
+def manager(processor, temp_dir):
+    """Create a session manager keeping parts in a temporary directory."""
+    manager = UploadSessionManager(processor, os.path.join(temp_dir, "sessions"))
+    yield manager
+    manager.shutdown()
+
+
+def read(path):
+    """Return the bytes of a file."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def wait_decoded(session, name, timeout=5.0):
+    """Wait for a part's eager decode to finish."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        part = session.parts[name]
+        if part.prefetch is not None and part.prefetch.done():
+            return part.to_dict()["decoded"]
+        time.sleep(0.01)
+    raise AssertionError(f"{name} was not decoded in {timeout}s")
+
+
+class TestUploadSessionManager:
+    """Test suite for UploadSessionManager."""
+
+    def test_whole_image_completes_part(self, manager, sample_image_path):
+        """Test that an image sent in one write is stored and decoded."""
+        session = manager.create("ply")
+        data = read(sample_image_path)
+
+        part = manager.write_part(session, "a.jpg", io.BytesIO(data))
+
+        assert part["complete"] is True
+        assert part["received"] == part["size"] == len(data)
+        assert read(session.parts["a.jpg"].path) == data
+        assert wait_decoded(session, "a.jpg") is True
+        assert manager.image_processor.view_cache.stats()["entries"] == 1
+
+    def test_chunks_resume_at_received_offset(self, manager, sample_image_path):
+        """Test that an image is assembled from chunks in order."""
+        session = manager.create()
+        data = read(sample_image_path)
+        half = len(data) // 2
+
+        part = manager.write_part(session, "a.jpg", io.BytesIO(data[:half]), 0, len(data))
+        assert part["complete"] is False
+        assert part["received"] == half
+        with pytest.raises(ChunkOffsetError) as error:
+            manager.write_part(session, "a.jpg", io.BytesIO(data[half + 1:]), half + 1, len(data))
+        assert error.value.received == half
+
+        part = manager.write_part(session, "a.jpg", io.BytesIO(data[half:]), half, len(data))
+        assert part["complete"] is True
+        assert read(session.parts["a.jpg"].path) == data
+
+    def test_broken_chunk_keeps_received_bytes(self, manager):
+        """Test that bytes read before a stream fails are kept for resuming."""
+        session = manager.create()
+
+        class BrokenStream(io.BytesIO):
+            def read(self, size=-1):
+                if self.tell():
+                    raise ConnectionError("client went away")
+                return super().read(size)
+
+        manager.CHUNK_SIZE = 4
+        with pytest.raises(ConnectionError):
+            manager.write_part(session, "a.jpg", BrokenStream(b"x" * 10), 0, 10)
+
+        assert session.parts["a.jpg"].to_dict()["received"] == 4
+        part = manager.write_part(session, "a.jpg", io.BytesIO(b"x" * 6), 4, 10)
+        assert part["complete"] is True
+
+    def test_chunk_longer_than_declared_size(self, manager):
+        """Test that a chunk may not run past the declared image size."""
+        session = manager.create()
+
+        with pytest.raises(UploadSessionError):
+            manager.write_part(session, "a.jpg", io.BytesIO(b"x" * 12), 0, 10)
+        assert session.parts["a.jpg"].received == 0
+
+    def test_oversized_image_rejected(self, temp_dir):
+        """Test that the processor's image size limit applies to parts."""
+        processor = ImageProcessor(os.path.join(temp_dir, "uploads"), max_image_size=8)
+        manager = UploadSessionManager(processor, os.path.join(temp_dir, "sessions"))
+        session = manager.create()
+
+        with pytest.raises(UploadTooLargeError):
+            manager.write_part(session, "a.jpg", io.BytesIO(b"x"), 0, 9)
+        with pytest.raises(UploadTooLargeError):
+            manager.write_part(session, "b.jpg", io.BytesIO(b"x" * 9))
+
+    def test_commit_hands_images_to_job(self, manager, sample_images):
+        """Test that a commit returns complete parts in name order with a job reference."""
+        session = manager.create()
+        for name, path in zip(["c.jpg", "a.jpg", "b.jpg"], sample_images):
+            manager.write_part(session, name, io.BytesIO(read(path)))
+
+        file_paths, filenames = manager.begin_commit(session)
+        assert filenames == ["a.jpg", "b.jpg", "c.jpg"]
+        with pytest.raises(UploadSessionError):
+            manager.write_part(session, "d.jpg", io.BytesIO(b"x"))
+
+        manager.end_commit(session, queued=True)
+        assert manager.get(session.id) is None
+        assert not os.path.exists(session.directory)
+        # The job's references keep the images in the store
+        store = manager.image_processor.store
+        assert store.stats()["referenced"] == 3
+        manager.image_processor.release_uploads(file_paths)
+        assert store.stats()["referenced"] == 0
+
+    def test_refused_commit_reopens_session(self, manager, sample_image_path):
+        """Test that a commit the job manager refuses can be retried."""
+        session = manager.create()
+        manager.write_part(session, "a.jpg", io.BytesIO(read(sample_image_path)))
+
+        file_paths, _ = manager.begin_commit(session)
+        manager.image_processor.release_uploads(file_paths)
+        manager.end_commit(session, queued=False)
+
+        assert manager.begin_commit(session)[0] == file_paths
+
+    def test_commit_requires_complete_parts(self, manager):
+        """Test that empty sessions and incomplete images cannot be committed."""
+        session = manager.create()
+        with pytest.raises(UploadSessionError, match="No images"):
+            manager.begin_commit(session)
+
+        manager.write_part(session, "a.jpg", io.BytesIO(b"x" * 4), 0, 10)
+        with pytest.raises(UploadSessionError, match="a.jpg"):
+            manager.begin_commit(session)
+
+        assert manager.remove_part(session, "a.jpg") is True
+        assert manager.remove_part(session, "a.jpg") is False
+
+    def test_removed_part_does_not_clobber_live_part(self, manager):
+        """Test that a part added after a removal gets its own partial file."""
+        session = manager.create()
+        manager.write_part(session, "a.jpg", io.BytesIO(b"A" * 10), 0, 20)
+        manager.write_part(session, "b.jpg", io.BytesIO(b"B" * 10), 0, 20)
+        manager.remove_part(session, "a.jpg")
+
+        manager.write_part(session, "c.jpg", io.BytesIO(b"C" * 10), 0, 20)
+        manager.write_part(session, "b.jpg", io.BytesIO(b"B" * 10), 10, 20)
+        manager.write_part(session, "c.jpg", io.BytesIO(b"C" * 10), 10, 20)
+
+        assert read(session.parts["b.jpg"].path) == b"B" * 20
+        assert read(session.parts["c.jpg"].path) == b"C" * 20
+
+    def test_session_holds_limited_parts(self, processor, temp_dir):
+        """Test that max_parts caps the images of a session."""
+        manager = UploadSessionManager(processor, os.path.join(temp_dir, "s"), max_parts=1)
+        session = manager.create()
+        manager.write_part(session, "a.jpg", io.BytesIO(b"x"))
+
+        with pytest.raises(UploadSessionError):
+            manager.write_part(session, "b.jpg", io.BytesIO(b"x"))
+        # Rewriting an existing image is still allowed
+        manager.write_part(session, "a.jpg", io.BytesIO(b"y"))
+        manager.shutdown()
+
+    def test_idle_sessions_expire(self, processor, temp_dir, sample_image_path):
+        """Test that sessions idle past the TTL release their images."""
+        manager = UploadSessionManager(processor, os.path.join(temp_dir, "s"), ttl_seconds=0.05)
+        session = manager.create()
+        manager.write_part(session, "a.jpg", io.BytesIO(read(sample_image_path)))
+        wait_decoded(session, "a.jpg")
+        time.sleep(0.06)
+
+        assert manager.get(session.id) is None
+        assert not os.path.exists(session.directory)
+        assert processor.store.stats()["referenced"] == 0
+        manager.shutdown()
+
+    def test_stale_directories_removed_at_start(self, processor, temp_dir):
+        """Test that parts left by a previous process are cleaned up."""
+        directory = os.path.join(temp_dir, "s")
+        stale = os.path.join(directory, "old")
+        os.makedirs(stale)
+        with open(os.path.join(stale, "0.part"), "wb") as f:
+            f.write(b"x")
+        os.utime(os.path.join(stale, "0.part"), (0, 0))
+        os.utime(stale, (0, 0))
+        os.makedirs(os.path.join(directory, "recent"))
+        with open(os.path.join(directory, "stray"), "wb") as f:
+            f.write(b"x")
+
+        UploadSessionManager(processor, directory)
+
+        assert sorted(os.listdir(directory)) == ["recent", "stray"]
+
+    def test_stats(self, manager):
+        """Test that stats count sessions, parts and bytes."""
+        session = manager.create()
+        manager.write_part(session, "a.jpg", io.BytesIO(b"x" * 4), 0, 10)
+
+        assert manager.stats() == {"sessions": 1, "parts": 1, "bytes": 4}
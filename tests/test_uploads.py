@@ -0,0 +1,34 @@
+"""Tests for streaming upload helpers."""
+
+import io
+import pytest
+from werkzeug.exceptions import RequestEntityTooLarge
+from mapping_service.uploads import SizeLimitedFile
+
+
+class TestSizeLimitedFile:
+    """Test suite for SizeLimitedFile."""
+
+    def test_write_within_limit(self):
+        """Test that writes under the limit reach the underlying file."""
+        limited = SizeLimitedFile(io.BytesIO(), max_size=10)
+        limited.write(b"hello")
+        limited.write(b"world")
+
+        limited.seek(0)
+        assert limited.read() == b"helloworld"
+        assert limited.bytes_written == 10
+
+    def test_write_past_limit_raises(self):
+        """Test that exceeding the limit aborts with 413."""
+        limited = SizeLimitedFile(io.BytesIO(), max_size=8)
+        limited.write(b"hello")
+
+        with pytest.raises(RequestEntityTooLarge):
+            limited.write(b"world")
+
+    def test_no_limit(self):
+        """Test that a missing limit accepts any size."""
+        limited = SizeLimitedFile(io.BytesIO())
+        limited.write(b"x" * 1024)
+        assert limited.bytes_written == 1024
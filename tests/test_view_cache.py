@@ -0,0 +1,91 @@
+"""Tests for ViewCache class."""
+
+import os
+import numpy as np
+from mapping_service.view_cache import ViewCache
+
+
+def make_view(value, size=10):
+    """Create a small decoded view array."""
+    return np.full((size, size, 3), value, dtype=np.uint8)
+
+
+class TestViewCache:
+    """Test suite for ViewCache."""
+
+    def test_make_key_depends_on_params(self):
+        """Test that preprocessing parameters are part of the key."""
+        assert ViewCache.make_key("abc", (1024,)) != ViewCache.make_key("abc", (512,))
+        assert ViewCache.make_key("abc", (1024,)) == ViewCache.make_key("abc", (1024,))
+
+    def test_get_after_put(self):
+        """Test that cached views are returned with their metadata."""
+        cache = ViewCache()
+        cache.put("key", make_view(7), {"scale": 0.5})
+
+        img, metadata = cache.get("key")
+
+        assert img[0, 0, 0] == 7
+        assert metadata == {"scale": 0.5}
+        assert not img.flags.writeable
+        assert cache.stats()["hits"] == 1
+
+    def test_miss_is_counted(self):
+        """Test that lookups of unknown keys count as misses."""
+        cache = ViewCache()
+        assert cache.get("missing") is None
+        assert cache.stats()["misses"] == 1
+        assert cache.stats()["hit_rate"] == 0.0
+
+    def test_memory_budget_evicts_least_recently_used(self):
+        """Test LRU eviction once the memory budget is exceeded."""
+        cache = ViewCache(max_bytes=2 * 300)
+        cache.put("a", make_view(1))
+        cache.put("b", make_view(2))
+        cache.get("a")
+        cache.put("c", make_view(3))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["bytes"] == 600
+
+    def test_oversized_view_not_cached(self):
+        """Test that a view larger than the budget is skipped."""
+        cache = ViewCache(max_bytes=100)
+        cache.put("big", make_view(1))
+        assert cache.stats()["entries"] == 0
+
+    def test_evicted_views_spill_to_memory_mapped_disk_tier(self, temp_dir):
+        """Test that evicted views are served from .npy memory maps."""
+        cache = ViewCache(max_bytes=300, disk_dir=temp_dir)
+        cache.put("a", make_view(1), {"scale": 1.0})
+        cache.put("b", make_view(2))
+
+        assert os.path.exists(os.path.join(temp_dir, "a.npy"))
+        img, metadata = cache.get("a")
+
+        assert isinstance(img, np.memmap)
+        assert img[0, 0, 0] == 1
+        assert metadata == {"scale": 1.0}
+        assert cache.stats()["disk_hits"] == 1
+
+    def test_disk_tier_budget(self, temp_dir):
+        """Test that the disk tier drops its oldest files over budget."""
+        cache = ViewCache(max_bytes=300, disk_dir=temp_dir, disk_max_bytes=300)
+        for key in ("a", "b", "c"):
+            cache.put(key, make_view(1))
+
+        assert not os.path.exists(os.path.join(temp_dir, "a.npy"))
+        assert os.path.exists(os.path.join(temp_dir, "b.npy"))
+        assert cache.stats()["disk_entries"] == 1
+
+    def test_disk_tier_survives_restart(self, temp_dir):
+        """Test that spilled views are indexed by a new cache instance."""
+        cache = ViewCache(max_bytes=300, disk_dir=temp_dir)
+        cache.put("a", make_view(5))
+        cache.put("b", make_view(6))
+
+        reopened = ViewCache(max_bytes=300, disk_dir=temp_dir)
+        img, _ = reopened.get("a")
+        assert img[0, 0, 0] == 5
@@ -0,0 +1,107 @@
+"""Tests for Worker class."""
+
+import os
+import threading
+import pytest
+from mapping_service.broker import BrokerJobManager, SQLiteBroker
+from mapping_service.image_processor import ImageProcessor
+from mapping_service.job_manager import Job
+from mapping_service.model_generator import ModelGenerator
+from mapping_service.pipeline import ReconstructionPipeline
+from mapping_service.worker import Worker
+
+
+@pytest.fixture
+def broker(temp_dir):
+    """Create a SQLite broker in a temporary directory."""
+    broker = SQLiteBroker(os.path.join(temp_dir, "queue.db"))
+    yield broker
+    broker.close()
+
+
+@pytest.fixture
+def pipeline(temp_dir):
+    """Create a pipeline writing into a temporary directory."""
+    return ReconstructionPipeline(
+        ImageProcessor(os.path.join(temp_dir, "uploads")),
+        ModelGenerator(output_dir=os.path.join(temp_dir, "outputs")),
+    )
+
+
+class TestWorker:
+    """Test suite for Worker."""
+
+    def test_run_once_without_jobs(self, broker, pipeline):
+        """Test that an idle worker reports that nothing ran."""
+        worker = Worker(broker, pipeline, worker_id="w")
+
+        assert worker.run_once() is False
+        assert broker.stats()["workers"] == 1
+
+    def test_runs_queued_job(self, broker, pipeline, sample_images):
+        """Test that a worker runs a job queued by an API node."""
+        manager = BrokerJobManager(broker)
+        job = Job()
+        job.record_stage("ingest", 0.01)
+        manager.enqueue(job, pipeline.run, sample_images, None, "ply")
+
+        assert Worker(broker, pipeline).run_once() is True
+
+        remote = manager.get(job.id)
+        assert remote.status == Job.DONE
+        assert remote.result["num_views_processed"] == 3
+        output_dir = pipeline.model_generator.output_dir
+        assert os.path.exists(
+            os.path.join(output_dir, remote.result["job_id"], remote.result["output_file"])
+        )
+        events = broker.events(job.id)
+        assert [e["id"] for e in events] == list(range(1, len(events) + 1))
+        assert events[0]["stage"] == "ingest"
+        assert events[-1]["status"] == Job.DONE
+        assert {"ingest", "queued", "decode", "inference"} <= set(remote.to_dict()["timings"])
+
+    def test_failed_job_is_recorded(self, broker, pipeline):
+        """Test that pipeline errors fail the job instead of the worker."""
+        manager = BrokerJobManager(broker)
+        job = Job()
+        manager.enqueue(job, pipeline.extend, "missing-parent", [])
+
+        Worker(broker, pipeline).run_once()
+
+        remote = manager.get(job.id)
+        assert remote.status == Job.FAILED
+        assert remote.error
+
+    def test_unknown_method_fails_job(self, broker, pipeline):
+        """Test that tasks may only name pipeline entry points."""
+        job = Job()
+        broker.submit(job.id, {"method": "__init__", "args": [], "kwargs": {}}, job.to_dict(), [])
+
+        Worker(broker, pipeline).run_once()
+
+        assert "Unknown task method" in broker.get(job.id)["error"]
+
+    def test_heartbeat_publishes_progress(self, broker, pipeline, sample_images):
+        """Test that progress is visible while the job is still running."""
+        manager = BrokerJobManager(broker)
+        job = Job()
+        manager.enqueue(job, pipeline.run, sample_images)
+        seen = []
+        release = threading.Event()
+        generate = pipeline.model_generator.generate_3d_model
+
+        def slow_generate(*args, **kwargs):
+            release.wait(5)
+            return generate(*args, **kwargs)
+
+        pipeline.model_generator.generate_3d_model = slow_generate
+        worker = threading.Thread(target=Worker(broker, pipeline, lease_seconds=0.3).run_once)
+        worker.start()
+        remote = manager.get(job.id)
+        while not any(e.get("stage") == "decode" for e in seen):
+            seen += remote.events_since(len(seen), timeout=2)
+        assert manager.get(job.id).to_dict()["stage"] == "decode"
+        release.set()
+        worker.join(5)
+
+        assert manager.get(job.id).status == Job.DONE